@@ -0,0 +1,89 @@
+"""
+Đo thời gian import lúc khởi động (cold start) bằng `python -X importtime`.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 300 --runs 5 --json startup.json
+
+Mỗi lần chạy là một tiến trình Python mới import `main` (không mở cửa sổ), lấy
+thời gian tích lũy của từng module từ stderr. Kết quả là lần chạy nhanh nhất để
+giảm nhiễu. Thoát với mã 1 nếu vượt ngân sách hoặc nếu một module nặng chỉ dùng
+khi cần (openpyxl, docx, requests, darkdetect) bị nạp ngay lúc khởi động.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_MODULE = "main"
+STARTUP_IMPORT_BUDGET_MS = 250
+# Các module phải được nạp lúc dùng lần đầu, không phải lúc khởi động
+LAZY_MODULES = ("openpyxl", "docx", "requests", "darkdetect")
+TOP_MODULES = 15
+
+
+def measure_import_time(module=STARTUP_MODULE):
+    """Chạy một tiến trình mới import module, trả về {tên module: µs tích lũy}."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # "import time:      self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        cumulative[parts[2].strip()] = int(parts[1])
+    return cumulative
+
+
+def run(module=STARTUP_MODULE, runs=3):
+    samples = [measure_import_time(module) for _ in range(runs)]
+    best = min(samples, key=lambda sample: sample.get(module, 0))
+    top_level = {name: us for name, us in best.items() if not name.startswith(" ")}
+    loaded = {name.strip() for name in best}
+    return {
+        "module": module,
+        "runs": runs,
+        "total_ms": best.get(module, 0) / 1000,
+        "samples_ms": [sample.get(module, 0) / 1000 for sample in samples],
+        "top_modules_ms": [(name, us / 1000) for name, us in
+                           sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:TOP_MODULES]],
+        "eager_lazy_modules": [name for name in LAZY_MODULES if name in loaded],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_IMPORT_BUDGET_MS)
+    parser.add_argument("--json", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args(argv)
+
+    report = run(runs=args.runs)
+    report["budget_ms"] = args.budget_ms
+    print(f"import {report['module']}: {report['total_ms']:.1f} ms "
+          f"(ngân sách {args.budget_ms:.0f} ms, {args.runs} lần: "
+          f"{', '.join(f'{ms:.1f}' for ms in report['samples_ms'])})")
+    for name, ms in report["top_modules_ms"]:
+        print(f"  {ms:8.1f} ms  {name}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    failed = False
+    if report["eager_lazy_modules"]:
+        print(f"Nạp sớm lúc khởi động: {', '.join(report['eager_lazy_modules'])}", file=sys.stderr)
+        failed = True
+    if report["total_ms"] > args.budget_ms:
+        print(f"Vượt ngân sách khởi động: {report['total_ms']:.1f} ms > {args.budget_ms:.0f} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Sinh database work_diary giả lập (tất định theo seed) cho benchmark.
+
+    python -m benchmarks.datagen --rows 100000 -o /tmp/diary_100k.db
+
+Dữ liệu gần với thực tế: vài mục mỗi ngày làm việc (ít vào cuối tuần), công việc và
+Phòng/Khoa phân bố lệch (vài khoa chiếm phần lớn bản ghi, phân bố Zipf), chi tiết là
+câu tiếng Việt có dấu dài ngắn khác nhau, phần lớn bản ghi ở trạng thái "Hoàn thành".
+Dữ liệu được ghi qua DatabaseManager (migrations, trigger FTS và bảng tổng hợp như
+khi chạy thật), theo lô bằng submit_insert_records.
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+from src.database.db_manager import DatabaseManager
+
+DEFAULT_SEED = 20240101
+DEFAULT_START_DATE = date(2015, 1, 1)
+GENERATE_BATCH_SIZE = 100000
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "work_diary_bench")
+
+MAIN_TASKS = [
+    "Quản trị hệ thống mạng máy tính, camera an ninh, tổng đài điện thoại",
+    "Hỗ trợ, tư vấn người dùng về thiết bị, phần mềm ứng dụng",
+    "Phối hợp thực hiện các nhiệm vụ khác của phòng",
+    "Thực hiện các nhiệm vụ khác do trưởng phòng phân công",
+    # Công việc cũ không còn trong cấu hình
+    "Bảo trì máy in, máy photocopy",
+    "Triển khai phần mềm quản lý bệnh viện",
+]
+TASK_WEIGHTS = [40, 35, 10, 8, 5, 2]
+STATUSES = ["Hoàn thành", "Đang thực hiện", "Tạm dừng"]
+STATUS_WEIGHTS = [80, 15, 5]
+
+_DEPARTMENT_PREFIXES = ["Khoa", "Phòng", "Trung tâm", "Đơn vị"]
+_DEPARTMENT_NAMES = [
+    "Nội tổng hợp", "Ngoại tổng hợp", "Hồi sức tích cực", "Cấp cứu", "Nhi", "Sản", "Tim mạch",
+    "Thần kinh", "Chấn thương chỉnh hình", "Tai Mũi Họng", "Răng Hàm Mặt", "Mắt", "Da liễu",
+    "Ung bướu", "Y học cổ truyền", "Phục hồi chức năng", "Xét nghiệm", "Chẩn đoán hình ảnh",
+    "Dược", "Dinh dưỡng", "Kiểm soát nhiễm khuẩn", "Khám bệnh", "Truyền nhiễm", "Thận nhân tạo",
+    "Tài chính kế toán", "Tổ chức cán bộ", "Kế hoạch tổng hợp", "Hành chính quản trị",
+    "Điều dưỡng", "Vật tư thiết bị", "Công nghệ thông tin", "Quản lý chất lượng", "Công tác xã hội",
+    "Nội tiết", "Hô hấp", "Tiêu hóa", "Huyết học", "Gây mê hồi sức", "Lão khoa", "Tâm thần",
+]
+_DETAIL_VERBS = ["Kiểm tra", "Cài đặt", "Sửa chữa", "Cấu hình", "Thay thế", "Hướng dẫn sử dụng",
+                 "Cập nhật", "Khắc phục sự cố", "Sao lưu dữ liệu", "Bấm lại dây mạng cho"]
+_DETAIL_OBJECTS = ["máy tính", "máy in", "camera tầng 2", "switch tầng 3", "điện thoại nội bộ",
+                   "phần mềm HIS", "phần mềm kế toán", "đầu ghi camera", "wifi khu khám bệnh",
+                   "máy chủ lưu trữ", "tài khoản email", "máy quét mã vạch", "màn hình gọi số"]
+_DETAIL_TAILS = ["theo yêu cầu của khoa", "do người dùng báo lỗi", "định kỳ hàng tháng",
+                 "sau khi mất điện", "đã bàn giao cho người dùng", "chờ linh kiện thay thế",
+                 "phối hợp với nhà cung cấp", "đã hoạt động bình thường", "ghi nhận để theo dõi thêm"]
+
+
+def _departments(rng):
+    names = [f"{prefix} {name}" for name in _DEPARTMENT_NAMES for prefix in _DEPARTMENT_PREFIXES[:2]]
+    names += [f"{rng.choice(_DEPARTMENT_PREFIXES)} {name} {n}" for n in range(1, 4) for name in _DEPARTMENT_NAMES[:20]]
+    rng.shuffle(names)
+    # Zipf: khoa thứ k được dùng tỉ lệ với 1/k
+    return names, list(accumulate(1.0 / rank for rank in range(1, len(names) + 1)))
+
+
+def _details(rng):
+    parts = [f"{rng.choice(_DETAIL_VERBS)} {rng.choice(_DETAIL_OBJECTS)} {rng.choice(_DETAIL_TAILS)}"]
+    for _ in range(rng.choices((0, 1, 2, 4), (50, 30, 15, 5))[0]):
+        parts.append(f"{rng.choice(_DETAIL_VERBS).lower()} {rng.choice(_DETAIL_OBJECTS)}")
+    return "; ".join(parts) + "."
+
+
+def iter_rows(rows, seed=DEFAULT_SEED, start_date=DEFAULT_START_DATE):
+    """Sinh rows bộ (work_date, task, department, details, status) theo thứ tự ngày tăng dần."""
+    rng = random.Random(seed)
+    departments, department_weights = _departments(rng)
+    task_weights = list(accumulate(TASK_WEIGHTS))
+    status_weights = list(accumulate(STATUS_WEIGHTS))
+    day = start_date
+    produced = 0
+    while produced < rows:
+        weekend = day.weekday() >= 5
+        per_day = min(rng.randint(0, 2) if weekend else rng.randint(3, 12), rows - produced)
+        work_date = day.isoformat()
+        for _ in range(per_day):
+            department = "" if rng.random() < 0.05 else rng.choices(departments, cum_weights=department_weights)[0]
+            yield (work_date,
+                   rng.choices(MAIN_TASKS, cum_weights=task_weights)[0],
+                   department,
+                   _details(rng),
+                   rng.choices(STATUSES, cum_weights=status_weights)[0])
+        produced += per_day
+        day += timedelta(days=1)
+
+
+def generate_database(path, rows, seed=DEFAULT_SEED, progress=None):
+    """Tạo database mới tại path với rows bản ghi. Trả về path."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    db_manager = DatabaseManager(path)
+    try:
+        batch = []
+        inserted = 0
+        for row in iter_rows(rows, seed):
+            batch.append(row)
+            if len(batch) >= GENERATE_BATCH_SIZE:
+                inserted += db_manager.submit_insert_records(batch).result()
+                batch = []
+                if progress:
+                    progress(inserted)
+        if batch:
+            inserted += db_manager.submit_insert_records(batch).result()
+        db_manager.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        db_manager.close()
+    return path
+
+
+def cached_database(rows, seed=DEFAULT_SEED, cache_dir=CACHE_DIR, progress=None):
+    """Đường dẫn database đã sinh sẵn cho (rows, seed), sinh mới nếu chưa có. Không được ghi vào file này."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"diary_{rows}_{seed}.db")
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        generate_database(tmp_path, rows, seed, progress)
+        os.replace(tmp_path, path)
+    return path
+
+
+def copy_database(source, target):
+    """Bản sao để các benchmark ghi dữ liệu không làm thay đổi database dùng chung."""
+    shutil.copyfile(source, target)
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sinh database work_diary giả lập cho benchmark")
+    parser.add_argument("--rows", type=int, default=100000, help="Số bản ghi (ví dụ 10000 đến 5000000)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    started = time.perf_counter()
+    generate_database(args.output, args.rows, args.seed,
+                      progress=lambda n: print(f"\rĐã ghi {n} bản ghi", end='', file=sys.stderr, flush=True))
+    print(f"\nĐã tạo {args.output}: {args.rows} bản ghi trong {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
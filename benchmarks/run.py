@@ -0,0 +1,334 @@
+"""
+Bộ benchmark cho các thao tác database, xuất file và sao lưu.
+
+    python -m benchmarks.run --rows 100000 --json results.json
+    python -m benchmarks.run --rows 100000 --compare results.json --threshold 1.25
+    python -m benchmarks.run --rows 1000000 --only get_recent_records,export_excel
+
+Database giả lập được sinh một lần cho mỗi (rows, seed) bởi benchmarks.datagen và dùng
+lại giữa các lần chạy. Mỗi benchmark chạy `repeat` lần (sau một lần khởi động) và ghi
+trung vị/nhỏ nhất/lớn nhất theo ms. Kết quả JSON có thể so sánh giữa hai phiên bản:
+với --compare, thoát mã 1 nếu trung vị của benchmark nào chậm hơn bản gốc quá threshold lần.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from benchmarks import bench_startup
+from benchmarks.datagen import DEFAULT_SEED, cached_database, copy_database, iter_rows
+from src.database.db_manager import DatabaseManager
+
+DEFAULT_ROWS = 100000
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.25
+# Số thao tác ghi trong các benchmark ghi (trên bản sao của database)
+SINGLE_INSERTS = 50
+QUEUED_INSERTS = 1000
+BULK_INSERT_ROWS = 10000
+
+BENCHMARKS = {}
+
+
+def benchmark(name, repeat=None):
+    """Đăng ký func(ctx) -> dict thông tin thêm (hoặc None) là một benchmark."""
+    def register(func):
+        BENCHMARKS[name] = (func, repeat)
+        return func
+    return register
+
+
+class Context:
+    """Database dùng chung cho các benchmark đọc và thư mục tạm cho các benchmark ghi."""
+
+    def __init__(self, db_path, work_dir):
+        self.db_path = db_path
+        self.work_dir = work_dir
+        self.db_manager = DatabaseManager(db_path)
+        self.last_date = self.db_manager.get_recent_records(1)[0][1]
+        last = date.fromisoformat(self.last_date)
+        self.month_from = (last - timedelta(days=30)).isoformat()
+        self.year_from = (last - timedelta(days=365)).isoformat()
+        self.busiest_task = self.db_manager.get_summary("0000-01-01", "9999-12-31", "task")[0][0]
+        self.timed_ms = None
+        self._copies = 0
+
+    @contextmanager
+    def writable_copy(self):
+        """DatabaseManager trên một bản sao mới của database, đóng và xóa khi xong."""
+        self._copies += 1
+        path = copy_database(self.db_path, os.path.join(self.work_dir, f"write_{self._copies}.db"))
+        db_manager = DatabaseManager(path)
+        try:
+            yield db_manager
+        finally:
+            db_manager.close()
+            os.remove(path)
+
+    @contextmanager
+    def timed(self):
+        """Chỉ đo phần bên trong khối (bỏ qua chuẩn bị như sao chép database)."""
+        started = time.perf_counter()
+        yield
+        self.timed_ms = (time.perf_counter() - started) * 1000
+
+    def output_path(self, name):
+        return os.path.join(self.work_dir, name)
+
+    def close(self):
+        self.db_manager.close()
+
+
+def measure(func, ctx, repeat):
+    func(ctx)  # khởi động: nạp cache trang của SQLite, import module
+    timings, info = [], None
+    for _ in range(repeat):
+        ctx.timed_ms = None
+        started = time.perf_counter()
+        info = func(ctx)
+        elapsed = (time.perf_counter() - started) * 1000
+        timings.append(ctx.timed_ms if ctx.timed_ms is not None else elapsed)
+    result = {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "repeat": repeat,
+    }
+    result.update(info or {})
+    return result
+
+
+# ---------------- Đọc ----------------
+@benchmark("get_recent_records")
+def bench_recent(ctx):
+    return {"rows": len(ctx.db_manager.get_recent_records(100))}
+
+
+@benchmark("iter_records_page.deep")
+def bench_deep_page(ctx):
+    # Trang thứ 50 của danh sách: phân trang keyset không được chậm dần theo vị trí
+    pages = ctx.db_manager.iter_records_page(page_size=200)
+    for _ in range(50):
+        page = next(pages, None)
+    return {"rows": len(page or [])}
+
+
+@benchmark("get_records_by_filters.month")
+def bench_filters_month(ctx):
+    return {"rows": len(ctx.db_manager.get_records_by_filters(ctx.month_from, ctx.last_date))}
+
+
+@benchmark("get_records_by_filters.month_task")
+def bench_filters_month_task(ctx):
+    return {"rows": len(ctx.db_manager.get_records_by_filters(ctx.month_from, ctx.last_date, task=ctx.busiest_task))}
+
+
+@benchmark("get_records_by_filters.year_status")
+def bench_filters_year_status(ctx):
+    return {"rows": len(ctx.db_manager.get_records_by_filters(ctx.year_from, ctx.last_date, status="Tạm dừng"))}
+
+
+# Các benchmark báo cáo/xuất file đo truy vấn thật: bỏ kết quả báo cáo đã lưu trước mỗi lần
+@benchmark("get_record_store.year")
+def bench_record_store_year(ctx):
+    ctx.db_manager.report_cache.clear()
+    store = ctx.db_manager.get_record_store(ctx.year_from, ctx.last_date)
+    return {"rows": len(store), "bytes": store.nbytes()}
+
+
+@benchmark("get_record_store.year_cached")
+def bench_record_store_year_cached(ctx):
+    # Lần khởi động của measure() nạp kết quả vào report_cache; các lần sau là xem lại cùng khoảng ngày
+    return {"rows": len(ctx.db_manager.get_record_store(ctx.year_from, ctx.last_date))}
+
+
+@benchmark("get_unique_departments")
+def bench_unique_departments(ctx):
+    return {"rows": len(ctx.db_manager.get_unique_departments())}
+
+
+@benchmark("get_summary.year_department")
+def bench_summary(ctx):
+    return {"rows": len(ctx.db_manager.get_summary(ctx.year_from, ctx.last_date, "department"))}
+
+
+@benchmark("search")
+def bench_search(ctx):
+    return {"rows": len(ctx.db_manager.search("máy in"))}
+
+
+# ---------------- Ghi (trên bản sao) ----------------
+@benchmark("insert.single", repeat=3)
+def bench_insert_single(ctx):
+    # Mỗi add_record chờ commit riêng (một fsync mỗi thao tác)
+    rows = list(iter_rows(SINGLE_INSERTS, seed=1))
+    with ctx.writable_copy() as db_manager, ctx.timed():
+        for row in rows:
+            db_manager.add_record(*row)
+    return {"ops": SINGLE_INSERTS, "per_op_ms": round(ctx.timed_ms / SINGLE_INSERTS, 3)}
+
+
+@benchmark("insert.queued", repeat=3)
+def bench_insert_queued(ctx):
+    # Thao tác qua hàng đợi ghi được gom thành lô
+    rows = list(iter_rows(QUEUED_INSERTS, seed=2))
+    with ctx.writable_copy() as db_manager, ctx.timed():
+        futures = [db_manager.submit_add_record(*row) for row in rows]
+        for future in futures:
+            future.result()
+    return {"ops": QUEUED_INSERTS}
+
+
+@benchmark("insert.bulk", repeat=3)
+def bench_insert_bulk(ctx):
+    rows = list(iter_rows(BULK_INSERT_ROWS, seed=3))
+    with ctx.writable_copy() as db_manager, ctx.timed():
+        inserted = db_manager.submit_insert_records(rows).result()
+    return {"rows": inserted}
+
+
+# ---------------- Xuất file và sao lưu ----------------
+@benchmark("export_excel.month", repeat=3)
+def bench_export_excel(ctx):
+    from src.utils.export_manager import export_excel
+    ctx.db_manager.report_cache.clear()
+    rows = export_excel(ctx.db_manager, ctx.output_path("report.xlsx"), ctx.month_from, ctx.last_date)
+    return {"rows": rows}
+
+
+@benchmark("export_word.month", repeat=3)
+def bench_export_word(ctx):
+    from src.utils.export_manager import export_word
+    ctx.db_manager.report_cache.clear()
+    rows = export_word(ctx.db_manager, ctx.output_path("report.docx"), ctx.month_from, ctx.last_date, group_by="date")
+    return {"rows": rows}
+
+
+@benchmark("backup.export_file", repeat=3)
+def bench_backup_file(ctx):
+    path = ctx.db_manager.export_backup(ctx.output_path("backup.db"))
+    return {"bytes": os.path.getsize(path)}
+
+
+@benchmark("backup.snapshot_incremental", repeat=3)
+def bench_backup_snapshot(ctx):
+    # Lần khởi động trong measure() tạo snapshot đầy đủ; các lần đo là snapshot tăng dần
+    ctx.db_manager.backup_database(ctx.output_path("backups"), label="bench")
+    return None
+
+
+@benchmark("backup.snapshot_full", repeat=1)
+def bench_backup_full(ctx):
+    store = tempfile.mkdtemp(dir=ctx.work_dir)
+    ctx.db_manager.backup_database(store, label="bench")
+    return None
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=bench_startup.REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(rows=DEFAULT_ROWS, seed=DEFAULT_SEED, repeat=DEFAULT_REPEAT, only=None, startup=True, log=print):
+    """Chạy các benchmark, trả về dict kết quả (dạng được ghi ra JSON)."""
+    names = [name for name in BENCHMARKS if not only or name in only or name.split(".")[0] in only]
+    log(f"Chuẩn bị database {rows} bản ghi (seed {seed})...")
+    started = time.perf_counter()
+    db_path = cached_database(rows, seed)
+    log(f"  {db_path} ({time.perf_counter() - started:.1f} s)")
+
+    report = {
+        "meta": {
+            "rows": rows,
+            "seed": seed,
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="work_diary_bench_") as work_dir:
+        ctx = Context(db_path, work_dir)
+        try:
+            # Trên database lớn (có thống kê) query planner có thể chọn kế hoạch khác với database rỗng
+            plans = ctx.db_manager.explain_public_queries()
+            log(f"  Kế hoạch truy vấn: {len(plans)} truy vấn công khai đều dùng index")
+            for name in names:
+                func, bench_repeat = BENCHMARKS[name]
+                result = measure(func, ctx, bench_repeat or repeat)
+                report["results"][name] = result
+                log(f"  {name:<40} {result['median_ms']:>10.2f} ms")
+        finally:
+            ctx.close()
+    if startup and (not only or "startup" in only):
+        startup_report = bench_startup.run()
+        report["results"]["startup.import_main"] = {"median_ms": round(statistics.median(startup_report["samples_ms"]), 3),
+                                                   "min_ms": round(startup_report["total_ms"], 3),
+                                                   "repeat": startup_report["runs"]}
+        log(f"  {'startup.import_main':<40} {report['results']['startup.import_main']['median_ms']:>10.2f} ms")
+    return report
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD, log=print):
+    """In tỉ lệ so với baseline; trả về danh sách benchmark chậm hơn quá threshold lần."""
+    regressions = []
+    if baseline["meta"].get("rows") != report["meta"]["rows"]:
+        log(f"Cảnh báo: baseline có {baseline['meta'].get('rows')} bản ghi, lần chạy này {report['meta']['rows']}.")
+    log(f"So sánh với {baseline['meta'].get('git_revision')} ({baseline['meta'].get('timestamp')}):")
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if not base or not base.get("median_ms"):
+            log(f"  {name:<40} (mới)")
+            continue
+        ratio = result["median_ms"] / base["median_ms"]
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  << CHẬM HƠN"
+        log(f"  {name:<40} {base['median_ms']:>10.2f} -> {result['median_ms']:>10.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Work Diary")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Số bản ghi của database giả lập")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--only", help="Danh sách benchmark (hoặc nhóm, ví dụ insert,backup) cách nhau bởi dấu phẩy")
+    parser.add_argument("--no-startup", action="store_true", help="Bỏ qua đo thời gian import khi khởi động")
+    parser.add_argument("--json", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--compare", help="File JSON kết quả của phiên bản gốc để so sánh")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Tỉ lệ chậm hơn tối đa cho phép khi so sánh (mặc định 1.25)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    only = set(args.only.split(",")) if args.only else None
+    report = run(args.rows, args.seed, args.repeat, only, startup=not args.no_startup)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
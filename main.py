@@ -9,12 +9,12 @@ Author: Work Diary Team
 import os
 import sys
 import logging
+import importlib.util
 import threading
 import shutil
 import tkinter as tk
 from tkinter import messagebox
 
-import darkdetect
 import ttkthemes
 from ttkthemes import ThemedTk
 
@@ -23,6 +23,7 @@ from src.config.app_config import AppConfig
 from src.database.db_manager import DatabaseManager
 from src.ui.main_window import WorkDiaryApp
 from src.utils.updater import AutoUpdater
+from src.utils.logging_setup import setup_logging
 
 # Thêm đường dẫn tuyệt đối đến thư mục src
 src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'src'))
@@ -41,22 +42,6 @@ def get_resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
-def setup_logging():
-    """Thiet lap he thong log"""
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
-
-    file_handler = logging.FileHandler(os.path.join(log_dir, 'app.log'), encoding='utf-8')
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    file_handler.setLevel(logging.DEBUG)
-
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    console_handler.setLevel(logging.INFO)
-
-    logging.basicConfig(level=logging.DEBUG, handlers=[file_handler, console_handler])
-
-
 def handle_exception(exc_type, exc_value, exc_traceback):
     """Xu ly ngoai le chua bat"""
     if issubclass(exc_type, KeyboardInterrupt):
@@ -78,12 +63,12 @@ def check_dependencies():
         'darkdetect': 'darkdetect'
     }
 
+    # find_spec chi tim module ma khong import (openpyxl, docx, requests duoc nap khi can)
     missing_packages = []
     for module, package in required_packages.items():
-        try:
-            __import__(module)
+        if importlib.util.find_spec(module) is not None:
             logging.debug(f"Tim thay thu vien: {module}")
-        except ImportError:
+        else:
             missing_packages.append(package)
             logging.error(f"Thieu thu vien: {package}")
 
@@ -108,7 +93,9 @@ def check_for_updates_background(config_manager):
 
 
 def main():
-    setup_logging()
+    # Nạp cấu hình trước để áp dụng mục "logging" (mức log theo module, file xoay vòng)
+    config_manager = AppConfig(config_file='config.json')
+    setup_logging(config_manager.get("logging"))
     sys.excepthook = handle_exception
     logger = logging.getLogger(__name__)
 
@@ -119,8 +106,7 @@ def main():
 
     try:
         # Load config
-        config_manager = AppConfig(config_file='config.json')
-        config_data = config_manager.load_config()
+        config_data = config_manager.config_data
         logger.info(f"Da tai cau hinh. Phien ban: {config_data.get('app_version', 'Unknown')}")
 
         # Tao cua so chinh
@@ -135,26 +121,25 @@ def main():
         except Exception as e:
             logger.warning(f"Khong the thiet lap duong dan theme: {e}")
 
-        # Lấy danh sách theme khả dụng
-        available_themes = root.get_themes()
-        logger.info(f"Cac theme kha dung: {available_themes}")
-
-        # Chọn theme
+        # Chọn theme; darkdetect chỉ cần khi người dùng chưa chọn theme
         theme_name = config_data.get("theme")
         if not theme_name:
+            import darkdetect
             theme_name = "equilux" if darkdetect.isDark() else "yotta"
 
-        if theme_name not in available_themes:
+        # Áp dụng theme trực tiếp; chỉ liệt kê các theme khả dụng khi theme đã lưu không tồn tại
+        try:
+            root.set_theme(theme_name)
+        except tk.TclError:
+            available_themes = root.get_themes()
             logger.warning(f"Theme '{theme_name}' khong ton tai. Dung theme '{available_themes[0]}' thay the.")
             theme_name = available_themes[0]
-
-        config_manager.set("theme", theme_name)
-        config_manager.save_config()
-
-        # Áp dụng theme
-        root.set_theme(theme_name)
+            root.set_theme(theme_name)
         logger.info(f"Da ap dung theme: {theme_name}")
 
+        if config_manager.get("theme") != theme_name:
+            config_manager.set("theme", theme_name)
+
         # Đảm bảo DB có thể ghi
         def ensure_db_writable(source_relative_path, target_path):
             source_path = get_resource_path(source_relative_path)
@@ -163,11 +148,10 @@ def main():
                 shutil.copyfile(source_path, target_path)
             return target_path
 
-        user_data_dir = os.path.join(os.path.expanduser("~"), ".work_diary")
-        os.makedirs(user_data_dir, exist_ok=True)
+        target_db_path = config_manager.get_user_db_path()
+        os.makedirs(os.path.dirname(target_db_path), exist_ok=True)
 
         relative_db_path = os.path.normpath(config_data.get('db_name', 'data/work_diary.db'))
-        target_db_path = os.path.join(user_data_dir, 'work_diary.db')
         db_path = ensure_db_writable(relative_db_path, target_db_path)
 
         # Khởi tạo database và app
@@ -0,0 +1,208 @@
+"""
+Giao diện dòng lệnh (không cần Tk) cho báo cáo, xuất file, sao lưu và phục hồi.
+
+    python -m src.cli report --from 2024-01-01 --to 2024-01-31
+    python -m src.cli export-xlsx --from 2024-01-01 --to 2024-01-31 -o baocao.xlsx
+    python -m src.cli backup --keep 14
+    python -m src.cli restore 12
+    python -m src.cli --metrics metrics.json export-xlsx -o baocao.xlsx
+
+Module này (và những gì nó import) không được import tkinter, ttkthemes hay
+tkcalendar để chạy được trên máy chủ không có màn hình. openpyxl/python-docx
+chỉ được nạp trong các lệnh cần đến chúng.
+"""
+import argparse
+import csv
+import logging
+import os
+import sys
+from datetime import date
+
+from src.config.app_config import AppConfig
+from src.database.db_manager import DatabaseManager, SUMMARY_DIMENSIONS
+from src.utils.instrumentation import METRICS
+
+
+def _open_database(args):
+    db_path = args.db or AppConfig(config_file=args.config).get_user_db_path()
+    logging.getLogger(__name__).info(f"Using database: {db_path}")
+    return DatabaseManager(db_path)
+
+
+def _print_rows(headers, rows):
+    writer = csv.writer(sys.stdout, delimiter='\t', lineterminator='\n')
+    writer.writerow(headers)
+    writer.writerows(rows)
+
+
+def cmd_report(db_manager, args):
+    from src.utils.export_manager import REPORT_HEADERS
+
+    chunks = db_manager.iter_records_by_filters(args.from_date, args.to_date, task=args.task, status=args.status)
+    _print_rows(REPORT_HEADERS, (row for chunk in chunks for row in chunk))
+    return 0
+
+
+def cmd_stats(db_manager, args):
+    print(f"Tổng số bản ghi: {db_manager.get_total_records()}")
+    for group_by in args.group_by:
+        summary = db_manager.get_summary(args.from_date, args.to_date, group_by, task=args.task, status=args.status)
+        print()
+        _print_rows([group_by, "Số bản ghi"], summary)
+    return 0
+
+
+def _report_progress(rows_written):
+    print(f"\rĐã ghi {rows_written} dòng", end='', file=sys.stderr, flush=True)
+
+
+def cmd_export_xlsx(db_manager, args):
+    from src.utils.export_manager import export_excel
+
+    rows_written = export_excel(db_manager, args.output, args.from_date, args.to_date, args.task, args.status,
+                                progress_callback=None if args.quiet else _report_progress)
+    return _finish_export(rows_written, args)
+
+
+def cmd_export_docx(db_manager, args):
+    from src.utils.export_manager import export_word
+
+    rows_written = export_word(db_manager, args.output, args.from_date, args.to_date, args.task, args.status,
+                               group_by=args.group_by, progress_callback=None if args.quiet else _report_progress)
+    return _finish_export(rows_written, args)
+
+
+def _finish_export(rows_written, args):
+    if not args.quiet:
+        print(file=sys.stderr)
+    if rows_written == 0:
+        print("Không có dữ liệu để xuất.", file=sys.stderr)
+        return 1
+    print(f"Đã xuất {rows_written} dòng vào {args.output}")
+    return 0
+
+
+def cmd_backup(db_manager, args):
+    if args.list:
+        _print_rows(["id", "created_at", "label", "size", "new_chunks"], db_manager.list_backups(args.backup_dir))
+        return 0
+    if args.output:
+        db_manager.export_backup(args.output)
+        print(f"Đã sao lưu vào {args.output}")
+    else:
+        snapshot_id = db_manager.backup_database(args.backup_dir, label=args.label)
+        print(f"Đã tạo bản sao lưu #{snapshot_id} trong {args.backup_dir}")
+    if args.keep:
+        removed = db_manager.cleanup_backups(args.backup_dir, keep_days=args.keep)
+        print(f"Đã xóa {removed} bản sao lưu cũ")
+    return 0
+
+
+def cmd_restore(db_manager, args):
+    if args.source.isdigit():
+        ok, error = db_manager.restore_snapshot(int(args.source), backup_dir=args.backup_dir)
+    else:
+        ok, error = db_manager.restore_database(args.source, backup_dir=args.backup_dir)
+    if not ok:
+        print(f"Không thể phục hồi: {error}", file=sys.stderr)
+        return 1
+    print(f"Đã phục hồi từ {args.source}")
+    return 0
+
+
+def cmd_import(db_manager, args):
+    from src.utils.import_manager import import_records
+
+    main_tasks = AppConfig(config_file=args.config).get_main_tasks()
+    progress = None if args.quiet else (
+        lambda rows_read, rows_imported: print(f"\rĐã đọc {rows_read} dòng, đã lưu {rows_imported}",
+                                               end='', file=sys.stderr, flush=True))
+    result = import_records(db_manager, args.file, main_tasks, progress_callback=progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    for line, error in result["errors"]:
+        print(f"Dòng {line}: {error}", file=sys.stderr)
+    print(f"Đã nhập {result['imported']} dòng, bỏ qua {result['skipped']} dòng lỗi.")
+    return 0
+
+
+def _add_filter_arguments(parser):
+    today = date.today()
+    parser.add_argument("--from", dest="from_date", default=today.replace(day=1).isoformat(),
+                        help="Từ ngày (YYYY-MM-DD), mặc định đầu tháng")
+    parser.add_argument("--to", dest="to_date", default=today.isoformat(), help="Đến ngày (YYYY-MM-DD), mặc định hôm nay")
+    parser.add_argument("--task", help="Lọc theo công việc chính")
+    parser.add_argument("--status", help="Lọc theo trạng thái")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Nhật ký công việc - dòng lệnh")
+    parser.add_argument("--db", help="Đường dẫn database (mặc định: database của người dùng)")
+    parser.add_argument("--config", default="config.json", help="File cấu hình")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Ghi log chi tiết ra stderr")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Không hiển thị tiến trình")
+    parser.add_argument("--metrics", metavar="FILE", help="Ghi số liệu thời gian các thao tác ra file JSON khi kết thúc")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    report = subparsers.add_parser("report", help="In báo cáo chi tiết (TSV) ra stdout")
+    _add_filter_arguments(report)
+    report.set_defaults(func=cmd_report)
+
+    stats = subparsers.add_parser("stats", help="Thống kê tổng hợp")
+    _add_filter_arguments(stats)
+    stats.add_argument("--group-by", nargs="+", choices=list(SUMMARY_DIMENSIONS), default=["task", "status"])
+    stats.set_defaults(func=cmd_stats)
+
+    export_xlsx = subparsers.add_parser("export-xlsx", help="Xuất báo cáo Excel")
+    _add_filter_arguments(export_xlsx)
+    export_xlsx.add_argument("-o", "--output", required=True)
+    export_xlsx.set_defaults(func=cmd_export_xlsx)
+
+    export_docx = subparsers.add_parser("export-docx", help="Xuất báo cáo Word")
+    _add_filter_arguments(export_docx)
+    export_docx.add_argument("-o", "--output", required=True)
+    export_docx.add_argument("--group-by", choices=["date", "task"])
+    export_docx.set_defaults(func=cmd_export_docx)
+
+    backup = subparsers.add_parser("backup", help="Tạo bản sao lưu (snapshot tăng dần)")
+    backup.add_argument("--backup-dir", default="backups")
+    backup.add_argument("--label", default="cli")
+    backup.add_argument("--keep", type=int, help="Chỉ giữ N bản sao lưu mới nhất")
+    backup.add_argument("-o", "--output", help="Sao lưu ra một file .db độc lập thay vì kho snapshot")
+    backup.add_argument("--list", action="store_true", help="Liệt kê các bản sao lưu")
+    backup.set_defaults(func=cmd_backup)
+
+    restore = subparsers.add_parser("restore", help="Phục hồi từ id snapshot hoặc file .db")
+    restore.add_argument("source")
+    restore.add_argument("--backup-dir", default="backups")
+    restore.set_defaults(func=cmd_restore)
+
+    import_parser = subparsers.add_parser("import", help="Nhập dữ liệu từ file .csv/.xlsx")
+    import_parser.add_argument("file")
+    import_parser.set_defaults(func=cmd_import)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    db_manager = _open_database(args)
+    try:
+        return args.func(db_manager, args)
+    except BrokenPipeError:
+        # stdout bị đóng sớm (ví dụ: "report | head"); chuyển về devnull để không lỗi khi thoát
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Command '{args.command}' failed: {e}", exc_info=args.verbose)
+        print(f"Lỗi: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db_manager.close()
+        if args.metrics:
+            METRICS.dump_json(args.metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
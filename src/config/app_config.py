@@ -1,6 +1,15 @@
+import atexit
+import copy
 import json
 import os
 import logging
+import threading
+
+# Database thực sự dùng khi chạy: bản sao ghi được trong thư mục của người dùng
+USER_DATA_DIR = os.path.join(os.path.expanduser("~"), ".work_diary")
+# Các lần set() liên tiếp trong khoảng này được gộp thành một lần ghi file
+SAVE_DELAY_SECONDS = 1.0
+_MISSING = object()
 
 class AppConfig:
     def __init__(self, config_file='config.json'):
@@ -11,7 +20,6 @@ class AppConfig:
             "db_version": 2,
             "db_name": "data/work_diary.db",
             "theme": "vista",
-            "recent_records_limit": 100,
             "ui": {
                 "title": "Quản lý Nhật ký Công việc Cá nhân",
                 "geometry": "1000x650",
@@ -23,18 +31,35 @@ class AppConfig:
                 "Thực hiện các nhiệm vụ khác do trưởng phòng phân công"
             ],
             "auto_update_check": True,
-            "update_repo_url": "https://api.github.com/repos/TanThinh15/work-diary/releases/latest"
+            "update_repo_url": "https://api.github.com/repos/TanThinh15/work-diary/releases/latest",
+            "logging": {
+                "level": "INFO",
+                "console_level": "INFO",
+                "file": "logs/app.log",
+                "max_bytes": 2097152,
+                "backup_count": 5,
+                "format": "json",
+                "levels": {}
+            }
         }
+        self._lock = threading.RLock()
+        self._save_timer = None
+        self._dirty = False
+        self._saved_text = None  # Nội dung file lần đọc/ghi gần nhất, để bỏ qua lần ghi không đổi gì
+        self._get_cache = {}
         # Chỉ gọi load_config() một lần duy nhất để khởi tạo dữ liệu
         self._config_data = self.load_config()
+        # Thay đổi còn chờ ghi (set() ngay trước khi thoát) vẫn được lưu
+        atexit.register(self.flush)
 
     def load_config(self):
         """Loads configuration from file, merging with defaults."""
-        config = self._default_config.copy()
+        config = copy.deepcopy(self._default_config)
         if os.path.exists(self.config_file):
             try:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
-                    user_config = json.load(f)
+                    file_text = f.read()
+                user_config = json.loads(file_text)
                 
                 # Merge user config with default config
                 # This ensures any new keys in default are added to the user's config
@@ -49,8 +74,10 @@ class AppConfig:
                 merge_dicts(self._default_config, user_config)
                 config = user_config
 
-                # Save the merged config back to ensure the file is always up-to-date
+                # Chỉ ghi lại khi việc gộp thêm khóa mặc định làm nội dung thay đổi
+                self._saved_text = file_text
                 self.save_config(config)
+                self._get_cache.clear()
                 return config
 
             except (json.JSONDecodeError, FileNotFoundError) as e:
@@ -59,41 +86,94 @@ class AppConfig:
         # If file not found or invalid, save the default config
         logging.info("Config file not found. Creating a default config file.")
         self.save_config(config)
+        self._get_cache.clear()
         return config
 
     def save_config(self, config_data=None):
-        """Saves configuration to file."""
-        data_to_save = config_data if config_data is not None else self._config_data
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, indent=4, ensure_ascii=False)
-            logging.getLogger(__name__).info("Configuration saved successfully.")
-        except Exception as e:
-            logging.getLogger(__name__).error(f"Failed to save config file: {e}")
+        """
+        Ghi cấu hình ra file ngay (bỏ qua nếu nội dung không đổi). Ghi vào file tạm rồi
+        đổi tên nên config.json không bao giờ bị ghi dở khi mất điện hay ứng dụng bị tắt.
+        """
+        with self._lock:
+            self._cancel_save_timer()
+            data_to_save = config_data if config_data is not None else self._config_data
+            text = json.dumps(data_to_save, indent=4, ensure_ascii=False)
+            if text == self._saved_text:
+                self._dirty = False
+                return
+            tmp_file = self.config_file + ".tmp"
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.config_file)
+                self._saved_text = text
+                self._dirty = False
+                logging.getLogger(__name__).info("Configuration saved successfully.")
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Failed to save config file: {e}")
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+
+    def flush(self):
+        """Ghi ngay các thay đổi còn chờ (gọi khi đóng ứng dụng)."""
+        with self._lock:
+            if self._dirty:
+                self.save_config()
+
+    def _schedule_save(self):
+        # Debounce: mỗi lần set() hoãn việc ghi thêm SAVE_DELAY_SECONDS, ghi trên luồng nền
+        self._dirty = True
+        self._cancel_save_timer()
+        self._save_timer = threading.Timer(SAVE_DELAY_SECONDS, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def _cancel_save_timer(self):
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+    @property
+    def config_data(self):
+        """Dict cấu hình đang dùng (chỉ đọc; thay đổi phải qua set() để được lưu)."""
+        return self._config_data
 
     def get(self, key, default=None):
         """Retrieves a configuration value. Supports dot notation for nested keys."""
-        parts = key.split('.')
-        current = self._config_data
-        for part in parts:
-            if isinstance(current, dict) and part in current:
-                current = current[part]
-            else:
-                return default
-        return current
+        value = self._get_cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._config_data
+            for part in key.split('.'):
+                if isinstance(value, dict) and part in value:
+                    value = value[part]
+                else:
+                    value = _MISSING
+                    break
+            # Cả khóa không tồn tại cũng được nhớ; set() và load_config() xóa bộ nhớ đệm
+            self._get_cache[key] = value
+        return default if value is _MISSING else value
 
     def set(self, key, value):
-        """Sets a configuration value. Supports dot notation for nested keys."""
-        parts = key.split('.')
-        current = self._config_data
-        for i, part in enumerate(parts):
-            if i == len(parts) - 1:
-                current[part] = value
-            else:
-                if part not in current or not isinstance(current[part], dict):
-                    current[part] = {}
-                current = current[part]
-        self.save_config()
+        """
+        Sets a configuration value. Supports dot notation for nested keys.
+        Việc ghi file được gộp và hoãn lại (xem _schedule_save); flush() để ghi ngay.
+        """
+        # Không so sánh với giá trị cũ ở đây: danh sách lấy từ get() có thể đã bị sửa tại chỗ.
+        # save_config() so sánh nội dung file và bỏ qua nếu không có gì thay đổi.
+        with self._lock:
+            parts = key.split('.')
+            current = self._config_data
+            for i, part in enumerate(parts):
+                if i == len(parts) - 1:
+                    current[part] = value
+                else:
+                    if part not in current or not isinstance(current[part], dict):
+                        current[part] = {}
+                    current = current[part]
+            self._get_cache.clear()
+            self._schedule_save()
 
     def get_main_tasks(self):
         return self.get("main_tasks", [])
@@ -104,6 +184,10 @@ class AppConfig:
     def get_db_path(self):
         return self.get("db_name", "data/work_diary.db")
 
+    def get_user_db_path(self):
+        """Đường dẫn database của người dùng (dùng chung cho giao diện và CLI)."""
+        return os.path.join(USER_DATA_DIR, 'work_diary.db')
+
     def get_app_version(self):
         return self.get("app_version", "1.0.0")
 
@@ -1,22 +1,165 @@
 import sqlite3
+import json
 import logging
 import os
-import shutil
-import datetime
-import glob
+import re
+import threading
+from contextlib import contextmanager
 
+from src.database.department_index import DepartmentIndex
+from src.database.record_store import RecordStore
+from src.database.result_cache import ResultCache
+from src.database.write_queue import WriteQueue
+from src.utils.backup_manager import list_backups, perform_backup, perform_restore, restore_from_file
+from src.utils.backup_store import BackupStore, online_backup
+from src.utils.instrumentation import instrument_methods
+
+MIGRATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migration')
+
+# Hàng đợi ghi: gom thao tác trong tối đa 50 ms hoặc 200 thao tác vào một giao dịch
+WRITE_FLUSH_INTERVAL = 0.05
+WRITE_BATCH_SIZE = 200
+# Kết quả báo cáo gần đây (chuyển qua lại Hôm nay/Tuần này/Tháng này, xuất file ngay sau khi xem)
+REPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+REPORT_CACHE_MAX_ENTRIES = 16
+# Dòng "SCAN <bảng hoặc bí danh>" của EXPLAIN QUERY PLAN (SQLite < 3.36 in "SCAN TABLE <bảng>");
+# là quét toàn bảng nếu phần còn lại không dùng index, khóa chính hay bảng ảo (FTS5, json_each)
+PLAN_SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(?P<name>\S+)(?P<rest>.*)$")
+PLAN_INDEXED_ACCESS = re.compile(r"\bUSING (?:COVERING )?INDEX\b|\bUSING INTEGER PRIMARY KEY\b|\bVIRTUAL TABLE\b")
+RECENT_RECORDS_QUERY = '''
+    SELECT id, work_date, task_description, status, department
+    FROM work_diary ORDER BY work_date DESC, created_at DESC LIMIT ?
+'''
+# Các khóa sắp xếp hợp lệ cho danh sách/báo cáo -> cột sắp xếp. Mỗi bộ cột khớp với một
+# index có sẵn (id luôn là phần cuối ngầm định của index) nên sắp xếp và phân trang
+# keyset theo bất kỳ khóa nào cũng không cần sắp xếp tạm; id ở cuối để thứ tự luôn xác định.
+# Các cột này không được NULL: so sánh keyset với NULL sẽ bỏ sót dòng (xem migration 005, 006).
+RECORD_SORT_KEYS = {
+    "date": ("work_date", "created_at", "id"),
+    "id": ("id",),
+    "task": ("task_description", "work_date", "id"),
+    "status": ("status", "work_date", "id"),
+    "department": ("department", "id"),
+}
+DEFAULT_RECORD_SORT = "date"
+RECORDS_PAGE_QUERY = '''
+    SELECT id, work_date, task_description, status, department, {sort_columns}
+    FROM work_diary {keyset}
+    ORDER BY {order_by} LIMIT ?
+'''
+RECORDS_BY_IDS_QUERY = '''
+    SELECT id, work_date, task_description, status, department, {sort_columns}
+    FROM work_diary WHERE id IN (SELECT value FROM json_each(?))
+'''
+# Các chiều tổng hợp hợp lệ cho get_summary -> biểu thức trên work_diary_daily_stats
+SUMMARY_DIMENSIONS = {
+    "task": "task_description",
+    "status": "status",
+    "department": "department",
+    "week": "strftime('%Y-W%W', work_date)",
+    "date": "work_date",
+}
+SUMMARY_QUERY = '''
+    SELECT {dimension} AS group_key, SUM(record_count) AS total
+    FROM work_diary_daily_stats
+    WHERE work_date BETWEEN ? AND ? {filters}
+    GROUP BY group_key
+    ORDER BY total DESC, group_key
+'''
+UNIQUE_DEPARTMENTS_QUERY = "SELECT DISTINCT department FROM work_diary WHERE department IS NOT NULL AND department != ''"
+# Nạp chỉ mục Phòng/Khoa từ bảng tổng hợp theo ngày thay vì quét toàn bộ work_diary
+DEPARTMENT_USAGE_QUERY = '''
+    SELECT department, SUM(record_count), MAX(work_date) FROM work_diary_daily_stats
+    WHERE department != '' GROUP BY department
+'''
+INSERT_RECORD_QUERY = '''
+    INSERT INTO work_diary (work_date, task_description, department, details, status)
+    VALUES (?, ?, ?, ?, ?)
+'''
+# Chèn lô lớn: tạm bỏ các trigger AFTER INSERT trong giao dịch rồi đồng bộ FTS và bảng
+# tổng hợp theo tập cho các id mới (AUTOINCREMENT nên id mới luôn lớn hơn id lớn nhất cũ).
+# Hai câu lệnh dưới đây phải cho kết quả giống hệt hai trigger bị tạm bỏ.
+BULK_INSERT_MIN_ROWS = 1000
+BULK_SUSPENDED_TRIGGERS = ("work_diary_fts_ai", "work_diary_stats_ai")
+BULK_FTS_SYNC_QUERY = '''
+    INSERT INTO work_diary_fts (rowid, task_description, department, details)
+    SELECT id, task_description, department, details FROM work_diary WHERE id > ?
+'''
+BULK_STATS_SYNC_QUERY = '''
+    INSERT INTO work_diary_daily_stats (work_date, task_description, status, department, record_count)
+    SELECT work_date, task_description, COALESCE(status, ''), COALESCE(department, ''), COUNT(*)
+    FROM work_diary WHERE id > ?
+    GROUP BY work_date, task_description, COALESCE(status, ''), COALESCE(department, '')
+    ON CONFLICT (work_date, task_description, status, department)
+    DO UPDATE SET record_count = record_count + excluded.record_count
+'''
+RECORD_BY_ID_QUERY = 'SELECT * FROM work_diary WHERE id = ?'
+# Cột của RecordStore; chi tiết được đọc riêng theo id (DETAILS_BY_IDS_QUERY)
+RECORD_STORE_COLUMNS = "id, work_date, task_description, department, status"
+RECORD_STORE_FETCH_SIZE = 10000
+# Danh sách id được truyền dưới dạng một mảng JSON: một câu lệnh cố định cho mọi số lượng id
+DETAILS_BY_IDS_QUERY = '''
+    SELECT ids.key, substr(w.details, 1, ?)
+    FROM json_each(?) AS ids JOIN work_diary w ON w.id = ids.value
+'''
+DETAILS_BATCH_SIZE = 5000
+DETAILS_MAX_LENGTH = 1 << 30  # substr() không giới hạn
+TOTAL_RECORDS_QUERY = 'SELECT COUNT(*) FROM work_diary'
+# Xếp hạng bm25 trên toàn bộ tập khớp: FTS5 tự xử lý ORDER BY rank (không cần B-tree tạm),
+# LIMIT/OFFSET phân trang trên thứ tự đó.
+SEARCH_QUERY = '''
+    SELECT w.id, w.work_date, w.task_description, w.status, w.department,
+           snippet(work_diary_fts, -1, '[', ']', '…', 12)
+    FROM work_diary_fts JOIN work_diary w ON w.id = work_diary_fts.rowid
+    WHERE work_diary_fts MATCH :match {date_filter}
+    ORDER BY work_diary_fts.rank LIMIT :limit OFFSET :offset
+'''
+
+@instrument_methods("db")
 class DatabaseManager:
     """
     Quản lý tất cả các tương tác database cho ứng dụng Work Diary.
     Xử lý kết nối, di chuyển schema và các thao tác CRUD khác nhau.
+
+    Kết nối được gom vào một pool sống suốt vòng đời tiến trình: một kết nối ghi
+    duy nhất (được bảo vệ bởi khóa) và một kết nối đọc riêng cho mỗi luồng.
+    Các PRAGMA chỉ được áp dụng một lần khi kết nối được mở.
     """
     def __init__(self, db_path):
         """Khởi tạo trình quản lý database với đường dẫn đến file database."""
-        self.db_path = db_path
+        self.db_path = self.db_name = db_path
         self.conn = None
+        self._write_lock = threading.RLock()
+        self._pool_lock = threading.Lock()
+        # Khóa nhỏ cho data_version và việc kiểm tra thay đổi từ bên ngoài: luồng đọc chỉ lấy
+        # khóa này, không bao giờ phải chờ một giao dịch ghi (nhập liệu, chèn lô) đang chạy
+        self._version_lock = threading.Lock()
+        # Kết nối chỉ đọc riêng để đọc PRAGMA data_version (chỉ dùng khi giữ _version_lock)
+        self._monitor = None
+        self._monitor_version = None
+        self._writing = False
+        # Tăng mỗi khi một giao dịch ghi bắt đầu (xem get_total_records)
+        self._write_generation = 0
+        self._readers = {}
+        # Tăng sau mỗi giao dịch ghi làm thay đổi dữ liệu (của ứng dụng này hoặc tiến trình
+        # khác, phát hiện qua PRAGMA data_version); giao diện dùng để bỏ qua nạp lại không cần thiết
+        self._data_version = 0
+        self._external_version = None
+        self._change_listeners = []
+        self._pending_changes = set()
+        self._pending_total_delta = 0
+        # Tổng số bản ghi, được cập nhật theo từng giao dịch thay vì SELECT COUNT(*); None = chưa biết
+        self._total_records = None
+        self.departments = DepartmentIndex()
+        self.report_cache = ResultCache(REPORT_CACHE_MAX_BYTES, REPORT_CACHE_MAX_ENTRIES)
+        self.write_queue = WriteQueue(self._write_transaction, WRITE_FLUSH_INTERVAL, WRITE_BATCH_SIZE)
         self._ensure_data_directory_exists()
-        self.conn = self._get_connection()
+        self.conn = self._get_writer()
         self.apply_migrations()
+        with self._version_lock:
+            self._begin_write(self.conn)
+            self._end_write(self.conn)
+        self.reload_departments()
         logging.getLogger(__name__).info("Kết nối database và migrations đã hoàn tất.")
 
     def _ensure_data_directory_exists(self):
@@ -25,16 +168,180 @@ class DatabaseManager:
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir)
 
-    def _get_connection(self):
-        """Tạo và trả về một đối tượng kết nối SQLite duy nhất."""
+    def _open_connection(self, read_only=False):
+        """Mở một kết nối SQLite mới và áp dụng các PRAGMA một lần duy nhất."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.execute("PRAGMA journal_mode=wal")
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            if read_only:
+                conn.execute("PRAGMA query_only=ON")
+            else:
+                conn.execute("PRAGMA journal_mode=wal")
+                # FULL: commit bền vững khi báo thành công; chi phí fsync được chia cho cả lô ghi
+                conn.execute("PRAGMA synchronous=FULL")
+            conn.execute("PRAGMA temp_store=MEMORY")
             return conn
         except sqlite3.Error as e:
             logging.getLogger(__name__).error(f"Không thể kết nối đến database: {e}", exc_info=True)
             raise
 
+    def _get_writer(self):
+        """Trả về kết nối ghi dùng chung, mở lại nếu đã bị đóng."""
+        with self._write_lock:
+            if self.conn is None:
+                self.conn = self._open_connection()
+            return self.conn
+
+    def _get_connection(self):
+        """Trả về kết nối đọc của luồng hiện tại, tạo mới khi luồng dùng lần đầu."""
+        thread_id = threading.get_ident()
+        conn = self._readers.get(thread_id)
+        if conn is not None:
+            return conn
+        with self._pool_lock:
+            # Dọn các kết nối của luồng đã kết thúc (ví dụ luồng xuất báo cáo)
+            alive = {t.ident for t in threading.enumerate()}
+            for ident in [i for i in self._readers if i not in alive]:
+                self._readers.pop(ident).close()
+            conn = self._open_connection(read_only=True)
+            self._readers[thread_id] = conn
+        logging.getLogger(__name__).debug(f"Đã mở kết nối đọc cho luồng {thread_id}.")
+        return conn
+
+    def release_connection(self):
+        """Đóng kết nối đọc của luồng hiện tại (dùng khi luồng nền sắp kết thúc)."""
+        with self._pool_lock:
+            conn = self._readers.pop(threading.get_ident(), None)
+        if conn is not None:
+            conn.close()
+
+    @property
+    def data_version(self):
+        """Phiên bản dữ liệu: tăng mỗi khi một giao dịch ghi đã commit làm thay đổi dữ liệu."""
+        return self._data_version
+
+    def add_change_listener(self, callback):
+        """
+        Đăng ký callback(data_version, changes) được gọi sau mỗi lần dữ liệu thay đổi.
+        changes là tập con của {"insert", "update", "delete", "restore", "external"}.
+        Callback chạy trên luồng đã ghi (thường là luồng của hàng đợi ghi), không phải luồng Tk.
+        """
+        self._change_listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        if callback in self._change_listeners:
+            self._change_listeners.remove(callback)
+
+    def _notify_change(self, data_version, changes):
+        for callback in list(self._change_listeners):
+            try:
+                callback(data_version, frozenset(changes))
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Change listener failed: {e}", exc_info=True)
+
+    def _record_change(self, change, total_delta=0):
+        """Ghi nhận thay đổi của giao dịch đang chạy (gọi từ các thao tác ghi, khi đang giữ khóa ghi)."""
+        self._pending_changes.add(change)
+        self._pending_total_delta += total_delta
+
+    def _mark_changed(self, change):
+        """Dữ liệu bị thay thế ngoài các thao tác ghi thông thường: tăng phiên bản, tính lại tổng số bản ghi."""
+        with self._version_lock:
+            self._data_version += 1
+            self._total_records = None
+            data_version = self._data_version
+        self.reload_departments()
+        self._notify_change(data_version, {change})
+
+    def _monitor_changed(self):
+        """True nếu data_version của kết nối theo dõi đã đổi kể từ lần đọc trước (đang giữ _version_lock)."""
+        if self._monitor is None:
+            self._monitor = self._open_connection(read_only=True)
+        version = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+        changed = self._monitor_version is not None and version != self._monitor_version
+        self._monitor_version = version
+        return changed
+
+    def _begin_write(self, conn):
+        """
+        Đánh dấu kết nối ghi conn đang bận (đang giữ khóa ghi và _version_lock). Trả về True
+        nếu tiến trình khác đã commit: lúc này chưa có commit nào của ứng dụng chưa được tính,
+        nên mọi thay đổi data_version của kết nối theo dõi đều đến từ bên ngoài.
+        """
+        self._writing = True
+        self._write_generation += 1
+        # Đọc kết nối ghi trước: commit từ bên ngoài xen giữa hai lệnh bị phát hiện ngay
+        # ở đây, hoặc muộn nhất ở _end_write
+        self._external_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return self._monitor_changed()
+
+    def _end_write(self, conn):
+        """
+        Kết thúc _begin_write: nhận data_version hiện tại của kết nối theo dõi (đã gồm commit
+        của ứng dụng) làm mốc mới. Trả về True nếu tiến trình khác đã commit trong lúc ghi:
+        data_version của kết nối ghi chỉ đổi theo commit của kết nối khác.
+        """
+        self._writing = False
+        self._monitor_changed()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = self._external_version is not None and version != self._external_version
+        self._external_version = version
+        return changed
+
+    def poll_changes(self):
+        """
+        Kiểm tra thay đổi do tiến trình khác ghi (ví dụ lệnh nhập từ dòng lệnh).
+        Nếu có, báo cho các listener với thay đổi "external". Trả về data_version hiện tại.
+
+        Không lấy khóa ghi và không dùng kết nối ghi, nên không bao giờ chờ một giao dịch
+        ghi đang chạy. data_version của kết nối theo dõi đổi theo mọi commit, kể cả của ứng
+        dụng: trong lúc đang ghi thì bỏ qua, _end_write tự kiểm tra lại khi giao dịch kết thúc.
+        """
+        with self._version_lock:
+            if self._monitor is None or self._writing:
+                return self._data_version
+            changed = self._monitor_changed()
+        if changed:
+            logging.getLogger(__name__).info("Database changed by another process.")
+            self._mark_changed("external")
+        return self._data_version
+
+    @contextmanager
+    def _write_transaction(self):
+        """Thực thi một giao dịch ghi trên kết nối ghi dùng chung."""
+        with self._write_lock:
+            conn = self._get_writer()
+            with self._version_lock:
+                external = self._begin_write(conn)
+                if external:
+                    self._data_version += 1
+                    self._total_records = None
+            changes = conn.total_changes
+            self._pending_changes = {"external"} if external else set()
+            self._pending_total_delta = 0
+            committed = None
+            try:
+                with conn:
+                    yield conn.cursor()
+                committed = self._pending_changes
+            finally:
+                # Kết thúc ghi và cộng dồn trong cùng một khối khóa: get_total_records không
+                # thể đếm xen giữa lúc commit và lúc cộng phần thay đổi
+                with self._version_lock:
+                    if self._end_write(conn):
+                        external = True
+                        self._data_version += 1
+                        self._total_records = None
+                        self._pending_changes.add("external")
+                    if committed is not None and conn.total_changes != changes:
+                        self._data_version += 1
+                        if self._total_records is not None:
+                            self._total_records += self._pending_total_delta
+                    data_version = self._data_version
+        if external:
+            self.reload_departments()
+        if committed:
+            self._notify_change(data_version, committed)
+
     def apply_migrations(self):
         """Áp dụng các di chuyển schema database từ các file SQL."""
         try:
@@ -43,12 +350,11 @@ class DatabaseManager:
             # Tạo bảng phiên bản nếu nó chưa tồn tại
             cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY)")
             
-            # Lấy phiên bản database hiện tại
-            cursor.execute("SELECT version FROM schema_version")
-            current_version_row = cursor.fetchone()
-            current_version = current_version_row[0] if current_version_row else 0
+            # Lấy phiên bản database hiện tại (mỗi migration ghi một dòng riêng)
+            cursor.execute("SELECT MAX(version) FROM schema_version")
+            current_version = cursor.fetchone()[0] or 0
             
-            migration_dir = 'src/database/migration'
+            migration_dir = MIGRATION_DIR
             if not os.path.exists(migration_dir):
                 logging.getLogger(__name__).warning("Không tìm thấy thư mục migration. Bỏ qua migration.")
                 return
@@ -70,131 +376,555 @@ class DatabaseManager:
             logging.getLogger(__name__).error(f"Migration thất bại: {e}", exc_info=True)
             raise
 
+    def explain(self, query, params=(), require_index=True, allow_temp_sort=False):
+        """
+        Trả về kế hoạch thực thi (EXPLAIN QUERY PLAN) của một truy vấn.
+        Nếu require_index=True, ném AssertionError khi truy vấn quét toàn bộ một bảng
+        (bất kể tên hay bí danh, xem _is_full_scan) hoặc (trừ khi allow_temp_sort=True)
+        phải sắp xếp bằng B-tree tạm.
+        """
+        cursor = self._get_connection().cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        plan = [row[3] for row in cursor.fetchall()]
+        if require_index:
+            for detail in plan:
+                if self._is_full_scan(detail) or (detail.startswith("USE TEMP B-TREE") and not allow_temp_sort):
+                    raise AssertionError(f"Truy vấn không dùng index ({detail}): {' '.join(query.split())}")
+        return plan
+
+    @staticmethod
+    def _is_full_scan(detail):
+        """Dòng kế hoạch detail có phải quét toàn bảng không (không tính truy vấn con và hằng)."""
+        match = PLAN_SCAN_PATTERN.match(detail)
+        if match is None or match["name"].startswith("(") or detail == "SCAN CONSTANT ROW":
+            return False
+        return PLAN_INDEXED_ACCESS.search(match["rest"]) is None
+
+    def explain_public_queries(self):
+        """Kiểm tra kế hoạch của mọi truy vấn công khai; trả về {tên: plan}."""
+        queries = {
+            "get_recent_records": (RECENT_RECORDS_QUERY, (100,)),
+            "get_unique_departments": (UNIQUE_DEPARTMENTS_QUERY, ()),
+            "get_record_by_id": (RECORD_BY_ID_QUERY, (1,)),
+            "get_total_records": (TOTAL_RECORDS_QUERY, ()),
+        }
+        for sort in RECORD_SORT_KEYS:
+            for descending in (True, False):
+                cursor_key = (None,) * len(RECORD_SORT_KEYS[sort])
+                query = self._build_page_query(sort, descending, cursor_key)
+                queries[f"iter_records_page(sort={sort}, descending={descending})"] = (query, (*cursor_key, 200))
+        for task in (None, "task"):
+            for status in (None, "status"):
+                name = f"get_records_by_filters(task={bool(task)}, status={bool(status)})"
+                queries[name] = self._build_filter_query("2000-01-01", "2000-12-31", task, status)
+        queries["get_record_store"] = self._build_filter_query("2000-01-01", "2000-12-31", sort=DEFAULT_RECORD_SORT,
+                                                               columns=RECORD_STORE_COLUMNS)
+        queries["get_details"] = (DETAILS_BY_IDS_QUERY, (50, "[1, 2]"))
+        for sort in RECORD_SORT_KEYS:
+            queries[f"get_records_by_ids(sort={sort})"] = (
+                RECORDS_BY_IDS_QUERY.format(sort_columns=", ".join(RECORD_SORT_KEYS[sort])), ("[1, 2]",))
+        queries["search"] = (SEARCH_QUERY.format(date_filter=' AND w.work_date >= :from_date'),
+                             {"match": '"term"*', "from_date": "2000-01-01", "limit": 50, "offset": 0})
+        plans = {name: self.explain(query, params) for name, (query, params) in queries.items()}
+        for sort in RECORD_SORT_KEYS:
+            # Sắp xếp báo cáo theo cột khác ngày phải sắp xếp tạm, nhưng chỉ trên các dòng đã lọc
+            query, params = self._build_filter_query("2000-01-01", "2000-12-31", sort=sort)
+            plans[f"get_records_by_filters(sort={sort})"] = self.explain(query, params, allow_temp_sort=True)
+        for group_by in SUMMARY_DIMENSIONS:
+            query, params = self._build_summary_query(group_by, "2000-01-01", "2000-12-31", "task", "status")
+            # GROUP BY/ORDER BY theo tổng luôn cần sắp xếp tạm trên các dòng tổng hợp
+            plans[f"get_summary({group_by})"] = self.explain(query, params, allow_temp_sort=True)
+        return plans
+
     def close(self):
-        """Đóng kết nối database."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
-            logging.getLogger(__name__).info("Đã đóng kết nối database.")
-            
+        """Ghi nốt hàng đợi ghi rồi đóng toàn bộ kết nối trong pool (ghi và đọc)."""
+        self.write_queue.close()
+        self.report_cache.clear()
+        with self._pool_lock:
+            readers, self._readers = list(self._readers.values()), {}
+        for reader in readers:
+            reader.close()
+        with self._write_lock:
+            with self._version_lock:
+                if self._monitor is not None:
+                    self._monitor.close()
+                    self._monitor = None
+            if self.conn:
+                # Cập nhật thống kê cho query planner trước khi đóng
+                self.conn.execute("PRAGMA optimize")
+                self.conn.close()
+                self.conn = None
+                logging.getLogger(__name__).info("Đã đóng kết nối database.")
+
     def get_recent_records(self, limit):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT id, work_date, task_description, status, department
-                FROM work_diary ORDER BY work_date DESC, created_at DESC LIMIT ?
-            ''', (limit,))
+            cursor = self._get_connection().cursor()
+            cursor.execute(RECENT_RECORDS_QUERY, (limit,))
             return cursor.fetchall()
         except sqlite3.Error as e:
             logging.getLogger(__name__).error(f"Không thể lấy các bản ghi gần đây: {e}")
             return []
     
+    @staticmethod
+    def _sort_columns(sort):
+        """Cột sắp xếp của một khóa trong RECORD_SORT_KEYS (chặn mọi tên cột khác)."""
+        columns = RECORD_SORT_KEYS.get(sort)
+        if columns is None:
+            raise ValueError(f"Khóa sắp xếp không hợp lệ: {sort}")
+        return columns
+
+    @classmethod
+    def _order_by(cls, sort, descending):
+        direction = "DESC" if descending else "ASC"
+        return ", ".join(f"{column} {direction}" for column in cls._sort_columns(sort))
+
+    @classmethod
+    def _build_page_query(cls, sort, descending, cursor_key=None):
+        columns = cls._sort_columns(sort)
+        keyset = ''
+        if cursor_key:
+            placeholders = ", ".join("?" * len(columns))
+            keyset = f"WHERE ({', '.join(columns)}) {'<' if descending else '>'} ({placeholders})"
+        return RECORDS_PAGE_QUERY.format(sort_columns=", ".join(columns), keyset=keyset,
+                                         order_by=cls._order_by(sort, descending))
+
+    def get_records_page(self, page_size=200, after=None, sort=DEFAULT_RECORD_SORT, descending=True):
+        """
+        Một trang của phân trang keyset: trả về (rows, keys), rows là các dòng
+        (id, work_date, task_description, status, department) và keys là khóa sắp xếp
+        (giá trị các cột của RECORD_SORT_KEYS[sort]) của từng dòng; keys[-1] là con trỏ
+        `after` cho trang kế tiếp. Lỗi SQLite được ném ra cho nơi gọi.
+        """
+        width = len(self._sort_columns(sort))
+        cursor_key = tuple(after) if after else None
+        query = self._build_page_query(sort, descending, cursor_key)
+        params = (*cursor_key, page_size) if cursor_key else (page_size,)
+        rows = self._get_connection().execute(query, params).fetchall()
+        return [row[:5] for row in rows], [row[5:5 + width] for row in rows]
+
+    def get_records_by_ids(self, ids, sort=DEFAULT_RECORD_SORT):
+        """
+        Các dòng theo id kèm khóa sắp xếp, cùng dạng (rows, keys) với get_records_page;
+        thứ tự bất kỳ, id không còn thì bị bỏ qua.
+        """
+        columns = self._sort_columns(sort)
+        query = RECORDS_BY_IDS_QUERY.format(sort_columns=", ".join(columns))
+        rows = self._get_connection().execute(query, (json.dumps(list(ids)),)).fetchall()
+        return [row[:5] for row in rows], [row[5:5 + len(columns)] for row in rows]
+
+    def iter_records_page(self, page_size=200, after=None, sort=DEFAULT_RECORD_SORT, descending=True):
+        """
+        Duyệt toàn bộ bảng theo từng trang bằng phân trang keyset theo khóa sort
+        (xem RECORD_SORT_KEYS), mỗi lần yield một list các dòng
+        (id, work_date, task_description, status, department).
+        Mỗi trang là một truy vấn độc lập dùng index nên chi phí không phụ thuộc
+        vào vị trí trang; `after` là con trỏ (giá trị các cột sắp xếp của dòng cuối)
+        để bắt đầu sau đó, ví dụ (work_date, created_at, id) với sort="date".
+        """
+        while True:
+            try:
+                rows, keys = self.get_records_page(page_size, after, sort, descending)
+            except sqlite3.Error as e:
+                logging.getLogger(__name__).error(f"Không thể lấy trang bản ghi: {e}")
+                return
+            if not rows:
+                return
+            after = keys[-1]
+            yield rows
+            if len(rows) < page_size:
+                return
+
     def get_unique_departments(self):
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT DISTINCT department FROM work_diary WHERE department IS NOT NULL AND department != ''")
-                return [row[0] for row in cursor.fetchall()]
+            cursor = self._get_connection().cursor()
+            cursor.execute(UNIQUE_DEPARTMENTS_QUERY)
+            return [row[0] for row in cursor.fetchall()]
         except sqlite3.Error as e:
             logging.error(f"Failed to get unique departments: {e}")
             return []
 
-    def get_records_by_filters(self, from_date, to_date, task=None, status=None):
+    def reload_departments(self):
+        """Nạp lại chỉ mục Phòng/Khoa trong bộ nhớ (khi khởi động hoặc sau khi phục hồi)."""
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                query = '''
-                    SELECT work_date, task_description, department, details, status
-                    FROM work_diary 
-                    WHERE work_date BETWEEN ? AND ?
-                '''
-                params = [from_date, to_date]
-                
-                if task:
-                    query += ' AND task_description = ?'
-                    params.append(task)
-                    
-                if status:
-                    query += ' AND status = ?'
-                    params.append(status)
-                    
-                query += ' ORDER BY work_date DESC'
-                
-                cursor.execute(query, params)
-                return cursor.fetchall()
+            self.departments.load(self._get_connection().execute(DEPARTMENT_USAGE_QUERY))
+        except sqlite3.Error as e:
+            logging.error(f"Failed to load department index: {e}")
+
+    def suggest_departments(self, text, limit=10):
+        """Gợi ý Phòng/Khoa từ chỉ mục trong bộ nhớ (không truy vấn database)."""
+        return self.departments.suggest(text, limit)
+
+    @staticmethod
+    def _build_filter_query(from_date, to_date, task=None, status=None, with_id=False, sort=None, descending=True,
+                            columns=None):
+        """
+        Dựng câu truy vấn báo cáo theo bộ lọc, trả về (query, params). with_id thêm cột id
+        ở đầu; sort là một khóa trong RECORD_SORT_KEYS (mặc định: theo ngày giảm dần);
+        columns thay danh sách cột được chọn.
+        """
+        if columns is None:
+            columns = f'{"id, " if with_id else ""}work_date, task_description, department, details, status'
+        query = f'''
+            SELECT {columns}
+            FROM work_diary 
+            WHERE work_date BETWEEN ? AND ?
+        '''
+        params = [from_date, to_date]
+        
+        if task:
+            query += ' AND task_description = ?'
+            params.append(task)
+            
+        if status:
+            query += ' AND status = ?'
+            params.append(status)
+            
+        if sort:
+            query += ' ORDER BY ' + DatabaseManager._order_by(sort, descending)
+        else:
+            query += ' ORDER BY work_date DESC'
+        return query, params
+
+    def get_records_by_filters(self, from_date, to_date, task=None, status=None, with_id=False, sort=None,
+                               descending=True):
+        try:
+            cursor = self._get_connection().cursor()
+            query, params = self._build_filter_query(from_date, to_date, task, status, with_id, sort, descending)
+            cursor.execute(query, params)
+            return cursor.fetchall()
         except sqlite3.Error as e:
             logging.error(f"Failed to get records by filters: {e}")
             return []
 
+    def get_record_store(self, from_date, to_date, task=None, status=None, sort=DEFAULT_RECORD_SORT, descending=True):
+        """
+        Giống get_records_by_filters nhưng trả về RecordStore (dạng cột, không có chi tiết),
+        đủ gọn để giữ cả báo cáo nhiều năm trong bộ nhớ.
+
+        Kết quả được giữ trong report_cache theo (bộ lọc, thứ tự) và data_version: xem lại
+        cùng khoảng ngày hoặc xuất file ngay sau khi xem không cần truy vấn lại.
+        Không được sửa store trả về.
+        """
+        key = (from_date, to_date, task or None, status or None, sort, descending)
+        # Phát hiện cả thay đổi của tiến trình khác trước khi tin vào kết quả đã lưu
+        data_version = self.poll_changes()
+        store = self.report_cache.get(key, data_version)
+        if store is not None:
+            return store
+        query, params = self._build_filter_query(from_date, to_date, task, status, sort=sort, descending=descending,
+                                                 columns=RECORD_STORE_COLUMNS)
+        store = RecordStore()
+        try:
+            cursor = self._get_connection().cursor()
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(RECORD_STORE_FETCH_SIZE)
+                if not rows:
+                    break
+                store.extend(rows)
+        except sqlite3.Error as e:
+            logging.error(f"Failed to load record store: {e}")
+            raise
+        self.report_cache.put(key, data_version, store)
+        return store
+
+    def get_details(self, ids, max_length=None):
+        """
+        Chi tiết của các bản ghi theo id, trả về danh sách cùng thứ tự với ids ("" nếu id
+        không còn). max_length chỉ đọc max_length ký tự đầu (đủ cho cột xem trước).
+        """
+        ids = list(ids)
+        details = [""] * len(ids)
+        cursor = self._get_connection().cursor()
+        for start in range(0, len(ids), DETAILS_BATCH_SIZE):
+            cursor.execute(DETAILS_BY_IDS_QUERY,
+                           (max_length or DETAILS_MAX_LENGTH, json.dumps(ids[start:start + DETAILS_BATCH_SIZE])))
+            for position, text in cursor:
+                details[start + position] = text or ""
+        return details
+
+    def _cached_filter_chunks(self, from_date, to_date, task=None, status=None, chunk_size=1000):
+        """
+        Các lô dòng của iter_records_by_filters lấy từ RecordStore đã lưu với thứ tự mặc định
+        (ngày giảm dần, như báo cáo đang hiển thị); None nếu chưa có.
+        """
+        key = (from_date, to_date, task or None, status or None, DEFAULT_RECORD_SORT, True)
+        store = self.report_cache.get(key, self.poll_changes())
+        if store is None:
+            return None
+        return store.iter_chunks(self, chunk_size)
+
+    @staticmethod
+    def _to_fts_query(text):
+        """
+        Chuyển chuỗi người dùng nhập thành biểu thức MATCH an toàn cho FTS5:
+        mỗi từ thành một cụm trong ngoặc kép, từ cuối (từ 2 ký tự) được tìm theo tiền tố.
+        """
+        terms = [t.replace('"', '') for t in (text or "").split()]
+        terms = [t for t in terms if t]
+        if not terms:
+            return None
+        match = ' '.join(f'"{t}"' for t in terms)
+        return match + '*' if len(terms[-1]) >= 2 else match
+
+    def search(self, query, from_date=None, to_date=None, limit=50, offset=0):
+        """
+        Tìm kiếm toàn văn trên công việc, Phòng/Khoa và chi tiết.
+        Trả về các dòng (id, work_date, task_description, status, department, snippet)
+        sắp theo độ liên quan (bm25) trên toàn bộ kết quả khớp, phân trang bằng limit/offset;
+        đoạn khớp trong snippet được bao bởi [ ].
+        """
+        match = self._to_fts_query(query)
+        if match is None:
+            return []
+        params = {"match": match, "limit": limit, "offset": offset}
+        date_filter = ''
+        if from_date:
+            date_filter += ' AND w.work_date >= :from_date'
+            params["from_date"] = from_date
+        if to_date:
+            date_filter += ' AND w.work_date <= :to_date'
+            params["to_date"] = to_date
+        try:
+            cursor = self._get_connection().cursor()
+            cursor.execute(SEARCH_QUERY.format(date_filter=date_filter), params)
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to search records for '{query}': {e}")
+            return []
+
+    def iter_records_by_filters(self, from_date, to_date, task=None, status=None, chunk_size=1000):
+        """
+        Giống get_records_by_filters nhưng đọc theo luồng: yield từng lô tối đa
+        chunk_size dòng bằng fetchmany thay vì nạp toàn bộ kết quả vào bộ nhớ.
+        Nếu cùng bộ lọc vừa được xem (còn trong report_cache) thì dùng lại các dòng đó.
+        """
+        chunks = self._cached_filter_chunks(from_date, to_date, task, status, chunk_size)
+        if chunks is not None:
+            yield from chunks
+            return
+        query, params = self._build_filter_query(from_date, to_date, task, status)
+        try:
+            cursor = self._get_connection().cursor()
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        except sqlite3.Error as e:
+            logging.error(f"Failed to stream records by filters: {e}")
+            raise
+
+    @staticmethod
+    def _build_summary_query(group_by, from_date, to_date, task=None, status=None):
+        if group_by not in SUMMARY_DIMENSIONS:
+            raise ValueError(f"Chiều tổng hợp không hợp lệ: {group_by}")
+        filters = ''
+        params = [from_date, to_date]
+        if task:
+            filters += ' AND task_description = ?'
+            params.append(task)
+        if status:
+            filters += ' AND status = ?'
+            params.append(status)
+        return SUMMARY_QUERY.format(dimension=SUMMARY_DIMENSIONS[group_by], filters=filters), params
+
+    def get_summary(self, from_date, to_date, group_by="task", task=None, status=None):
+        """
+        Trả về [(nhóm, số bản ghi), ...] theo group_by (task, status, department,
+        week, date), đọc từ bảng tổng hợp work_diary_daily_stats do trigger duy trì.
+        """
+        query, params = self._build_summary_query(group_by, from_date, to_date, task, status)
+        try:
+            cursor = self._get_connection().cursor()
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to get summary by {group_by}: {e}")
+            return []
+
     def get_record_by_id(self, record_id):
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM work_diary WHERE id = ?', (record_id,))
-                return cursor.fetchone()
+            cursor = self._get_connection().cursor()
+            cursor.execute(RECORD_BY_ID_QUERY, (record_id,))
+            return cursor.fetchone()
         except sqlite3.Error as e:
             logging.error(f"Failed to get record by ID {record_id}: {e}")
             return None
 
     def get_total_records(self):
+        """
+        Tổng số bản ghi. COUNT(*) chỉ chạy lần đầu (hoặc sau khi phục hồi/thay đổi từ bên
+        ngoài), trên kết nối đọc nên không phải chờ giao dịch ghi đang chạy; sau đó mỗi
+        giao dịch cộng dồn phần thay đổi của nó.
+        """
+        total = self._total_records
+        if total is not None:
+            return total
+        with self._version_lock:
+            # Giao dịch đang chạy có thể commit trước hoặc sau khi đếm: không biết con số đã gồm nó chưa
+            state = None if self._writing else (self._write_generation, self._data_version)
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM work_diary')
-                return cursor.fetchone()[0]
+            cursor = self._get_connection().cursor()
+            total = cursor.execute(TOTAL_RECORDS_QUERY).fetchone()[0]
         except sqlite3.Error as e:
             logging.error(f"Failed to get total records: {e}")
             return 0
+        with self._version_lock:
+            # Chỉ giữ con số nếu không có giao dịch ghi nào bắt đầu (và không phát hiện
+            # thay đổi từ bên ngoài) trong lúc đếm
+            if state == (self._write_generation, self._data_version) and self._total_records is None:
+                self._total_records = total
+        return total
             
+    def _insert_record(self, cursor, work_date, task, department, details, status):
+        department = department or ""  # '' thay cho NULL (xem migration 005)
+        cursor.execute(INSERT_RECORD_QUERY, (work_date, task, department, details, status))
+        self._record_change("insert", 1)
+        return cursor.lastrowid, lambda: self.departments.add(department, work_date)
+
+    def _insert_records(self, cursor, rows):
+        if len(rows) < BULK_INSERT_MIN_ROWS:
+            cursor.executemany(INSERT_RECORD_QUERY, rows)
+        else:
+            placeholders = ", ".join("?" * len(BULK_SUSPENDED_TRIGGERS))
+            triggers = cursor.execute(
+                f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+                BULK_SUSPENDED_TRIGGERS).fetchall()
+            for name, _ in triggers:
+                cursor.execute(f"DROP TRIGGER {name}")
+            last_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM work_diary").fetchone()[0]
+            cursor.executemany(INSERT_RECORD_QUERY, rows)
+            cursor.execute(BULK_FTS_SYNC_QUERY, (last_id,))
+            cursor.execute(BULK_STATS_SYNC_QUERY, (last_id,))
+            for _, sql in triggers:
+                cursor.execute(sql)
+        self._record_change("insert", len(rows))
+        usage = {}
+        for work_date, _, department, _, _ in rows:
+            if department:
+                count, last_used = usage.get(department, (0, ""))
+                usage[department] = (count + 1, max(last_used, work_date))
+        def update_index():
+            for department, (count, last_used) in usage.items():
+                self.departments.add(department, last_used, count)
+        return len(rows), update_index
+
+    def _update_record(self, cursor, record_id, work_date, task, department, details, status):
+        department = department or ""
+        old = cursor.execute('SELECT department FROM work_diary WHERE id = ?', (record_id,)).fetchone()
+        cursor.execute('''
+            UPDATE work_diary SET work_date=?, task_description=?, department=?, details=?, status=?
+            WHERE id=?
+        ''', (work_date, task, department, details, status, record_id))
+        if old is None:
+            return None, None
+        self._record_change("update")
+        def update_index():
+            self.departments.remove(old[0])
+            self.departments.add(department, work_date)
+        return None, update_index
+
+    def _delete_record(self, cursor, record_id):
+        old = cursor.execute('SELECT department FROM work_diary WHERE id = ?', (record_id,)).fetchone()
+        cursor.execute('DELETE FROM work_diary WHERE id = ?', (record_id,))
+        if old is None:
+            return None, None
+        self._record_change("delete", -1)
+        return None, lambda: self.departments.remove(old[0])
+
+    # Các hàm submit_* đưa thao tác vào hàng đợi ghi và trả về Future (hoàn tất sau khi
+    # lô chứa thao tác đã commit); các hàm đồng bộ chờ kết quả và ghi ngay không đợi gom lô.
+    def submit_add_record(self, work_date, task, department, details, status, urgent=False):
+        return self.write_queue.submit(
+            lambda cursor: self._insert_record(cursor, work_date, task, department, details, status), urgent)
+
+    def submit_update_record(self, record_id, work_date, task, department, details, status, urgent=False):
+        return self.write_queue.submit(
+            lambda cursor: self._update_record(cursor, record_id, work_date, task, department, details, status), urgent)
+
+    def submit_insert_records(self, rows):
+        """Chèn một lô dòng (work_date, task, department, details, status) bằng executemany, ghi ngay."""
+        return self.write_queue.submit(lambda cursor: self._insert_records(cursor, rows), urgent=True)
+
+    def submit_delete_record(self, record_id, urgent=False):
+        return self.write_queue.submit(lambda cursor: self._delete_record(cursor, record_id), urgent)
+
     def add_record(self, work_date, task, department, details, status):
-        try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO work_diary (work_date, task_description, department, details, status)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (work_date, task, department, details, status))
-                conn.commit()
-                return cursor.lastrowid
-        except sqlite3.Error as e:
-            logging.error(f"Failed to add record: {e}")
-            raise
+        return self.submit_add_record(work_date, task, department, details, status, urgent=True).result()
 
     def update_record(self, record_id, work_date, task, department, details, status):
-        try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE work_diary SET work_date=?, task_description=?, department=?, details=?, status=?
-                    WHERE id=?
-                ''', (work_date, task, department, details, status, record_id))
-                conn.commit()
-        except sqlite3.Error as e:
-            logging.error(f"Failed to update record with ID {record_id}: {e}")
-            raise
+        self.submit_update_record(record_id, work_date, task, department, details, status, urgent=True).result()
 
     def delete_record(self, record_id):
-        try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM work_diary WHERE id = ?', (record_id,))
-                conn.commit()
-        except sqlite3.Error as e:
-            logging.error(f"Failed to delete record with ID {record_id}: {e}")
-            raise
+        self.submit_delete_record(record_id, urgent=True).result()
+
+    def backup_database(self, backup_dir="backups", progress_callback=None, label="manual"):
+        """
+        Tạo một snapshot tăng dần trong kho sao lưu backup_dir. Bản sao được lấy
+        trực tuyến bằng sqlite3 backup API (an toàn khi ứng dụng đang ghi, không cần
+        đóng kết nối) nên có thể gọi từ luồng nền. Trả về id của snapshot.
+        """
+        ok, result = perform_backup(self.db_path, backup_dir, progress_callback, label=label)
+        if not ok:
+            raise RuntimeError(result)
+        return result
 
-    def backup_database(self, backup_dir="backups"):
-        if not os.path.exists(backup_dir):
-            os.makedirs(backup_dir)
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = os.path.join(backup_dir, f"work_diary_backup_{timestamp}.db")
-        shutil.copy2(self.db_path, backup_file)
+    def export_backup(self, backup_file, progress_callback=None):
+        """Sao lưu trực tuyến toàn bộ database ra một file .db độc lập."""
+        online_backup(self.db_path, backup_file, progress_callback)
         logging.getLogger(__name__).info(f"Database đã được sao lưu vào {backup_file}")
+        return backup_file
+
+    def list_backups(self, backup_dir="backups"):
+        return list_backups(backup_dir)
+
+    def restore_snapshot(self, snapshot_id, backup_dir="backups", progress_callback=None):
+        """
+        Phục hồi database từ một snapshot qua kết nối ghi đang mở (tạo snapshot an toàn
+        trước khi phục hồi), rồi áp dụng lại migrations cho bản sao lưu cũ hơn. Có thể gọi
+        từ luồng nền; các listener nhận thay đổi "restore" khi xong.
+        Trả về (thành công, thông báo lỗi).
+        """
+        self.write_queue.flush()
+        with self._write_lock:
+            conn = self._get_writer()
+            with self._version_lock:
+                self._begin_write(conn)
+            try:
+                ok, error = perform_restore(self.db_path, snapshot_id, backup_dir, target_conn=conn,
+                                            progress_callback=progress_callback)
+                if ok:
+                    self.apply_migrations()
+            finally:
+                with self._version_lock:
+                    self._end_write(conn)
+        if ok:
+            self._mark_changed("restore")
+        return ok, error
+
+    def restore_database(self, restore_file, backup_dir="backups", progress_callback=None):
+        """Giống restore_snapshot nhưng phục hồi từ một file .db bên ngoài kho sao lưu."""
+        self.write_queue.flush()
+        with self._write_lock:
+            conn = self._get_writer()
+            with self._version_lock:
+                self._begin_write(conn)
+            try:
+                ok, error = restore_from_file(self.db_path, restore_file, backup_dir, target_conn=conn,
+                                              progress_callback=progress_callback)
+                if ok:
+                    self.apply_migrations()
+            finally:
+                with self._version_lock:
+                    self._end_write(conn)
+        if ok:
+            self._mark_changed("restore")
+        return ok, error
 
     def cleanup_backups(self, backup_dir="backups", keep_days=7):
-        all_backups = glob.glob(os.path.join(backup_dir, "*.db"))
-        all_backups.sort(key=os.path.getmtime, reverse=True)
-        backups_to_keep = all_backups[:keep_days]
-        for old_backup in all_backups[keep_days:]:
-            os.remove(old_backup)
-            logging.getLogger(__name__).info(f"Đã xóa bản sao lưu cũ: {old_backup}")
\ No newline at end of file
+        """Chỉ giữ keep_days snapshot mới nhất trong kho sao lưu."""
+        removed = BackupStore(backup_dir).prune(keep_last=keep_days)
+        logging.getLogger(__name__).info(f"Đã xóa {removed} bản sao lưu cũ trong {backup_dir}")
+        return removed
@@ -0,0 +1,93 @@
+import threading
+import unicodedata
+
+
+def normalize_text(text):
+    """Chuẩn hóa để so khớp không dấu: bỏ dấu tiếng Việt, 'đ' -> 'd', không phân biệt hoa thường."""
+    decomposed = unicodedata.normalize('NFD', text or "")
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.replace('đ', 'd').replace('Đ', 'D').casefold().strip()
+
+
+class DepartmentIndex:
+    """
+    Chỉ mục Phòng/Khoa trong bộ nhớ cho gợi ý tự động hoàn thành.
+
+    Mỗi Phòng/Khoa lưu số lần dùng và ngày dùng gần nhất. Danh sách được sắp xếp
+    sẵn theo (tần suất, gần đây) và chỉ sắp lại khi dữ liệu đổi, nên mỗi lần gợi ý
+    chỉ là một lượt duyệt qua vài trăm chuỗi đã chuẩn hóa.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # department -> [count, last_used, normalized]
+        self._ranked = None
+
+    def load(self, rows):
+        """Nạp lại toàn bộ chỉ mục từ các dòng (department, count, last_used)."""
+        entries = {}
+        for department, count, last_used in rows:
+            if department:
+                entries[department] = [count, last_used or "", normalize_text(department)]
+        with self._lock:
+            self._entries = entries
+            self._ranked = None
+
+    def add(self, department, used_at="", count=1):
+        if not department:
+            return
+        with self._lock:
+            entry = self._entries.get(department)
+            if entry is None:
+                self._entries[department] = [count, used_at or "", normalize_text(department)]
+            else:
+                entry[0] += count
+                entry[1] = max(entry[1], used_at or "")
+            self._ranked = None
+
+    def remove(self, department):
+        if not department:
+            return
+        with self._lock:
+            entry = self._entries.get(department)
+            if entry is None:
+                return
+            entry[0] -= 1
+            if entry[0] <= 0:
+                del self._entries[department]
+            self._ranked = None
+
+    def names(self):
+        """Danh sách Phòng/Khoa hiện có (thứ tự bất kỳ)."""
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _ranked_entries(self):
+        if self._ranked is None:
+            self._ranked = sorted(((entry[2], department) for department, entry in self._entries.items()),
+                                  key=lambda item: (self._entries[item[1]][0], self._entries[item[1]][1]),
+                                  reverse=True)
+        return self._ranked
+
+    def suggest(self, text, limit=10):
+        """
+        Trả về tối đa limit Phòng/Khoa chứa text (không dấu). Các mục bắt đầu bằng
+        text được ưu tiên, sau đó xếp theo tần suất rồi theo lần dùng gần nhất.
+        """
+        needle = normalize_text(text)
+        if not needle:
+            return []
+        with self._lock:
+            ranked = self._ranked_entries()
+        prefix_matches, other_matches = [], []
+        for normalized, department in ranked:
+            if normalized.startswith(needle):
+                prefix_matches.append(department)
+                if len(prefix_matches) >= limit:
+                    break
+            elif needle in normalized and len(other_matches) < limit:
+                other_matches.append(department)
+        return (prefix_matches + other_matches)[:limit]
@@ -0,0 +1,26 @@
+-- Bảng nhật ký công việc chính mà DatabaseManager sử dụng
+CREATE TABLE IF NOT EXISTS work_diary (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    work_date TEXT NOT NULL,
+    task_description TEXT NOT NULL,
+    department TEXT,
+    details TEXT,
+    status TEXT NOT NULL DEFAULT 'Đang thực hiện',
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Danh sách gần đây: ORDER BY work_date DESC, created_at DESC
+CREATE INDEX IF NOT EXISTS idx_work_diary_date_created
+    ON work_diary (work_date, created_at);
+
+-- Báo cáo lọc theo công việc: task_description = ? AND work_date BETWEEN ? AND ?
+CREATE INDEX IF NOT EXISTS idx_work_diary_task_date
+    ON work_diary (task_description, work_date);
+
+-- Báo cáo lọc theo trạng thái: status = ? AND work_date BETWEEN ? AND ?
+CREATE INDEX IF NOT EXISTS idx_work_diary_status_date
+    ON work_diary (status, work_date);
+
+-- Gợi ý Phòng/Khoa: SELECT DISTINCT department
+CREATE INDEX IF NOT EXISTS idx_work_diary_department
+    ON work_diary (department);
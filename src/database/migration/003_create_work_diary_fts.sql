@@ -0,0 +1,41 @@
+-- Bỏ chỉ mục FTS cũ gắn với bảng diary không còn được sử dụng
+DROP TRIGGER IF EXISTS diary_ai;
+DROP TRIGGER IF EXISTS diary_au;
+DROP TRIGGER IF EXISTS diary_ad;
+DROP TABLE IF EXISTS diary_fts;
+
+-- Bảng ảo FTS5 (external content) cho tìm kiếm toàn văn trên work_diary.
+-- remove_diacritics cho phép gõ "phong mang" vẫn khớp "phòng mạng";
+-- prefix='2 3' lập sẵn chỉ mục tiền tố để tìm "cam*" không phải duyệt mọi từ.
+CREATE VIRTUAL TABLE IF NOT EXISTS work_diary_fts USING fts5(
+    task_description,
+    department,
+    details,
+    content='work_diary',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+-- Trigger đồng bộ khi thêm bản ghi
+CREATE TRIGGER IF NOT EXISTS work_diary_fts_ai AFTER INSERT ON work_diary BEGIN
+    INSERT INTO work_diary_fts(rowid, task_description, department, details)
+    VALUES (new.id, new.task_description, new.department, new.details);
+END;
+
+-- Trigger đồng bộ khi xóa bản ghi
+CREATE TRIGGER IF NOT EXISTS work_diary_fts_ad AFTER DELETE ON work_diary BEGIN
+    INSERT INTO work_diary_fts(work_diary_fts, rowid, task_description, department, details)
+    VALUES ('delete', old.id, old.task_description, old.department, old.details);
+END;
+
+-- Trigger đồng bộ khi sửa bản ghi (chỉ khi cột được lập chỉ mục thay đổi)
+CREATE TRIGGER IF NOT EXISTS work_diary_fts_au AFTER UPDATE OF task_description, department, details ON work_diary BEGIN
+    INSERT INTO work_diary_fts(work_diary_fts, rowid, task_description, department, details)
+    VALUES ('delete', old.id, old.task_description, old.department, old.details);
+    INSERT INTO work_diary_fts(rowid, task_description, department, details)
+    VALUES (new.id, new.task_description, new.department, new.details);
+END;
+
+-- Lập chỉ mục cho các bản ghi đã có
+INSERT INTO work_diary_fts(work_diary_fts) VALUES ('rebuild');
@@ -0,0 +1,50 @@
+-- Bảng tổng hợp số bản ghi theo ngày × công việc × trạng thái × Phòng/Khoa.
+-- Báo cáo tổng hợp đọc từ bảng này thay vì quét work_diary.
+CREATE TABLE IF NOT EXISTS work_diary_daily_stats (
+    work_date TEXT NOT NULL,
+    task_description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    department TEXT NOT NULL,
+    record_count INTEGER NOT NULL,
+    PRIMARY KEY (work_date, task_description, status, department)
+) WITHOUT ROWID;
+
+-- Trigger cập nhật tăng dần khi thêm bản ghi
+CREATE TRIGGER IF NOT EXISTS work_diary_stats_ai AFTER INSERT ON work_diary BEGIN
+    INSERT INTO work_diary_daily_stats (work_date, task_description, status, department, record_count)
+    VALUES (new.work_date, new.task_description, COALESCE(new.status, ''), COALESCE(new.department, ''), 1)
+    ON CONFLICT (work_date, task_description, status, department)
+    DO UPDATE SET record_count = record_count + 1;
+END;
+
+-- Trigger cập nhật khi xóa bản ghi
+CREATE TRIGGER IF NOT EXISTS work_diary_stats_ad AFTER DELETE ON work_diary BEGIN
+    UPDATE work_diary_daily_stats SET record_count = record_count - 1
+    WHERE work_date = old.work_date AND task_description = old.task_description
+      AND status = COALESCE(old.status, '') AND department = COALESCE(old.department, '');
+    DELETE FROM work_diary_daily_stats
+    WHERE work_date = old.work_date AND task_description = old.task_description
+      AND status = COALESCE(old.status, '') AND department = COALESCE(old.department, '')
+      AND record_count <= 0;
+END;
+
+-- Trigger chuyển số đếm từ nhóm cũ sang nhóm mới khi sửa các cột được tổng hợp
+CREATE TRIGGER IF NOT EXISTS work_diary_stats_au AFTER UPDATE OF work_date, task_description, status, department ON work_diary BEGIN
+    UPDATE work_diary_daily_stats SET record_count = record_count - 1
+    WHERE work_date = old.work_date AND task_description = old.task_description
+      AND status = COALESCE(old.status, '') AND department = COALESCE(old.department, '');
+    DELETE FROM work_diary_daily_stats
+    WHERE work_date = old.work_date AND task_description = old.task_description
+      AND status = COALESCE(old.status, '') AND department = COALESCE(old.department, '')
+      AND record_count <= 0;
+    INSERT INTO work_diary_daily_stats (work_date, task_description, status, department, record_count)
+    VALUES (new.work_date, new.task_description, COALESCE(new.status, ''), COALESCE(new.department, ''), 1)
+    ON CONFLICT (work_date, task_description, status, department)
+    DO UPDATE SET record_count = record_count + 1;
+END;
+
+-- Tổng hợp các bản ghi đã có
+INSERT OR REPLACE INTO work_diary_daily_stats (work_date, task_description, status, department, record_count)
+SELECT work_date, task_description, COALESCE(status, ''), COALESCE(department, ''), COUNT(*)
+FROM work_diary
+GROUP BY work_date, task_description, COALESCE(status, ''), COALESCE(department, '');
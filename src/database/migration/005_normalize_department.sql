@@ -0,0 +1,4 @@
+-- Phòng/Khoa trống được lưu là '' thay vì NULL để phân trang keyset khi sắp xếp theo
+-- Phòng/Khoa (so sánh (department, id) < (?, ?)) không bỏ sót dòng nào.
+-- Bảng tổng hợp đã dùng COALESCE(department, '') nên không thay đổi.
+UPDATE work_diary SET department = '' WHERE department IS NULL;
@@ -0,0 +1,7 @@
+-- Bảng work_diary cũ (tạo trước migration 002) có created_at và status cho phép NULL.
+-- So sánh keyset (work_date, created_at, id) < (?, ?, ?) với NULL cho kết quả không xác
+-- định nên phân trang theo ngày/trạng thái bỏ sót các dòng đó: điền giá trị như 005 đã
+-- làm cho Phòng/Khoa. created_at lấy theo ngày làm việc, status theo mặc định của bảng.
+-- (work_date và task_description không thể NULL: bảng tổng hợp ở 004 đã yêu cầu NOT NULL.)
+UPDATE work_diary SET created_at = work_date WHERE created_at IS NULL;
+UPDATE work_diary SET status = 'Đang thực hiện' WHERE status IS NULL;
@@ -0,0 +1,134 @@
+from array import array
+from datetime import date
+
+
+class StringTable:
+    """Bảng chuỗi: mỗi giá trị khác nhau (công việc, Phòng/Khoa, trạng thái) được lưu một lần, dòng chỉ giữ mã số."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class RecordStore:
+    """
+    Kết quả báo cáo lưu theo cột, gọn trong bộ nhớ.
+
+    Thay vì mỗi dòng là một tuple chuỗi, mỗi cột là một array: id (int64), ngày dưới dạng
+    số ngày (date.toordinal, int32), công việc/Phòng/Khoa/trạng thái là mã số trỏ vào
+    StringTable. Một dòng tốn ~24 byte, nên 1 triệu dòng chỉ khoảng 24 MB. Cột chi tiết
+    (dài, gần như không trùng lặp) không được giữ: iter_chunks() và DatabaseManager.get_details()
+    đọc lại theo id khi cần, từng lô một.
+
+    Chỉ số dòng (index) là vị trí trong store; group_indexes() trả về array chỉ số theo nhóm.
+    """
+    COLUMNS = ("task", "department", "status")
+
+    def __init__(self):
+        self.ids = array('q')
+        self.days = array('i')
+        self.tasks = array('I')
+        self.departments = array('I')
+        self.statuses = array('I')
+        self.tables = {column: StringTable() for column in self.COLUMNS}
+        self._date_texts = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def extend(self, rows):
+        """Thêm các dòng (id, work_date 'YYYY-MM-DD', task, department, status)."""
+        ids_append, days_append = self.ids.append, self.days.append
+        tasks_append, departments_append, statuses_append = (
+            self.tasks.append, self.departments.append, self.statuses.append)
+        task_code, department_code, status_code = (self.tables[column].code for column in self.COLUMNS)
+        # Số ngày khác nhau ít hơn nhiều so với số dòng: nhớ kết quả chuyển đổi
+        ordinals = {}
+        for record_id, work_date, task, department, status in rows:
+            day = ordinals.get(work_date)
+            if day is None:
+                day = ordinals[work_date] = date.fromisoformat(work_date).toordinal()
+            ids_append(record_id)
+            days_append(day)
+            tasks_append(task_code(task or ""))
+            departments_append(department_code(department or ""))
+            statuses_append(status_code(status or ""))
+
+    def work_date(self, index):
+        day = self.days[index]
+        text = self._date_texts.get(day)
+        if text is None:
+            text = self._date_texts[day] = date.fromordinal(day).isoformat()
+        return text
+
+    def rows(self, indexes=None, details=None):
+        """
+        Sinh các dòng (id, work_date, task, department, details, status) như kết quả SQL.
+        details là dãy chi tiết tương ứng với từng dòng được sinh (mặc định: chuỗi rỗng).
+        """
+        tasks, departments, statuses = (self.tables[column].values for column in self.COLUMNS)
+        if indexes is None:
+            indexes = range(len(self))
+        for position, i in enumerate(indexes):
+            yield (self.ids[i], self.work_date(i), tasks[self.tasks[i]], departments[self.departments[i]],
+                   details[position] if details is not None else "", statuses[self.statuses[i]])
+
+    def iter_chunks(self, db_manager, chunk_size=1000, indexes=None):
+        """
+        Sinh từng lô dòng (work_date, task, department, details, status) để xuất file;
+        chi tiết của mỗi lô được đọc theo id bằng db_manager.get_details().
+        """
+        if indexes is None:
+            indexes = range(len(self))
+        for start in range(0, len(indexes), chunk_size):
+            chunk = indexes[start:start + chunk_size]
+            details = db_manager.get_details([self.ids[i] for i in chunk])
+            yield [row[1:] for row in self.rows(chunk, details)]
+
+    def group_indexes(self, group_by):
+        """
+        {khóa: array chỉ số dòng}, các nhóm theo thứ tự xuất hiện đầu tiên.
+        group_by: task, department, status, date hoặc week.
+        """
+        groups = {}
+        by_code = {}
+        codes = self._group_codes(group_by)
+        keys = self._group_key(group_by)
+        for i, code in enumerate(codes):
+            group = by_code.get(code)
+            if group is None:
+                # Nhiều mã có thể cùng một khóa (các ngày trong một tuần)
+                group = by_code[code] = groups.setdefault(keys(code), array('i'))
+            group.append(i)
+        return groups
+
+    def nbytes(self):
+        """Ước lượng bộ nhớ (byte) của các cột; bảng chuỗi được tính gần đúng."""
+        columns = (self.ids, self.days, self.tasks, self.departments, self.statuses)
+        strings = sum(len(value) * 2 + 64 for table in self.tables.values() for value in table.values)
+        return sum(column.itemsize * len(column) for column in columns) + strings
+
+    def _group_codes(self, group_by):
+        if group_by in ("date", "week"):
+            return self.days
+        if group_by not in self.COLUMNS:
+            raise ValueError(f"Cột không hợp lệ: {group_by}")
+        return {"task": self.tasks, "department": self.departments, "status": self.statuses}[group_by]
+
+    def _group_key(self, group_by):
+        if group_by == "date":
+            return lambda day: date.fromordinal(day).isoformat()
+        if group_by == "week":
+            # Giống strftime('%Y-W%W', work_date) của SQLite
+            return lambda day: date.fromordinal(day).strftime('%Y-W%W')
+        return self.tables[group_by].values.__getitem__
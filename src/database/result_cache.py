@@ -0,0 +1,76 @@
+import sys
+import threading
+from collections import OrderedDict
+
+# Số dòng lấy mẫu để ước lượng dung lượng một kết quả
+_SIZE_SAMPLE_ROWS = 64
+
+
+def estimate_size(rows):
+    """
+    Ước lượng số byte bộ nhớ của danh sách tuple (lấy mẫu đều, không duyệt hết các dòng),
+    hoặc rows.nbytes() với kết quả dạng cột (RecordStore).
+    """
+    if hasattr(rows, "nbytes"):
+        return rows.nbytes()
+    if not rows:
+        return sys.getsizeof(rows)
+    step = max(1, len(rows) // _SIZE_SAMPLE_ROWS)
+    sample = rows[::step]
+    per_row = sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) for row in sample) / len(sample)
+    return sys.getsizeof(rows) + int(per_row * len(rows))
+
+
+class ResultCache:
+    """
+    Bộ nhớ đệm LRU cho kết quả truy vấn, giới hạn theo tổng dung lượng ước lượng.
+
+    Mỗi mục lưu kèm data_version lúc truy vấn; get() với phiên bản khác coi như không có
+    (và bỏ mục đó), nên mọi thao tác ghi tự làm mất hiệu lực kết quả cũ mà không cần
+    xóa chủ động. Danh sách trả về được dùng chung giữa các lần gọi, không được sửa.
+    """
+
+    def __init__(self, max_bytes, max_entries):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (data_version, rows, size)
+        self._bytes = 0
+        self.hits = self.misses = 0
+
+    def get(self, key, data_version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != data_version:
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, data_version, rows):
+        size = estimate_size(rows)
+        # Một kết quả quá lớn sẽ đẩy hết các mục khác ra ngoài; không giữ lại
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (data_version, rows, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+    def _discard(self, key):
+        self._bytes -= self._entries.pop(key)[2]
@@ -0,0 +1,112 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class WriteQueue:
+    """
+    Hàng đợi ghi (write-behind) gom các thao tác ghi thành một giao dịch.
+
+    Mỗi thao tác là một hàm op(cursor) -> (kết quả, hàm gọi sau commit hoặc None).
+    Luồng nền lấy thao tác đầu tiên rồi gom thêm tới batch_size thao tác hoặc hết
+    flush_interval giây, chạy tất cả trong một giao dịch (mỗi thao tác một SAVEPOINT
+    để lỗi của một thao tác không làm hỏng cả lô) và chỉ trả kết quả qua Future sau
+    khi giao dịch đã commit, nên mỗi lô chỉ tốn một lần fsync.
+    """
+
+    def __init__(self, transaction, flush_interval=0.05, batch_size=200):
+        self.transaction = transaction
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="WriteQueue", daemon=True)
+        self._worker.start()
+
+    def submit(self, op, urgent=False):
+        """
+        Đưa op vào hàng đợi, trả về Future được hoàn tất sau khi lô chứa op đã commit.
+        urgent=True ghi lô hiện tại ngay, không chờ hết flush_interval.
+        """
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("Write queue is closed")
+            self._queue.put((op, future, urgent))
+        return future
+
+    def flush(self, timeout=None):
+        """Chờ cho tới khi mọi thao tác đã gửi trước đó được commit."""
+        self.submit(lambda cursor: (None, None), urgent=True).result(timeout)
+
+    def close(self, timeout=None):
+        """Ghi nốt các thao tác còn trong hàng đợi rồi dừng luồng nền."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            urgent = item[2]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not urgent:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                urgent = item[2]
+            self._execute(batch)
+
+    def _execute(self, batch):
+        outcomes = []
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("BEGIN IMMEDIATE")
+                for op, future, _ in batch:
+                    cursor.execute("SAVEPOINT write_op")
+                    try:
+                        result, after_commit = op(cursor)
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO write_op")
+                        cursor.execute("RELEASE write_op")
+                        self.logger.error(f"Queued write failed: {e}", exc_info=True)
+                        outcomes.append((future, None, None, e))
+                        continue
+                    cursor.execute("RELEASE write_op")
+                    outcomes.append((future, result, after_commit, None))
+        except Exception as e:
+            self.logger.error(f"Failed to commit batch of {len(batch)} writes: {e}", exc_info=True)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for future, result, after_commit, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+                continue
+            if after_commit is not None:
+                try:
+                    after_commit()
+                except Exception as e:
+                    self.logger.error(f"Post-commit hook failed: {e}", exc_info=True)
+            future.set_result(result)
+        self.logger.debug(f"Committed batch of {len(batch)} writes.")
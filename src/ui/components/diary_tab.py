@@ -5,13 +5,21 @@ from tkcalendar import DateEntry
 import os
 import logging
 
+from src.ui.components.tree_binder import TreeviewBinder, show_sort_indicator
 from src.ui.dialogs.task_manager_dialog import TaskManagerDialog
 from src.utils.toast import show_toast
 
 class DiaryTab:
-    def __init__(self, notebook, db_manager, config, status_bar_callback, config_manager):
+    PAGE_SIZE = 200          # số dòng nạp mỗi lần cuộn gần cuối danh sách
+    SEARCH_RESULT_LIMIT = 100
+    DEPARTMENT_SUGGESTION_LIMIT = 8
+    # Cột -> khóa sắp xếp của DatabaseManager (sắp xếp trên toàn bộ dữ liệu bằng SQL)
+    SORT_KEYS = {'ID': "id", 'Ngày': "date", 'Công việc': "task", 'Trạng thái': "status", 'Phòng/Khoa': "department"}
+
+    def __init__(self, notebook, db_manager, config, status_bar_callback, config_manager, query_executor):
         self.frame = ttk.Frame(notebook)
         self.db_manager = db_manager
+        self.query_executor = query_executor
         self.config = config or {}
         self.config_manager = config_manager
         self.status_bar_callback = status_bar_callback
@@ -26,6 +34,19 @@ class DiaryTab:
         self.auto_save_interval = self.config.get("diary.auto_save_interval", 30000)  # ms
         self.autocomplete_listbox = None
 
+        # Tìm kiếm toàn văn (debounce)
+        self.search_after_id = None
+        self._search_snippets = {}
+
+        # Phân trang keyset cho danh sách nhật ký: khóa sắp xếp của dòng cuối đã nạp
+        # (None = đã nạp hết) và iid -> (dòng, khóa sắp xếp) của các dòng đã nạp
+        self._next_cursor = None
+        self._loaded = {}
+        self._page_pending = False
+        # id các bản ghi vừa lưu: lần làm mới sau đọc lại chúng dù nằm sâu trong danh sách
+        self._stale_ids = set()
+        self._sort_column, self._sort_descending = 'Ngày', True
+
         self._create_widgets()
         self.load_records()
         logging.getLogger(__name__).info("DiaryTab initialized.")
@@ -104,22 +125,38 @@ class DiaryTab:
 
         # ==== Danh sách nhật ký ====
         list_frame = ttk.LabelFrame(self.frame, text="Nhật ký gần đây", padding=10)
+        self.list_frame = list_frame
         list_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=5)
         list_frame.columnconfigure(0, weight=1)
-        list_frame.rowconfigure(0, weight=1)
+        list_frame.rowconfigure(1, weight=1)
+
+        search_frame = ttk.Frame(list_frame)
+        search_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        ttk.Label(search_frame, text="Tìm kiếm:").pack(side=tk.LEFT, padx=(0, 5))
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.search_entry.bind("<KeyRelease>", self._debounce_search)
 
         diary_columns = ('ID', 'Ngày', 'Công việc', 'Trạng thái', 'Phòng/Khoa')
         self.diary_tree = ttk.Treeview(list_frame, columns=diary_columns, show='headings', selectmode="browse")
         for col in diary_columns:
-            self.diary_tree.heading(col, text=col, command=lambda _c=col: self._sort_treeview(self.diary_tree, _c, False))
+            self.diary_tree.heading(col, text=col, command=lambda _c=col: self._sort_by(_c))
             self.diary_tree.column(col, anchor=tk.CENTER if col in ('ID', 'Ngày', 'Trạng thái') else tk.W)
 
-        diary_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.diary_tree.yview)
-        self.diary_tree.configure(yscrollcommand=diary_scroll.set)
-        self.diary_tree.grid(row=0, column=0, sticky="nsew")
-        diary_scroll.grid(row=0, column=1, sticky="ns")
+        self.diary_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.diary_tree.yview)
+        self.diary_tree.configure(yscrollcommand=self._on_tree_scroll)
+        # Dòng được khóa theo id bản ghi; làm mới chỉ chạm vào những dòng đã đổi
+        self.diary_binder = TreeviewBinder(self.diary_tree)
+        show_sort_indicator(self.diary_tree, diary_columns, self._sort_column, self._sort_descending)
+        self.diary_tree.grid(row=1, column=0, sticky="nsew")
+        self.diary_scroll.grid(row=1, column=1, sticky="ns")
+
+        self.snippet_label = ttk.Label(list_frame, text="", anchor=tk.W)
+        self.snippet_label.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(5, 0))
 
         self.diary_tree.bind("<Double-1>", self._on_item_double_click)
+        self.diary_tree.bind("<<TreeviewSelect>>", self._show_search_snippet)
 
     # ------------- Hộp quản lý công việc chính -------------
     def _open_manage_tasks_window(self):
@@ -131,16 +168,8 @@ class DiaryTab:
         if self.autocomplete_listbox and self.autocomplete_listbox.winfo_exists():
             self.autocomplete_listbox.destroy()
 
-        search_text = self.department_var.get().lower().strip()
-        if not search_text:
-            return
-
-        try:
-            departments = self.db_manager.get_unique_departments()
-        except Exception:
-            departments = []
-
-        suggestions = [d for d in departments if search_text in (d or "").lower()]
+        # Gợi ý lấy từ chỉ mục trong bộ nhớ (không dấu, theo tần suất) nên gọi trực tiếp
+        suggestions = self.db_manager.suggest_departments(self.department_var.get(), self.DEPARTMENT_SUGGESTION_LIMIT)
         if not suggestions:
             return
 
@@ -166,6 +195,47 @@ class DiaryTab:
             self.department_var.set(selected_item)
             self.autocomplete_listbox.destroy()
 
+    # ------------- Tìm kiếm toàn văn -------------
+    def _debounce_search(self, event=None):
+        if self.search_after_id:
+            self.frame.after_cancel(self.search_after_id)
+        self.search_after_id = self.frame.after(300, self._run_search)
+
+    def _run_search(self):
+        self.search_after_id = None
+        query = self.search_var.get().strip()
+        if not query:
+            self.load_records()
+            return
+
+        self._next_cursor = None
+        self._loaded = {}
+        self._set_list_loading(True)
+        # Lấy thêm một dòng để biết còn kết quả ngoài danh sách hiển thị hay không
+        self.query_executor.submit(
+            "diary_list", self.db_manager.search, query, limit=self.SEARCH_RESULT_LIMIT + 1,
+            on_done=lambda results: self._show_search_results(query, results),
+            on_error=self._on_list_error
+        )
+
+    def _show_search_results(self, query, results):
+        self._set_list_loading(False)
+        # results: (id, work_date, task, status, department, snippet), sắp theo độ liên quan
+        more = len(results) > self.SEARCH_RESULT_LIMIT
+        results = results[:self.SEARCH_RESULT_LIMIT]
+        self.diary_binder.set_rows(row[:5] for row in results)
+        self._search_snippets = {str(row[0]): row[5] for row in results}
+        if more:
+            text = f"Hiển thị {len(results)} kết quả liên quan nhất cho \"{query}\"."
+        else:
+            text = f"Tìm thấy {len(results)} kết quả cho \"{query}\"."
+        self.snippet_label.config(text=text)
+
+    def _show_search_snippet(self, event=None):
+        selected = self.diary_tree.selection()
+        if selected and selected[0] in self._search_snippets:
+            self.snippet_label.config(text=self._search_snippets[selected[0]])
+
     # ------------- Helpers -------------
     def _update_details_char_count(self):
         count = len(self.details_text.get("1.0", tk.END).strip())
@@ -202,20 +272,24 @@ class DiaryTab:
             show_toast(self.frame.winfo_toplevel(), "Lỗi: Vui lòng nhập ngày và công việc chính!", "red")
             return
 
+        # Ghi qua hàng đợi ghi: không chờ commit trên luồng Tk, kết quả báo về khi đã commit
+        record_id = self.current_edit_id
         try:
-            if self.current_edit_id:
-                self.db_manager.update_record(self.current_edit_id, work_date, task, department, details, status)
-                show_toast(self.frame.winfo_toplevel(), "Đã cập nhật nhật ký thành công!", "green")
-                self._update_status_bar("Đã cập nhật nhật ký.")
+            if record_id:
+                future = self.db_manager.submit_update_record(record_id, work_date, task, department, details, status)
+                message = "Đã cập nhật nhật ký"
             else:
-                self.db_manager.add_record(work_date, task, department, details, status)
-                show_toast(self.frame.winfo_toplevel(), "Đã lưu nhật ký thành công!", "green")
-                self._update_status_bar("Đã lưu nhật ký.")
-            self._clear_form()
-            self.load_records()
+                future = self.db_manager.submit_add_record(work_date, task, department, details, status)
+                message = "Đã lưu nhật ký"
         except Exception as e:
             logging.exception("Lỗi khi lưu nhật ký: %s", e)
             show_toast(self.frame.winfo_toplevel(), f"Lỗi khi lưu nhật ký: {e}", "red")
+            return
+        self.query_executor.watch(
+            ("save", id(future)), future,
+            on_done=lambda new_id: self._on_record_saved(message, record_id or new_id),
+            on_error=lambda e: self._on_write_failed("Lỗi khi lưu nhật ký", e)
+        )
 
     def _clear_form(self):
         self.current_edit_id = None
@@ -238,7 +312,12 @@ class DiaryTab:
 
         item = self.diary_tree.item(selected)
         diary_id = item['values'][0]
-        record = self.db_manager.get_record_by_id(diary_id)
+        self.query_executor.submit(
+            "edit_record", self.db_manager.get_record_by_id, diary_id,
+            on_done=lambda record: self._fill_form(diary_id, record)
+        )
+
+    def _fill_form(self, diary_id, record):
         if record:
             self.current_edit_id = diary_id
             self.work_date_entry.set_date(datetime.strptime(record[1], "%Y-%m-%d"))
@@ -258,41 +337,160 @@ class DiaryTab:
         if messagebox.askyesno("Xác nhận", "Bạn có chắc muốn xóa mục này?"):
             try:
                 diary_id = self.diary_tree.item(selected)['values'][0]
-                self.db_manager.delete_record(diary_id)
-                self.load_records()
-                self._update_status_bar("Đã xóa 1 mục.")
-                show_toast(self.frame.winfo_toplevel(), "Đã xóa mục thành công!", "green")
+                future = self.db_manager.submit_delete_record(diary_id)
             except Exception as e:
                 logging.exception("Lỗi khi xóa nhật ký: %s", e)
                 show_toast(self.frame.winfo_toplevel(), f"Lỗi khi xóa mục: {e}", "red")
+                return
+            self.diary_binder.remove(diary_id)
+            self.query_executor.watch(
+                ("delete", diary_id), future,
+                on_done=lambda _: self._on_write_committed("Đã xóa 1 mục"),
+                on_error=lambda e: self._on_write_failed("Lỗi khi xóa mục", e)
+            )
+
+    def _on_record_saved(self, message, record_id):
+        # Chỉ xóa form sau khi đã commit để không mất nội dung nếu ghi lỗi
+        self._clear_form()
+        self._on_write_committed(message)
+        # Làm mới chỉ truy vấn lại trang đầu: bản ghi vừa lưu được đọc lại theo id để
+        # hiện đúng chỗ cả khi nó nằm ở các trang đã cuộn qua
+        self._stale_ids.add(str(record_id))
+        self.load_records()
 
-    # ------------- Nạp & Sắp xếp danh sách -------------
-    def load_records(self):
-        for item in self.diary_tree.get_children():
-            self.diary_tree.delete(item)
+    def _on_write_committed(self, message):
+        # Danh sách được nạp lại qua thông báo thay đổi dữ liệu của DatabaseManager
+        show_toast(self.frame.winfo_toplevel(), f"{message} thành công!", "green")
+        self._update_status_bar(f"{message}.")
 
-        try:
-            records = self.db_manager.get_recent_records(limit=self.config.get("recent_records_limit", 100))
-        except Exception:
-            records = []
+    def _on_write_failed(self, message, error):
+        logging.getLogger(__name__).error(f"{message}: {error}")
+        show_toast(self.frame.winfo_toplevel(), f"{message}: {error}", "red")
+        self.load_records()
 
-        # records: (id, work_date, task, status, department) — theo cách bạn đang insert
-        for row in records:
-            self.diary_tree.insert('', 'end', values=(row[0], row[1], row[2], row[3], row[4]))
+    # ------------- Nạp & Sắp xếp danh sách -------------
+    def load_records(self):
+        if self.search_var.get().strip():
+            # Đang tìm kiếm: làm mới kết quả tìm kiếm thay vì danh sách gần đây
+            self._run_search()
+            return
 
-    def _sort_treeview(self, tree, col, reverse):
-        data = [(tree.set(k, col), k) for k in tree.get_children('')]
-        try:
-            data.sort(key=lambda x: int(x[0]), reverse=reverse)
-        except ValueError:
-            try:
-                data.sort(key=lambda x: datetime.strptime(x[0], '%Y-%m-%d'), reverse=reverse)
-            except ValueError:
-                data.sort(key=lambda x: (x[0] or ""), reverse=reverse)
+        # Chỉ truy vấn lại trang đầu, dù đã cuộn sâu tới đâu; các trang sau được nạp khi
+        # cuộn gần cuối (_on_tree_scroll)
+        self._load_page(None)
 
-        for index, (_, k) in enumerate(data):
-            tree.move(k, '', index)
-        tree.heading(col, command=lambda: self._sort_treeview(tree, col, not reverse))
+    def _load_next_page(self):
+        if self._next_cursor is None:
+            self._page_pending = False
+            return
+        self._load_page(self._next_cursor)
+
+    def _load_page(self, after):
+        self._page_pending = True
+        self._set_list_loading(True)
+        sort, descending = self.SORT_KEYS[self._sort_column], self._sort_descending
+        if after is None:
+            stale = frozenset(self._stale_ids)
+            func, args = self._fetch_first_page, (sort, descending, stale)
+            on_done = lambda result: self._show_first_page(result, stale)
+        else:
+            func, args = self.db_manager.get_records_page, (self.PAGE_SIZE, after, sort, descending)
+            on_done = self._show_next_page
+        # Mỗi trang là một truy vấn chạy trên luồng nền của query_executor; yêu cầu mới
+        # (làm mới, đổi thứ tự, tìm kiếm) thay thế trang đang chờ
+        self.query_executor.submit("diary_list", func, *args, on_done=on_done, on_error=self._on_list_error)
+
+    def _fetch_first_page(self, sort, descending, stale):
+        """Chạy trên luồng nền: trang đầu và các bản ghi vừa lưu (kèm khóa sắp xếp)."""
+        page = self.db_manager.get_records_page(self.PAGE_SIZE, None, sort, descending)
+        saved = self.db_manager.get_records_by_ids([int(iid) for iid in stale], sort) if stale else ([], [])
+        return page, saved
+
+    def _show_next_page(self, page):
+        self._page_pending = False
+        self._set_list_loading(False)
+        # rows: (id, work_date, task, status, department); keys: khóa sắp xếp của từng dòng
+        rows, keys = page
+        self._next_cursor = keys[-1] if len(rows) == self.PAGE_SIZE else None
+        self._loaded.update((str(row[0]), (row, key)) for row, key in zip(rows, keys))
+        self.diary_binder.append_rows(rows)
+
+    def _show_first_page(self, result, stale):
+        self._page_pending = False
+        self._set_list_loading(False)
+        if self._search_snippets:
+            self._search_snippets = {}
+            self.snippet_label.config(text="")
+        page, saved = result
+        self._loaded, self._next_cursor = self._merge_first_page(
+            self.diary_tree.get_children(''), self._loaded, page, saved, stale, self._next_cursor,
+            self._sort_descending, self.PAGE_SIZE)
+        self._stale_ids.difference_update(stale)
+        # Binder chỉ chạm vào các dòng thực sự thay đổi (thường nằm trong trang đầu)
+        self.diary_binder.set_rows(row for row, _ in self._loaded.values())
+
+    @staticmethod
+    def _merge_first_page(displayed, loaded, page, saved, stale, cursor, descending, page_size):
+        """
+        Ghép trang đầu vừa truy vấn lại với các trang đã nạp phía sau, không truy vấn lại chúng.
+        Trả về (entries, cursor): entries là dict iid -> (dòng, khóa) theo thứ tự hiển thị mới,
+        cursor là con trỏ của trang kế tiếp (None = đã nạp hết).
+
+        Các dòng đang hiển thị có khóa sắp xếp đứng sau dòng cuối của trang mới được giữ nguyên
+        thứ tự cùng con trỏ cũ; dòng thuộc vùng trang đầu cũ mà không còn trong trang mới đã
+        bị xóa hoặc đổi chỗ. saved là các bản ghi trong stale được đọc lại theo id: khóa mới
+        nằm trong vùng đã nạp thì được đặt đúng chỗ, nằm ngoài thì để trang sau nạp.
+        """
+        rows, keys = page
+        entries = {str(row[0]): (row, key) for row, key in zip(rows, keys)}
+        if len(rows) < page_size:
+            return entries, None
+        boundary = keys[-1]
+
+        def follows(key, other):
+            return key < other if descending else key > other
+
+        tail = [(iid, loaded[iid]) for iid in displayed
+                if iid in loaded and iid not in entries and iid not in stale and follows(loaded[iid][1], boundary)]
+        if not tail:
+            return entries, boundary
+        for row, key in zip(*saved):
+            iid = str(row[0])
+            if iid in entries or not follows(key, boundary) or (cursor is not None and follows(key, cursor)):
+                continue
+            position = next((i for i, (_, (_, other)) in enumerate(tail) if follows(other, key)), len(tail))
+            tail.insert(position, (iid, (row, key)))
+        entries.update(tail)
+        return entries, cursor
+
+    def _set_list_loading(self, loading):
+        self.list_frame.config(text="Nhật ký gần đây (đang tải...)" if loading else "Nhật ký gần đây")
+
+    def _on_list_error(self, error):
+        self._page_pending = False
+        self._next_cursor = None
+        self._set_list_loading(False)
+        show_toast(self.frame.winfo_toplevel(), f"Lỗi khi tải nhật ký: {error}", "red")
+
+    def _on_tree_scroll(self, first, last):
+        self.diary_scroll.set(first, last)
+        # Gần cuối danh sách (hoặc danh sách chưa lấp đầy khung) thì nạp thêm trang
+        if self._next_cursor is not None and not self._page_pending and float(last) >= 0.9:
+            self._page_pending = True
+            self.frame.after_idle(self._load_next_page)
+
+    def _sort_by(self, col):
+        """Sắp xếp theo cột trong SQL (toàn bộ dữ liệu, không chỉ các trang đã nạp); nhấn lại để đảo chiều."""
+        if col == self._sort_column:
+            self._sort_descending = not self._sort_descending
+        else:
+            self._sort_column, self._sort_descending = col, False
+        show_sort_indicator(self.diary_tree, self.SORT_KEYS, self._sort_column, self._sort_descending)
+        if self.search_var.get().strip():
+            return  # kết quả tìm kiếm giữ thứ tự theo độ liên quan
+        # Thứ tự mới khác hẳn: nạp lại từ trang đầu thay vì đối chiếu với danh sách cũ
+        self.diary_binder.clear()
+        self.load_records()
 
     def _update_task_combos(self):
         self._main_tasks = self.config_manager.get_main_tasks()
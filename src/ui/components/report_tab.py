@@ -1,26 +1,37 @@
 import tkinter as tk
 from tkinter import ttk
 from datetime import datetime, timedelta
-import threading
 from tkcalendar import DateEntry
 import logging
+from itertools import islice
 
-from src.utils.export_manager import export_excel_report, export_word_report
+from src.ui.components.tree_binder import TreeviewBinder, show_sort_indicator
+from src.ui.dialogs.export_dialog import export_excel_report, export_word_report
 from src.utils.toast import show_toast
 
 class ReportTab:
-    def __init__(self, notebook, db_manager, config, open_backup_manager_callback):
+    INSERT_CHUNK_SIZE = 500  # số thao tác trên Treeview mỗi lượt after()
+    DETAILS_PREVIEW_LENGTH = 50  # số ký tự chi tiết hiển thị trong bảng
+    WORD_GROUP_OPTIONS = {"Không nhóm": None, "Nhóm theo ngày": "date", "Nhóm theo công việc": "task"}
+    SUMMARY_GROUP_OPTIONS = {"Công việc": "task", "Trạng thái": "status", "Phòng/Khoa": "department", "Tuần": "week"}
+    # Cột -> khóa sắp xếp của DatabaseManager; "Chi tiết" không có index nên không sắp xếp được
+    SORT_KEYS = {'Ngày': "date", 'Công việc': "task", 'Phòng/Khoa': "department", 'Trạng thái': "status"}
+
+    def __init__(self, notebook, db_manager, config, open_backup_manager_callback, query_executor):
         self.frame = ttk.Frame(notebook)
         self.db_manager = db_manager
         self.config = config
         self.open_backup_manager_callback = open_backup_manager_callback
+        self.query_executor = query_executor
+        self._fill_generation = 0
         
         self._main_tasks = self.config.get("main_tasks", []) # Get tasks from config
         self._statuses = ["Đang thực hiện", "Hoàn thành", "Tạm dừng"]
         self.after_id = None # For debounce
+        self._sort_column, self._sort_descending = 'Ngày', True
         
+        # Báo cáo ban đầu được nạp khi tab hiển thị lần đầu (WorkDiaryApp._on_tab_changed)
         self._create_widgets()
-        self.view_report() # Load initial report
         logging.getLogger(__name__).info("ReportTab initialized.")
         
     def _create_widgets(self):
@@ -75,13 +86,24 @@ class ReportTab:
         ttk.Button(button_frame, text="Xem báo cáo", command=self.view_report).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Xuất Excel", command=self._export_excel).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Xuất Word", command=self._export_word).pack(side=tk.LEFT, padx=5)
+        self.word_group_var = tk.StringVar(value="Không nhóm")
+        ttk.Combobox(button_frame, textvariable=self.word_group_var, values=list(self.WORD_GROUP_OPTIONS),
+                     width=18, state="readonly").pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Sao lưu/Phục hồi", command=self.open_backup_manager_callback).pack(side=tk.LEFT, padx=(30, 5))
 
         report_display_frame = ttk.LabelFrame(self.frame, text="Kết quả báo cáo", padding=10)
+        self.report_display_frame = report_display_frame
         report_display_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
+        self.result_notebook = ttk.Notebook(report_display_frame)
+        self.result_notebook.pack(fill=tk.BOTH, expand=True)
+        detail_frame = ttk.Frame(self.result_notebook)
+        summary_frame = ttk.Frame(self.result_notebook)
+        self.result_notebook.add(detail_frame, text="Chi tiết")
+        self.result_notebook.add(summary_frame, text="Tổng hợp")
+
         report_columns = ('Ngày', 'Công việc', 'Phòng/Khoa', 'Chi tiết', 'Trạng thái')
-        self.report_tree = ttk.Treeview(report_display_frame, columns=report_columns, 
+        self.report_tree = ttk.Treeview(detail_frame, columns=report_columns, 
                                          show='headings', height=10)
         
         self.report_tree.column('Ngày', width=100, anchor=tk.CENTER)
@@ -91,13 +113,35 @@ class ReportTab:
         self.report_tree.column('Trạng thái', width=120, anchor=tk.CENTER)
         
         for col in report_columns:
-            self.report_tree.heading(col, text=col, command=lambda _col=col: self._sort_treeview(self.report_tree, _col, False))
+            self.report_tree.heading(col, text=col)
+            if col in self.SORT_KEYS:
+                self.report_tree.heading(col, command=lambda _col=col: self._sort_by(_col))
+        show_sort_indicator(self.report_tree, self.SORT_KEYS, self._sort_column, self._sort_descending)
 
-        report_scroll = ttk.Scrollbar(report_display_frame, orient=tk.VERTICAL, command=self.report_tree.yview)
+        report_scroll = ttk.Scrollbar(detail_frame, orient=tk.VERTICAL, command=self.report_tree.yview)
         self.report_tree.configure(yscrollcommand=report_scroll.set)
         
+        # Dòng báo cáo được khóa theo id bản ghi (không hiển thị) để làm mới theo phần thay đổi
+        self.report_binder = TreeviewBinder(self.report_tree, display=self._display_report_row)
         self.report_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         report_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Tổng hợp: đọc từ bảng rollup nên không phụ thuộc số dòng chi tiết
+        summary_top = ttk.Frame(summary_frame)
+        summary_top.pack(fill=tk.X, pady=5)
+        ttk.Label(summary_top, text="Tổng hợp theo:").pack(side=tk.LEFT, padx=5)
+        self.summary_group_var = tk.StringVar(value="Công việc")
+        summary_combo = ttk.Combobox(summary_top, textvariable=self.summary_group_var,
+                                     values=list(self.SUMMARY_GROUP_OPTIONS), width=15, state="readonly")
+        summary_combo.pack(side=tk.LEFT, padx=5)
+        summary_combo.bind('<<ComboboxSelected>>', lambda event: self.view_summary())
+
+        self.summary_tree = ttk.Treeview(summary_frame, columns=('Nhóm', 'Số bản ghi'), show='headings', height=10)
+        self.summary_tree.heading('Nhóm', text='Nhóm')
+        self.summary_tree.heading('Số bản ghi', text='Số bản ghi')
+        self.summary_tree.column('Nhóm', width=500, anchor=tk.W)
+        self.summary_tree.column('Số bản ghi', width=120, anchor=tk.CENTER)
+        self.summary_tree.pack(fill=tk.BOTH, expand=True)
         logging.getLogger(__name__).info("ReportTab widgets created.")
     
     def _on_report_type_changed(self, event):
@@ -132,59 +176,106 @@ class ReportTab:
         logging.getLogger(__name__).debug("Report view debounced.")
 
     def view_report(self):
-        """Displays the report based on filters."""
-        for item in self.report_tree.get_children():
-            self.report_tree.delete(item)
-        
+        """Displays the report based on filters (queried in the background)."""
         from_date = self.from_date_entry.get_date().strftime("%Y-%m-%d")
         to_date = self.to_date_entry.get_date().strftime("%Y-%m-%d")
         task_filter = self.filter_task_var.get() if self.filter_task_var.get() else None
         status_filter = self.filter_status_var.get() if self.filter_status_var.get() else None
 
-        records = self.db_manager.get_records_by_filters(from_date, to_date, task=task_filter, status=status_filter)
-        
-        for row in records:
-            details = row[3] if row[3] else ""
-            if len(details) > 50:
-                details = details[:50] + "..."
-            
-            display_row = (row[0], row[1], row[2], details, row[4])
-            self.report_tree.insert('', 'end', values=display_row)
-        logging.getLogger(__name__).info(f"Report viewed with filters: From {from_date} to {to_date}, Task: {task_filter}, Status: {status_filter}. Found {len(records)} records.")
+        self._set_loading(True)
+        # Yêu cầu mới cùng khóa "report" sẽ thay thế yêu cầu đang chạy
+        self.query_executor.submit(
+            "report", self._load_report,
+            from_date, to_date, task_filter, status_filter,
+            self.SORT_KEYS[self._sort_column], self._sort_descending,
+            on_done=lambda result: self._show_report(*result, from_date, to_date, task_filter, status_filter),
+            on_error=self._on_report_error
+        )
+        self.view_summary()
+
+    def view_summary(self):
+        """Hiển thị bảng tổng hợp theo chiều đang chọn với cùng bộ lọc."""
+        from_date = self.from_date_entry.get_date().strftime("%Y-%m-%d")
+        to_date = self.to_date_entry.get_date().strftime("%Y-%m-%d")
+        task_filter = self.filter_task_var.get() if self.filter_task_var.get() else None
+        status_filter = self.filter_status_var.get() if self.filter_status_var.get() else None
+        group_by = self.SUMMARY_GROUP_OPTIONS[self.summary_group_var.get()]
+
+        self.query_executor.submit(
+            "report_summary", self.db_manager.get_summary,
+            from_date, to_date, group_by, task=task_filter, status=status_filter,
+            on_done=self._show_summary, on_error=self._on_report_error
+        )
+
+    def _show_summary(self, rows):
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        total = 0
+        for key, count in rows:
+            self.summary_tree.insert('', 'end', values=(key or "(không có)", count))
+            total += count
+        self.summary_tree.insert('', 'end', values=("Tổng cộng", total))
+
+    def _set_loading(self, loading):
+        self.report_display_frame.config(text="Kết quả báo cáo (đang tải...)" if loading else "Kết quả báo cáo")
+        self.report_tree.config(cursor="watch" if loading else "")
+
+    def _on_report_error(self, error):
+        self._set_loading(False)
+        show_toast(self.frame.winfo_toplevel(), f"Lỗi khi tải báo cáo: {error}", "red")
+
+    def _load_report(self, from_date, to_date, task_filter, status_filter, sort, descending):
+        """
+        Chạy trên luồng nền: kết quả dạng cột (RecordStore, được giữ trong bộ nhớ đệm báo cáo)
+        và phần đầu chi tiết của từng dòng, chỉ đủ để hiển thị.
+        """
+        store = self.db_manager.get_record_store(from_date, to_date, task=task_filter, status=status_filter,
+                                                 sort=sort, descending=descending)
+        previews = self.db_manager.get_details(store.ids, max_length=self.DETAILS_PREVIEW_LENGTH + 1)
+        return store, previews
+
+    @classmethod
+    def _display_report_row(cls, row):
+        # row: (id, work_date, task, department, details, status)
+        details = row[4] if row[4] else ""
+        if len(details) > cls.DETAILS_PREVIEW_LENGTH:
+            details = details[:cls.DETAILS_PREVIEW_LENGTH] + "..."
+        return (row[1], row[2], row[3], details, row[5])
+
+    def _show_report(self, store, previews, from_date, to_date, task_filter, status_filter):
+        self._fill_generation += 1
+        # Lần điền dở của báo cáo cũ phải được dừng hẳn (gắn lại các dòng đã tách) trước khi đồng bộ mới
+        self.report_binder.cancel()
+        self._apply_report_chunk(self.report_binder.sync(store.rows(details=previews)), self._fill_generation)
+        logging.getLogger(__name__).info(f"Report viewed with filters: From {from_date} to {to_date}, Task: {task_filter}, Status: {status_filter}. Found {len(store)} records.")
+
+    def _apply_report_chunk(self, steps, generation):
+        """Áp dụng thay đổi theo từng đợt để vòng lặp Tk vẫn phản hồi với báo cáo lớn."""
+        if generation != self._fill_generation:
+            return  # đã có báo cáo mới hơn
+        applied = sum(1 for _ in islice(steps, self.INSERT_CHUNK_SIZE))
+        if applied == self.INSERT_CHUNK_SIZE:
+            self.frame.after(1, self._apply_report_chunk, steps, generation)
+        else:
+            self._set_loading(False)
     
-    def _sort_treeview(self, tree, col, reverse):
-        """Sorts the Treeview data according to data type."""
-        data = [(tree.set(k, col), k) for k in tree.get_children('')]
-
-        try:
-            # Try to sort as integer (for ID column)
-            data.sort(key=lambda x: int(x[0]), reverse=reverse)
-        except (ValueError, IndexError):
-            try:
-                # Try to sort as date (for 'Ngày' column)
-                data.sort(key=lambda x: datetime.strptime(x[0], '%Y-%m-%d'), reverse=reverse)
-            except (ValueError, IndexError):
-                # Default to string sort for other columns
-                data.sort(key=lambda x: x[0], reverse=reverse)
-
-        for index, (val, k) in enumerate(data):
-            tree.move(k, '', index)
-
-        tree.heading(col, command=lambda: self._sort_treeview(tree, col, not reverse))
-        logging.getLogger(__name__).debug(f"Report Treeview sorted by column: {col}, reverse: {reverse}")
-
-# ĐÂY LÀ ĐOẠN CODE CẦN THAY THẾ TRONG FILE report_tab.py
+    def _sort_by(self, col):
+        """Sắp xếp toàn bộ kết quả báo cáo trong SQL; nhấn lại cùng cột để đảo chiều."""
+        if col == self._sort_column:
+            self._sort_descending = not self._sort_descending
+        else:
+            self._sort_column, self._sort_descending = col, False
+        show_sort_indicator(self.report_tree, self.SORT_KEYS, self._sort_column, self._sort_descending)
+        self.view_report()
+        logging.getLogger(__name__).debug("Report sorted by column: %s, descending: %s", col, self._sort_descending)
+
     def _export_excel(self):
         root = self.frame.winfo_toplevel()
         from_date = self.from_date_entry.get_date().strftime("%Y-%m-%d")
         to_date = self.to_date_entry.get_date().strftime("%Y-%m-%d")
         task_filter = self.filter_task_var.get()
         status_filter = self.filter_status_var.get()
-        
-        # Lấy đường dẫn file DB dưới dạng chuỗi
-        db_path = self.db_manager.db_name 
-        
-        threading.Thread(target=export_excel_report, args=(root, db_path, from_date, to_date, task_filter, status_filter)).start()
+
+        export_excel_report(root, self.db_manager, from_date, to_date, task_filter, status_filter)
         logging.getLogger(__name__).info("Excel export initiated.")
 
     def _export_word(self):
@@ -193,9 +284,7 @@ class ReportTab:
         to_date = self.to_date_entry.get_date().strftime("%Y-%m-%d")
         task_filter = self.filter_task_var.get()
         status_filter = self.filter_status_var.get()
+        group_by = self.WORD_GROUP_OPTIONS.get(self.word_group_var.get())
 
-        # Lấy đường dẫn file DB dưới dạng chuỗi
-        db_path = self.db_manager.db_name
-
-        threading.Thread(target=export_word_report, args=(root, db_path, from_date, to_date, task_filter, status_filter)).start()
+        export_word_report(root, self.db_manager, from_date, to_date, task_filter, status_filter, group_by)
         logging.getLogger(__name__).info("Word export initiated.")
\ No newline at end of file
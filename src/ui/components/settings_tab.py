@@ -7,8 +7,6 @@ class SettingsTab:
         self.config_manager = config_manager
         self.app_ref = app_ref  # WorkDiaryApp
 
-        self.initial_config = self.config_manager.load_config()
-
         # Lọc danh sách theme để tránh theme lỗi/xấu
         try:
             all_themes = self.app_ref.root.get_themes()
@@ -16,7 +14,7 @@ class SettingsTab:
         except:
             self.theme_options = ['yotta', 'equilux', 'clam', 'alt', 'default', 'classic']
 
-        self.theme_var = tk.StringVar(value=self.initial_config.get("theme", self.theme_options[0]))
+        self.theme_var = tk.StringVar(value=self.config_manager.get("theme", self.theme_options[0]))
         self._create_widgets()
 
     def _create_widgets(self):
@@ -0,0 +1,148 @@
+from bisect import bisect_left
+from operator import itemgetter
+
+
+class TreeviewBinder:
+    """
+    Đồng bộ một ttk.Treeview phẳng với danh sách dòng, khóa theo id bản ghi.
+
+    Thay vì xóa hết rồi chèn lại, set_rows() so sánh với nội dung đang hiển thị và chỉ
+    thực hiện các thao tác cần thiết: xóa dòng không còn, chèn dòng mới, cập nhật giá
+    trị đã đổi và di chuyển ít dòng nhất có thể (các dòng nằm trong dãy con tăng dài
+    nhất theo thứ tự mới được giữ nguyên). Lưu một bản ghi vì thế chỉ chạm vào một dòng.
+
+    key(row) trả về id của dòng (dùng làm iid), display(row) trả về tuple giá trị hiển thị.
+    Mỗi lúc chỉ có một lần sync() dang dở: gọi sync() mới hoặc bất kỳ thao tác nào khác
+    sẽ cancel() lần trước.
+    """
+
+    def __init__(self, tree, key=itemgetter(0), display=tuple):
+        self.tree = tree
+        self._key = key
+        self._display = display
+        self._values = {}  # iid -> tuple giá trị đang hiển thị
+        self._active = None  # generator của sync() chưa chạy hết
+
+    def __len__(self):
+        return len(self.tree.get_children(''))
+
+    def clear(self):
+        self.cancel()
+        self.tree.delete(*self.tree.get_children(''))
+        self._values.clear()
+
+    def set_rows(self, rows):
+        """Đưa Treeview về đúng danh sách rows (theo thứ tự)."""
+        for _ in self.sync(rows):
+            pass
+
+    def append_rows(self, rows):
+        """Thêm các dòng vào cuối (trang tiếp theo); dòng đã có thì chỉ cập nhật giá trị."""
+        self.cancel()
+        for row in rows:
+            iid, values = str(self._key(row)), self._display(row)
+            if self.tree.exists(iid):
+                self._update(iid, values)
+            else:
+                self.tree.insert('', 'end', iid=iid, values=values)
+                self._values[iid] = values
+
+    def remove(self, key):
+        self.cancel()
+        iid = str(key)
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+        self._values.pop(iid, None)
+
+    def cancel(self):
+        """
+        Dừng lần sync() đang dang dở (ví dụ khi có báo cáo mới hơn): các dòng đã tách ra
+        mà chưa được đặt lại chỗ được gắn vào cuối, để Treeview và _values luôn khớp nhau.
+        """
+        active, self._active = self._active, None
+        if active is not None:
+            active.close()
+
+    def sync(self, rows):
+        """
+        Giống set_rows nhưng trả về generator: yield sau mỗi thao tác chèn/di chuyển/cập nhật
+        để nơi gọi có thể chia việc thành nhiều lượt after() với danh sách lớn. Bỏ dở giữa
+        chừng thì gọi cancel() (hoặc close() generator).
+        """
+        self.cancel()
+        self._active = self._sync(rows)
+        return self._active
+
+    def _sync(self, rows):
+        target = [(str(self._key(row)), self._display(row)) for row in rows]
+        positions = {iid: index for index, (iid, _) in enumerate(target)}
+
+        current = self.tree.get_children('')
+        stale = [iid for iid in current if iid not in positions]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                self._values.pop(iid, None)
+        kept = [iid for iid in current if iid in positions]
+        stable = self._stable_items(kept, positions)
+        moved = [iid for iid in kept if iid not in stable]
+        if moved:
+            # Tách ra trước để các dòng giữ nguyên luôn nằm liền nhau theo đúng thứ tự
+            self.tree.detach(*moved)
+        detached = set(moved)
+
+        try:
+            for index, (iid, values) in enumerate(target):
+                if iid in stable:
+                    if self._update(iid, values):
+                        yield
+                elif iid in detached:
+                    self.tree.move(iid, '', index)
+                    detached.discard(iid)
+                    self._update(iid, values)
+                    yield
+                else:
+                    self.tree.insert('', index, iid=iid, values=values)
+                    self._values[iid] = values
+                    yield
+        finally:
+            # Bị dừng giữa chừng: một dòng bị tách mà không gắn lại vẫn tồn tại trong Tk,
+            # lần sync sau sẽ chèn trùng iid
+            for iid in moved:
+                if iid in detached:
+                    self.tree.move(iid, '', 'end')
+
+    def _update(self, iid, values):
+        if self._values.get(iid) == values:
+            return False
+        self.tree.item(iid, values=values)
+        self._values[iid] = values
+        return True
+
+    @staticmethod
+    def _stable_items(kept, positions):
+        """Tập iid thuộc dãy con tăng dài nhất (theo vị trí mới) của thứ tự hiện tại."""
+        tails, tail_items, previous = [], [], {}
+        for iid in kept:
+            position = positions[iid]
+            i = bisect_left(tails, position)
+            previous[iid] = tail_items[i - 1] if i else None
+            if i == len(tails):
+                tails.append(position)
+                tail_items.append(iid)
+            else:
+                tails[i] = position
+                tail_items[i] = iid
+        stable = set()
+        iid = tail_items[-1] if tail_items else None
+        while iid is not None:
+            stable.add(iid)
+            iid = previous[iid]
+        return stable
+
+
+def show_sort_indicator(tree, columns, sorted_column, descending):
+    """Đánh dấu cột đang sắp xếp trên tiêu đề Treeview (▲ tăng dần, ▼ giảm dần)."""
+    for column in columns:
+        arrow = (" ▼" if descending else " ▲") if column == sorted_column else ""
+        tree.heading(column, text=column + arrow)
@@ -1,109 +1,187 @@
 import tkinter as tk
 from tkinter import ttk, Toplevel, filedialog, messagebox
 from datetime import datetime
-import shutil
+import threading
 import logging
 import os
 from src.utils.toast import show_toast
 
+BACKUP_DIR = "backups"
+
 class BackupManagerDialog:
     def __init__(self, parent_root, db_manager, config_manager):
         self.parent_root = parent_root
         self.db_manager = db_manager
         self.config_manager = config_manager
-        
+        self.snapshot_ids = []
+        self._busy = False
+
         self.dialog = Toplevel(self.parent_root)
         self.dialog.title("Sao lưu & Phục hồi Cơ sở dữ liệu")
-        self.dialog.geometry("400x150")
+        self.dialog.geometry("560x380")
         self.dialog.transient(self.parent_root)
         self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self._close)
 
         self._create_widgets()
+        self._load_snapshots()
         logging.getLogger(__name__).info("BackupManagerDialog initialized.")
 
     def _create_widgets(self):
         frame = ttk.Frame(self.dialog, padding=20)
         frame.pack(fill=tk.BOTH, expand=True)
 
-        info_label = ttk.Label(frame, text="Quản lý sao lưu và phục hồi cơ sở dữ liệu.")
-        info_label.pack(pady=10)
-        
+        info_label = ttk.Label(frame, text="Các bản sao lưu (chỉ lưu phần dữ liệu thay đổi giữa các lần):")
+        info_label.pack(anchor=tk.W, pady=(0, 5))
+
+        list_frame = ttk.Frame(frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        self.snapshot_list = tk.Listbox(list_frame, height=10, activestyle='none')
+        self.snapshot_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        list_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.snapshot_list.yview)
+        list_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.snapshot_list.config(yscrollcommand=list_scroll.set)
+
         button_frame = ttk.Frame(frame)
         button_frame.pack(pady=10)
-        
-        ttk.Button(button_frame, text="Sao lưu DB", command=self._backup_db).pack(side=tk.LEFT, padx=10)
-        ttk.Button(button_frame, text="Phục hồi DB", command=self._restore_db).pack(side=tk.LEFT, padx=10)
+
+        self.backup_button = ttk.Button(button_frame, text="Sao lưu DB", command=self._backup_db)
+        self.backup_button.pack(side=tk.LEFT, padx=5)
+        self.export_button = ttk.Button(button_frame, text="Xuất ra tệp...", command=self._export_db)
+        self.export_button.pack(side=tk.LEFT, padx=5)
+        self.restore_button = ttk.Button(button_frame, text="Phục hồi bản đã chọn", command=self._restore_snapshot)
+        self.restore_button.pack(side=tk.LEFT, padx=5)
+        self.restore_file_button = ttk.Button(button_frame, text="Phục hồi từ tệp...", command=self._restore_db)
+        self.restore_file_button.pack(side=tk.LEFT, padx=5)
+        self.buttons = (self.backup_button, self.export_button, self.restore_button, self.restore_file_button)
+
+        self.progress_bar = ttk.Progressbar(frame, mode='determinate', maximum=100)
+        self.progress_bar.pack(fill=tk.X, pady=5)
         logging.getLogger(__name__).info("BackupManagerDialog widgets created.")
 
+    def _load_snapshots(self):
+        self.snapshot_list.delete(0, tk.END)
+        try:
+            snapshots = self.db_manager.list_backups(BACKUP_DIR)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Failed to list backups: {e}", exc_info=True)
+            snapshots = []
+        self.snapshot_ids = [snapshot[0] for snapshot in snapshots]
+        for snapshot_id, created_at, label, size, new_chunks in snapshots:
+            self.snapshot_list.insert(
+                tk.END, f"#{snapshot_id}  {created_at}  [{label or ''}]  {size / 1024 / 1024:.1f} MB, {new_chunks} khối mới")
+
+    def _set_busy(self, busy):
+        self._busy = busy
+        for button in self.buttons:
+            button.config(state=tk.DISABLED if busy else tk.NORMAL)
+
+    def _close(self):
+        # Luồng nền còn gửi tiến độ về hộp thoại: chờ sao lưu/phục hồi xong mới cho đóng
+        if self._busy:
+            show_toast(self.parent_root, "Đang sao lưu/phục hồi, vui lòng đợi hoàn tất.", "orange")
+            return
+        self.dialog.destroy()
+
     def _backup_db(self):
-        self.db_manager.close() # Close DB connection before copying
-        
-        backup_dir = "backups"
-        os.makedirs(backup_dir, exist_ok=True) # Ensure backups directory exists
+        # Sao lưu trực tuyến trên luồng nền: không đóng kết nối, không chặn việc ghi nhật ký
+        self._start_task(lambda progress: self.db_manager.backup_database(BACKUP_DIR, progress_callback=progress),
+                         self._on_backup_finished)
 
+    def _export_db(self):
         backup_file = filedialog.asksaveasfilename(
             parent=self.dialog,
             defaultextension=".db",
             filetypes=[("Database files", "*.db")],
-            initialfile=f"work_diary_backup_{datetime.now().strftime('%Y%m%d%H%M%S')}.db",
-            initialdir=backup_dir
+            initialfile=f"work_diary_backup_{datetime.now().strftime('%Y%m%d%H%M%S')}.db"
         )
-        if backup_file:
-            try:
-                shutil.copyfile(self.db_manager.db_name, backup_file)
-                show_toast(self.parent_root, "Đã sao lưu cơ sở dữ liệu thành công!", "green")
-                logging.getLogger(__name__).info(f"Database backed up to: {backup_file}")
-            except Exception as e:
-                show_toast(self.parent_root, f"Lỗi: Không thể sao lưu cơ sở dữ liệu: {e}", "red")
-                logging.getLogger(__name__).error(f"Database backup failed: {e}", exc_info=True)
-        
-        self.db_manager._get_connection() # Re-open connection
-        self.dialog.destroy()
+        if not backup_file:
+            return
+        self._start_task(lambda progress: self.db_manager.export_backup(backup_file, progress_callback=progress),
+                         self._on_backup_finished)
+
+    def _start_task(self, task_func, on_finished):
+        """Chạy task_func(progress_callback) trên luồng nền; on_finished(result, error) chạy trên luồng Tk."""
+        self._set_busy(True)
+        self.progress_bar['value'] = 0
+        threading.Thread(target=self._run_task, args=(task_func, on_finished), daemon=True).start()
+
+    def _run_task(self, task_func, on_finished):
+        def report_progress(done, total):
+            self.dialog.after(0, self._update_progress, done, total)
+        try:
+            result = task_func(report_progress)
+            self.dialog.after(0, on_finished, result, None)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Backup/restore task failed: {e}", exc_info=True)
+            self.dialog.after(0, on_finished, None, e)
+
+    def _update_progress(self, done, total):
+        if total:
+            self.progress_bar['value'] = done * 100 / total
+
+    def _on_backup_finished(self, result, error):
+        if error is None:
+            show_toast(self.parent_root, "Đã sao lưu cơ sở dữ liệu thành công!", "green")
+            logging.getLogger(__name__).info(f"Database backed up: {result}")
+        else:
+            show_toast(self.parent_root, f"Lỗi: Không thể sao lưu cơ sở dữ liệu: {error}", "red")
+        self._set_busy(False)
+        self._load_snapshots()
         logging.getLogger(__name__).info("Backup operation completed.")
 
-    def _restore_db(self):
-        restore_dir = "backups"
-        os.makedirs(restore_dir, exist_ok=True) # Ensure backups directory exists
+    def _restore_snapshot(self):
+        selection = self.snapshot_list.curselection()
+        if not selection:
+            show_toast(self.parent_root, "Vui lòng chọn một bản sao lưu để phục hồi.", "orange")
+            return
+        snapshot_id = self.snapshot_ids[selection[0]]
+        self._confirm_and_restore(
+            lambda progress: self.db_manager.restore_snapshot(snapshot_id, backup_dir=BACKUP_DIR,
+                                                              progress_callback=progress),
+            f"snapshot {snapshot_id}")
 
+    def _restore_db(self):
         restore_file = filedialog.askopenfilename(
             parent=self.dialog,
             defaultextension=".db",
-            filetypes=[("Database files", "*.db")],
-            initialdir=restore_dir
+            filetypes=[("Database files", "*.db")]
         )
         if not restore_file:
             show_toast(self.parent_root, "Thao tác phục hồi đã bị hủy.", "orange")
             logging.getLogger(__name__).info("Restore operation cancelled by user.")
             return
-        
+
         if not os.path.exists(restore_file):
             show_toast(self.parent_root, "Lỗi: Tệp phục hồi không tồn tại.", "red")
             logging.getLogger(__name__).error(f"Restore file not found: {restore_file}")
             return
 
-        if messagebox.askyesno("Xác nhận", "Thao tác này sẽ ghi đè toàn bộ dữ liệu hiện tại. Bạn có chắc chắn muốn tiếp tục?"):
-            try:
-                # Create automatic backup before restore
-                backup_name = f"pre_restore_backup_{datetime.now().strftime('%Y%m%d%H%M%S')}.db"
-                auto_backup_path = os.path.join("backups", backup_name)
-                shutil.copyfile(self.db_manager.db_name, auto_backup_path)
-                show_toast(self.parent_root, f"Đã tạo bản sao lưu tự động: {backup_name}", "blue")
-                logging.getLogger(__name__).info(f"Automatic backup created at: {auto_backup_path}")
-
-                self.db_manager.close() # Close DB connection before copying
-                
-                shutil.copyfile(restore_file, self.db_manager.db_name)
-                messagebox.showinfo("Thành công", "Đã phục hồi DB thành công! Vui lòng khởi động lại ứng dụng.")
-                logging.getLogger(__name__).info(f"Database restored from: {restore_file}. Application will now exit.")
-                self.parent_root.destroy() # Destroy main window to force restart
-            except Exception as e:
-                messagebox.showerror("Lỗi", f"Không thể phục hồi cơ sở dữ liệu: {e}")
-                logging.getLogger(__name__).error(f"Database restore failed: {e}", exc_info=True)
-            finally:
-                # Re-initialize db_manager (or just let main.py handle it on restart)
-                # For safety, ensure connection is closed if something went wrong
-                if self.db_manager.conn is not None:
-                    self.db_manager.close()
-        
-        self.dialog.destroy()
-        logging.getLogger(__name__).info("Restore operation completed.")
\ No newline at end of file
+        self._confirm_and_restore(
+            lambda progress: self.db_manager.restore_database(restore_file, backup_dir=BACKUP_DIR,
+                                                              progress_callback=progress),
+            restore_file)
+
+    def _confirm_and_restore(self, restore_func, source):
+        if not messagebox.askyesno("Xác nhận", "Thao tác này sẽ ghi đè toàn bộ dữ liệu hiện tại. Bạn có chắc chắn muốn tiếp tục?",
+                                   parent=self.dialog):
+            return
+
+        def restore(progress):
+            # Tự tạo snapshot trước khi phục hồi, rồi chép dữ liệu qua kết nối đang mở
+            ok, error = restore_func(progress)
+            if not ok:
+                raise RuntimeError(error)
+            return source
+        self._start_task(restore, self._on_restore_finished)
+
+    def _on_restore_finished(self, source, error):
+        # Các tab được làm mới qua thay đổi "restore" của DatabaseManager, không cần khởi động lại
+        if error is None:
+            show_toast(self.parent_root, "Đã phục hồi cơ sở dữ liệu thành công!", "green")
+            logging.getLogger(__name__).info(f"Database restored from: {source}")
+        else:
+            messagebox.showerror("Lỗi", f"Không thể phục hồi cơ sở dữ liệu: {error}", parent=self.dialog)
+        self._set_busy(False)
+        self._load_snapshots()
+        logging.getLogger(__name__).info("Restore operation completed.")
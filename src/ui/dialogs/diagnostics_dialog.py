@@ -0,0 +1,104 @@
+import tkinter as tk
+from tkinter import ttk, Toplevel, filedialog, messagebox
+from datetime import datetime
+import logging
+from src.utils.instrumentation import METRICS
+
+METRIC_COLUMNS = ("Thao tác", "Số lần", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Lớn nhất (ms)", "Tổng (ms)")
+SLOW_COLUMNS = ("Thời điểm", "Thao tác", "Thời gian (ms)", "Luồng", "Tham số")
+AUTO_REFRESH_MS = 2000
+
+class DiagnosticsDialog:
+    """Bảng độ trễ (p50/p95/p99) của các thao tác đã đo và các lần chạy chậm gần nhất."""
+
+    def __init__(self, parent_root):
+        self.dialog = Toplevel(parent_root)
+        self.dialog.title("Chẩn đoán hiệu năng")
+        self.dialog.geometry("900x560")
+        self.dialog.transient(parent_root)
+        self._refresh_id = None
+
+        self._create_widgets()
+        self._refresh()
+        self.dialog.protocol("WM_DELETE_WINDOW", self._close)
+
+    def _create_widgets(self):
+        frame = ttk.Frame(self.dialog, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        self.summary_label = ttk.Label(frame)
+        self.summary_label.pack(anchor=tk.W, pady=(0, 5))
+
+        self.metric_tree = self._create_tree(frame, METRIC_COLUMNS, height=12)
+        self.metric_tree.column("Thao tác", width=280)
+
+        ttk.Label(frame, text=f"Các lần chạy chậm (≥ {METRICS.slow_threshold * 1000:.0f} ms), mới nhất trước:").pack(
+            anchor=tk.W, pady=(10, 5))
+        self.slow_tree = self._create_tree(frame, SLOW_COLUMNS, height=8)
+        self.slow_tree.column("Tham số", width=320)
+
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(pady=(10, 0))
+        ttk.Button(button_frame, text="Làm mới", command=self._refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Đặt lại", command=self._reset).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Xuất JSON...", command=self._export_json).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Đóng", command=self._close).pack(side=tk.LEFT, padx=5)
+
+    def _create_tree(self, parent, columns, height):
+        tree_frame = ttk.Frame(parent)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=height)
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=90, anchor=tk.W)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.configure(yscrollcommand=scrollbar.set)
+        return tree
+
+    def _refresh(self):
+        if self._refresh_id is not None:
+            self.dialog.after_cancel(self._refresh_id)
+        metrics = METRICS.summary()
+        self.metric_tree.delete(*self.metric_tree.get_children())
+        # Thao tác tốn nhiều thời gian nhất lên đầu
+        for name, stats in sorted(metrics.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+            self.metric_tree.insert('', 'end', values=(
+                name, stats["count"], f"{stats['p50_ms']:.1f}", f"{stats['p95_ms']:.1f}",
+                f"{stats['p99_ms']:.1f}", f"{stats['max_ms']:.1f}", f"{stats['total_ms']:.0f}"))
+
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        for sample in METRICS.slow_samples():
+            self.slow_tree.insert('', 'end', values=(
+                sample["at"].replace("T", " "), sample["name"], f"{sample['duration_ms']:.1f}",
+                sample["thread"], sample["detail"]))
+
+        self.summary_label.config(text=f"{len(metrics)} thao tác, "
+                                       f"{sum(stats['count'] for stats in metrics.values())} lần đo")
+        self._refresh_id = self.dialog.after(AUTO_REFRESH_MS, self._refresh)
+
+    def _reset(self):
+        METRICS.reset()
+        self._refresh()
+
+    def _export_json(self):
+        filename = filedialog.asksaveasfilename(
+            parent=self.dialog, defaultextension=".json", filetypes=[("JSON", "*.json")],
+            initialfile=f"diagnostics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        if not filename:
+            return
+        try:
+            METRICS.dump_json(filename)
+        except OSError as e:
+            logging.getLogger(__name__).error(f"Failed to write diagnostics to {filename}: {e}", exc_info=True)
+            messagebox.showerror("Lỗi", f"Không thể ghi file: {e}", parent=self.dialog)
+            return
+        messagebox.showinfo("Thành công", f"Đã lưu số liệu hiệu năng vào:\n{filename}\n"
+                                          "Hãy đính kèm file này khi báo lỗi.", parent=self.dialog)
+
+    def _close(self):
+        if self._refresh_id is not None:
+            self.dialog.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        self.dialog.destroy()
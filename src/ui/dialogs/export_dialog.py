@@ -0,0 +1,94 @@
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from datetime import datetime
+import logging
+
+def show_progress_window(root, text="Đang xuất file, vui lòng chờ..."):
+    progress_window = tk.Toplevel(root)
+    progress_window.title("Đang xử lý...")
+    progress_window.geometry("300x50")
+    progress_window.transient(root)
+    progress_window.grab_set()
+    progress_label = ttk.Label(progress_window, text=text, padding=5)
+    progress_label.pack(side=tk.TOP, fill=tk.X, expand=True)
+    progress_bar = ttk.Progressbar(progress_window, mode='indeterminate')
+    progress_bar.pack(side=tk.TOP, fill=tk.X, expand=True, padx=10)
+    progress_bar.start(10)
+    progress_window.progress_label = progress_label
+    root.update_idletasks()
+    logging.getLogger(__name__).info("Progress bar shown.")
+    return progress_window
+
+def hide_progress_window(progress_window):
+    if progress_window and progress_window.winfo_exists():
+        progress_window.destroy()
+        logging.getLogger(__name__).info("Progress bar hidden.")
+
+def progress_reporter(root, progress_window, template="Đang xuất file... đã ghi {} dòng"):
+    """Tạo progress_callback(*values) cập nhật nhãn của cửa sổ tiến trình (qua luồng Tk)."""
+    def report(*values):
+        def update():
+            if progress_window.winfo_exists():
+                progress_window.progress_label.config(text=template.format(*values))
+        root.after(0, update)
+    return report
+
+def _run_export(root, db_manager, label, export_func):
+    """Chạy export_func(progress_callback) trên luồng nền và báo kết quả trên luồng Tk."""
+    progress_window = show_progress_window(root)
+
+    def finish(rows_written, error):
+        hide_progress_window(progress_window)
+        if error is not None:
+            messagebox.showerror("Lỗi", f"Không thể xuất báo cáo {label}: {error}")
+        elif rows_written == 0:
+            messagebox.showinfo("Cảnh báo", f"Không có dữ liệu để xuất {label}.")
+        else:
+            messagebox.showinfo("Thành công", f"Đã xuất báo cáo {label} thành công!")
+
+    def run():
+        try:
+            rows_written = export_func(progress_reporter(root, progress_window))
+            root.after(0, finish, rows_written, None)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"{label} export failed: {e}", exc_info=True)
+            root.after(0, finish, None, e)
+        finally:
+            db_manager.release_connection() # TRẢ KẾT NỐI ĐỌC CỦA LUỒNG NÀY
+
+    threading.Thread(target=run, daemon=True).start()
+
+def export_excel_report(root, db_manager, from_date, to_date, task_filter, status_filter):
+    """Hỏi tên file trên luồng Tk rồi xuất báo cáo Excel trên luồng nền."""
+    filename = filedialog.asksaveasfilename(
+        parent=root,
+        defaultextension=".xlsx",
+        filetypes=[("Excel files", "*.xlsx")],
+        initialfile=f"BaoCao_CongViec_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    )
+    if not filename:
+        logging.getLogger(__name__).info("Excel export cancelled by user.")
+        return
+    # Nạp openpyxl khi xuất lần đầu thay vì lúc khởi động ứng dụng
+    from src.utils.export_manager import export_excel
+    logging.getLogger(__name__).info(f"Starting Excel export for {from_date} to {to_date}.")
+    _run_export(root, db_manager, "Excel", lambda progress: export_excel(
+        db_manager, filename, from_date, to_date, task_filter, status_filter, progress_callback=progress))
+
+def export_word_report(root, db_manager, from_date, to_date, task_filter, status_filter, group_by=None):
+    """Hỏi tên file trên luồng Tk rồi xuất báo cáo Word trên luồng nền."""
+    filename = filedialog.asksaveasfilename(
+        parent=root,
+        defaultextension=".docx",
+        filetypes=[("Word files", "*.docx")],
+        initialfile=f"BaoCao_CongViec_{datetime.now().strftime('%Y%m%d')}.docx"
+    )
+    if not filename:
+        logging.getLogger(__name__).info("Word export cancelled by user.")
+        return
+    from src.utils.export_manager import export_word
+    logging.getLogger(__name__).info(f"Starting Word export for {from_date} to {to_date}.")
+    _run_export(root, db_manager, "Word", lambda progress: export_word(
+        db_manager, filename, from_date, to_date, task_filter, status_filter, group_by=group_by,
+        progress_callback=progress))
@@ -0,0 +1,44 @@
+import threading
+from tkinter import filedialog, messagebox
+import logging
+
+from src.ui.dialogs.export_dialog import show_progress_window, hide_progress_window, progress_reporter
+
+def import_records_dialog(root, db_manager, main_tasks, on_finished=None):
+    """Chọn file rồi nhập trên luồng nền, hiển thị tiến trình và kết quả (gọi từ luồng Tk)."""
+    filename = filedialog.askopenfilename(
+        parent=root,
+        filetypes=[("Bảng tính", "*.xlsx *.csv"), ("Excel files", "*.xlsx"), ("CSV files", "*.csv")]
+    )
+    if not filename:
+        return
+    from src.utils.import_manager import import_records
+
+    progress_window = show_progress_window(root, "Đang nhập dữ liệu, vui lòng chờ...")
+    report = progress_reporter(root, progress_window, "Đang nhập... đã đọc {} dòng, đã lưu {}")
+
+    def finish(result, error):
+        hide_progress_window(progress_window)
+        if error is not None:
+            messagebox.showerror("Lỗi", f"Không thể nhập dữ liệu: {error}")
+        else:
+            message = f"Đã nhập {result['imported']} dòng, bỏ qua {result['skipped']} dòng lỗi."
+            if result["errors"]:
+                message += "\n\n" + "\n".join(f"Dòng {line}: {error}" for line, error in result["errors"][:10])
+            if result["unknown_tasks"]:
+                message += f"\n\n{len(result['unknown_tasks'])} công việc không có trong danh sách công việc chính."
+            messagebox.showinfo("Nhập dữ liệu", message)
+        if on_finished:
+            on_finished()
+
+    def run():
+        try:
+            result = import_records(db_manager, filename, main_tasks, progress_callback=report)
+            root.after(0, finish, result, None)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Import from {filename} failed: {e}", exc_info=True)
+            root.after(0, finish, None, e)
+        finally:
+            db_manager.release_connection()
+
+    threading.Thread(target=run, daemon=True).start()
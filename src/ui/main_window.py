@@ -7,7 +7,21 @@ from src.ui.components.report_tab import ReportTab
 from src.ui.components.settings_tab import SettingsTab
 from src.ui.dialogs.backup_manager_dialog import BackupManagerDialog
 from src.ui.dialogs.about_dialog import AboutDialog
+from src.ui.dialogs.diagnostics_dialog import DiagnosticsDialog
 from src.utils.updater import AutoUpdater
+from src.utils.query_executor import QueryExecutor
+from src.utils.instrumentation import timed
+from src.ui.dialogs.import_dialog import import_records_dialog
+
+DIARY_TAB_TEXT = "Nhật ký công việc"
+REPORT_TAB_TEXT = "Báo cáo"
+SETTINGS_TAB_TEXT = "Cài đặt"
+# Gom các thông báo thay đổi dữ liệu trong khoảng này thành một lần làm mới giao diện
+DATA_REFRESH_DELAY_MS = 100
+# Chu kỳ kiểm tra thay đổi do tiến trình khác ghi vào database (ví dụ lệnh nhập từ dòng lệnh)
+EXTERNAL_CHANGE_POLL_MS = 5000
+# Các thay đổi làm đổi tổng số bản ghi trên thanh trạng thái
+COUNT_CHANGES = {"insert", "delete", "restore", "external"}
 
 class WorkDiaryApp:
     def __init__(self, root, config, config_manager, db_manager):
@@ -36,7 +50,6 @@ class WorkDiaryApp:
         try:
             self.root.set_theme(theme_name)
             self.config_manager.update_config("theme", theme_name)
-            self.config_manager.save_config()
             logging.getLogger(__name__).info(f"Theme applied: {theme_name}")
         except Exception as e:
             logging.getLogger(__name__).error(f"Failed to apply theme {theme_name}: {e}", exc_info=True)
@@ -54,15 +67,29 @@ class WorkDiaryApp:
         self.main_frame.grid_rowconfigure(0, weight=1)
         self.main_frame.grid_columnconfigure(0, weight=1)
         
-        # Tạo các tab
-        self.diary_tab = DiaryTab(self.notebook, self.db_manager, self.config, self.update_status_bar, self.config_manager)
-        self.report_tab = ReportTab(self.notebook, self.db_manager, self.config, self.open_backup_manager)
-        self.settings_tab = SettingsTab(self.notebook, self.config_manager, self)  # Truyền self vào
-
-        self.notebook.add(self.diary_tab.frame, text="Nhật ký công việc")
-        self.notebook.add(self.report_tab.frame, text="Báo cáo")
-        self.notebook.add(self.settings_tab.frame, text="Cài đặt")
+        # Các truy vấn đọc chạy trên luồng nền để không làm treo cửa sổ
+        self.query_executor = QueryExecutor(self.root)
+
+        # Tab nhật ký hiển thị đầu tiên nên được tạo ngay; các tab còn lại chỉ là khung
+        # giữ chỗ cho tới khi được chọn lần đầu (xem _ensure_tab)
+        self.diary_tab = DiaryTab(self.notebook, self.db_manager, self.config, self.update_status_bar, self.config_manager,
+                                  self.query_executor)
+        self.report_tab = None
+        self.settings_tab = None
+        self.notebook.add(self.diary_tab.frame, text=DIARY_TAB_TEXT)
+        self._lazy_tabs = {}
+        for attribute, text, factory in (("report_tab", REPORT_TAB_TEXT, self._create_report_tab),
+                                         ("settings_tab", SETTINGS_TAB_TEXT, self._create_settings_tab)):
+            placeholder = ttk.Frame(self.notebook)
+            self.notebook.add(placeholder, text=text)
+            self._lazy_tabs[str(placeholder)] = (attribute, placeholder, factory)
+        # Tab -> data_version của database lúc dữ liệu của tab được nạp lần cuối
+        self._loaded_versions = {DIARY_TAB_TEXT: self.db_manager.data_version}
         self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        self._pending_changes = set()
+        self._refresh_after_id = None
+        self.db_manager.add_change_listener(self._on_data_changed)
+        self.root.after(EXTERNAL_CHANGE_POLL_MS, self._poll_external_changes)
 
         self._create_menu_bar()
         self.status_bar = ttk.Label(self.root, text="", relief=tk.SUNKEN, anchor=tk.W)
@@ -82,6 +109,7 @@ class WorkDiaryApp:
 
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tệp", menu=file_menu)
+        file_menu.add_command(label="Nhập dữ liệu từ Excel/CSV...", command=self._import_records)
         file_menu.add_command(label="Sao lưu DB", command=lambda: BackupManagerDialog(self.root, self.db_manager, self.config_manager))
         file_menu.add_command(label="Thoát", command=self._on_closing)
 
@@ -89,23 +117,88 @@ class WorkDiaryApp:
         menubar.add_cascade(label="Trợ giúp", menu=help_menu)
         help_menu.add_command(label="Giới thiệu", command=lambda: AboutDialog(self.root, self.config_manager.get_app_version()))
         help_menu.add_command(label="Kiểm tra cập nhật", command=self._check_for_updates_manual)
+        help_menu.add_command(label="Chẩn đoán hiệu năng", command=lambda: DiagnosticsDialog(self.root))
         logging.getLogger(__name__).info("Menu bar created.")
 
+    def _create_report_tab(self, parent):
+        return ReportTab(parent, self.db_manager, self.config, self.open_backup_manager, self.query_executor)
+
+    def _create_settings_tab(self, parent):
+        return SettingsTab(parent, self.config_manager, self)
+
+    def _ensure_tab(self, tab_id):
+        """Tạo tab trong khung giữ chỗ của nó nếu đây là lần đầu tab được chọn."""
+        lazy_tab = self._lazy_tabs.pop(tab_id, None)
+        if lazy_tab is None:
+            return
+        attribute, placeholder, factory = lazy_tab
+        tab = factory(placeholder)
+        tab.frame.pack(fill=tk.BOTH, expand=True)
+        setattr(self, attribute, tab)
+        logging.getLogger(__name__).info(f"Created tab on first use: {attribute}")
+
     def _on_tab_changed(self, event):
-        selected_tab_text = self.notebook.tab(self.notebook.select(), "text")
+        tab_id = self.notebook.select()
+        selected_tab_text = self.notebook.tab(tab_id, "text")
         logging.getLogger(__name__).info(f"Switched to tab: {selected_tab_text}")
+        self._ensure_tab(tab_id)
 
-        if selected_tab_text == "Nhật ký công việc":
+        # Chỉ nạp lại khi dữ liệu đã đổi kể từ lần nạp trước của tab này
+        data_version = self.db_manager.data_version
+        if self._loaded_versions.get(selected_tab_text) == data_version:
+            return
+        if selected_tab_text == DIARY_TAB_TEXT:
             self.diary_tab.load_records()
             self.update_status_bar()
-        elif selected_tab_text == "Báo cáo":
+        elif selected_tab_text == REPORT_TAB_TEXT:
             self.report_tab.view_report()
+        else:
+            return
+        self._loaded_versions[selected_tab_text] = data_version
+
+    def _on_data_changed(self, data_version, changes):
+        # Được gọi trên luồng ghi: chuyển sang luồng Tk
+        self.root.after(0, self._schedule_refresh, changes)
+
+    def _schedule_refresh(self, changes):
+        self._pending_changes |= changes
+        if self._refresh_after_id is None:
+            self._refresh_after_id = self.root.after(DATA_REFRESH_DELAY_MS, self._refresh_views)
+
+    @timed("tk.refresh_views")
+    def _refresh_views(self):
+        """Chỉ làm mới những gì bị ảnh hưởng: thanh trạng thái và tab đang hiển thị."""
+        self._refresh_after_id = None
+        changes, self._pending_changes = self._pending_changes, set()
+        if changes & COUNT_CHANGES:
+            self.update_status_bar()
+        # Tab ẩn sẽ tự nạp lại khi được chọn vì data_version đã khác
+        data_version = self.db_manager.data_version
+        selected_tab_text = self.notebook.tab(self.notebook.select(), "text")
+        if selected_tab_text == DIARY_TAB_TEXT:
+            self.diary_tab.load_records()
+        elif selected_tab_text == REPORT_TAB_TEXT and self.report_tab is not None:
+            self.report_tab.view_report()
+        else:
+            return
+        self._loaded_versions[selected_tab_text] = data_version
+
+    def _poll_external_changes(self):
+        self.query_executor.submit("poll_changes", self.db_manager.poll_changes)
+        self.root.after(EXTERNAL_CHANGE_POLL_MS, self._poll_external_changes)
 
     def update_status_bar(self):
-        total_records = self.db_manager.get_total_records()
+        self.query_executor.submit("total_records", self.db_manager.get_total_records,
+                                   on_done=self._show_total_records)
+
+    def _show_total_records(self, total_records):
         self.status_bar.config(text=f"Tổng số bản ghi: {total_records}")
         logging.getLogger(__name__).debug(f"Status bar updated: {total_records} records.")
 
+    def _import_records(self):
+        # Danh sách và thanh trạng thái được làm mới qua _on_data_changed khi mỗi lô đã commit
+        import_records_dialog(self.root, self.db_manager, self.config_manager.get_main_tasks())
+
     def open_backup_manager(self):
         BackupManagerDialog(self.root, self.db_manager, self.config_manager)
 
@@ -115,5 +208,8 @@ class WorkDiaryApp:
 
     def _on_closing(self):
         if messagebox.askyesno("Thoát ứng dụng", "Bạn có chắc chắn muốn thoát?"):
+            self.db_manager.remove_change_listener(self._on_data_changed)
+            self.query_executor.shutdown()
             self.db_manager.close()
+            self.config_manager.flush()
             self.root.destroy()
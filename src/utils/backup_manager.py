@@ -1,39 +1,88 @@
-import shutil
+import sqlite3
 import os
 import logging
 from datetime import datetime
 
-# This file is currently minimal as backup/restore logic is mostly in BackupManagerDialog
-# and db_manager. This would be used if more complex, non-UI related backup logic was needed.
+from src.utils.backup_store import BACKUP_PAGES_PER_STEP, BackupStore, online_backup
 
-def perform_backup(db_path, backup_dir="backups"):
-    """Performs a programmatic backup of the database."""
+# Sao lưu được lưu trong kho snapshot tăng dần (BackupStore) tại backup_dir;
+# phục hồi chép dữ liệu vào database qua sqlite3 backup API nên không cần sao chép file.
+
+def perform_backup(db_path, backup_dir="backups", progress_callback=None, label="auto"):
+    """Performs a programmatic backup of the database as a new incremental snapshot."""
     try:
-        os.makedirs(backup_dir, exist_ok=True)
-        backup_filename = f"work_diary_auto_backup_{datetime.now().strftime('%Y%m%d%H%M%S')}.db"
-        backup_path = os.path.join(backup_dir, backup_filename)
-        shutil.copyfile(db_path, backup_path)
-        logging.getLogger(__name__).info(f"Automatic database backup created at: {backup_path}")
-        return True, backup_path
+        snapshot_id = BackupStore(backup_dir).create_snapshot(db_path, label=label, progress_callback=progress_callback)
+        logging.getLogger(__name__).info(f"Automatic database backup created: snapshot {snapshot_id} in {backup_dir}")
+        return True, snapshot_id
     except Exception as e:
         logging.getLogger(__name__).error(f"Failed to perform automatic backup of {db_path}: {e}", exc_info=True)
         return False, str(e)
 
-def perform_restore(db_path, restore_file_path, backup_dir="backups"):
-    """Performs a programmatic restore of the database."""
+def list_backups(backup_dir="backups"):
+    """Liệt kê các snapshot: [(id, created_at, label, size, new_chunks), ...], mới nhất trước."""
+    return BackupStore(backup_dir).list_snapshots()
+
+def _phase_progress(progress_callback, phase, phases):
+    """progress_callback(done, total) của giai đoạn thứ phase (trong phases giai đoạn đều nhau) của cả thao tác."""
+    if progress_callback is None:
+        return None
+    def report(done, total):
+        if total:
+            progress_callback(phase * total + done, phases * total)
+    return report
+
+def _copy_into_database(source_path, db_path, target_conn=None, progress_callback=None):
+    source = sqlite3.connect(source_path)
+    target = target_conn or sqlite3.connect(db_path)
+    def progress(status, remaining, total):
+        if progress_callback:
+            progress_callback(total - remaining, total)
+    try:
+        source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=progress, sleep=0)
+    finally:
+        source.close()
+        if target_conn is None:
+            target.close()
+
+def perform_restore(db_path, snapshot_id, backup_dir="backups", target_conn=None, progress_callback=None):
+    """
+    Performs a programmatic restore of the database from a snapshot.
+    Nếu truyền target_conn (kết nối ghi đang mở của ứng dụng), dữ liệu được chép
+    vào database qua chính kết nối đó nên không cần đóng hay mở lại ứng dụng.
+    progress_callback(done, total) nhận tiến độ chung của snapshot an toàn và bước chép dữ liệu.
+    """
+    store = BackupStore(backup_dir)
+    restore_path = os.path.join(backup_dir, f"restore_{snapshot_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.tmp")
+    try:
+        # Create a pre-restore snapshot for safety
+        pre_restore_id = store.create_snapshot(db_path, label="pre_restore",
+                                               progress_callback=_phase_progress(progress_callback, 0, 2))
+        logging.getLogger(__name__).info(f"Pre-restore backup created: snapshot {pre_restore_id}")
+
+        store.restore_snapshot(snapshot_id, restore_path)
+        _copy_into_database(restore_path, db_path, target_conn, _phase_progress(progress_callback, 1, 2))
+        logging.getLogger(__name__).info(f"Database restored from snapshot {snapshot_id}")
+        return True, None
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Failed to restore database from snapshot {snapshot_id}: {e}", exc_info=True)
+        return False, str(e)
+    finally:
+        if os.path.exists(restore_path):
+            os.remove(restore_path)
+
+def restore_from_file(db_path, restore_file_path, backup_dir="backups", target_conn=None, progress_callback=None):
+    """Phục hồi từ một file .db bên ngoài kho snapshot (tạo snapshot an toàn trước khi phục hồi)."""
     try:
         if not os.path.exists(restore_file_path):
             raise FileNotFoundError(f"Restore file not found: {restore_file_path}")
-        
-        # Create a pre-restore backup for safety
-        os.makedirs(backup_dir, exist_ok=True)
-        pre_restore_backup_name = f"pre_restore_backup_{datetime.now().strftime('%Y%m%d%H%M%S')}.db"
-        shutil.copyfile(db_path, os.path.join(backup_dir, pre_restore_backup_name))
-        logging.getLogger(__name__).info(f"Pre-restore backup created at: {pre_restore_backup_name}")
-
-        shutil.copyfile(restore_file_path, db_path)
+
+        pre_restore_id = BackupStore(backup_dir).create_snapshot(
+            db_path, label="pre_restore", progress_callback=_phase_progress(progress_callback, 0, 2))
+        logging.getLogger(__name__).info(f"Pre-restore backup created: snapshot {pre_restore_id}")
+
+        _copy_into_database(restore_file_path, db_path, target_conn, _phase_progress(progress_callback, 1, 2))
         logging.getLogger(__name__).info(f"Database restored from: {restore_file_path}")
         return True, None
     except Exception as e:
         logging.getLogger(__name__).error(f"Failed to restore database from {restore_file_path}: {e}", exc_info=True)
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
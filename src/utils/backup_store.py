@@ -0,0 +1,259 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import zlib
+from datetime import datetime
+
+from src.utils.instrumentation import timed
+
+# Backup/restore dùng sqlite3 backup API thay vì sao chép file: bản sao luôn nhất quán
+# (kể cả dữ liệu còn nằm trong file -wal) và không cần đóng kết nối của ứng dụng.
+
+BACKUP_PAGES_PER_STEP = 1024
+# Mỗi lần database bị ghi giữa hai đợt, backup API phải chép lại từ đầu. Quá số lần
+# này thì chuyển sang chép một lượt trong một giao dịch đọc (WAL không chặn ghi).
+BACKUP_MAX_RESTARTS = 5
+
+class _BackupRestarted(Exception):
+    pass
+
+@timed("backup.online_copy")
+def online_backup(source_path, target_path, progress_callback=None, pages_per_step=BACKUP_PAGES_PER_STEP):
+    """
+    Sao lưu database đang mở sang target_path bằng Connection.backup() theo từng đợt
+    pages_per_step trang, nên không chặn các thao tác ghi của ứng dụng.
+    progress_callback(pages_done, total_pages) được gọi sau mỗi đợt.
+    Bản sao được ghi vào file tạm rồi đổi tên, nên target_path không bao giờ bị dở dang.
+    """
+    tmp_path = target_path + ".part"
+    source = sqlite3.connect(source_path)
+    try:
+        target = sqlite3.connect(tmp_path)
+        try:
+            state = {"remaining": None, "restarts": 0}
+            def progress(status, remaining, total):
+                if state["remaining"] is not None and remaining > state["remaining"]:
+                    state["restarts"] += 1
+                    if state["restarts"] > BACKUP_MAX_RESTARTS:
+                        raise _BackupRestarted()
+                state["remaining"] = remaining
+                if progress_callback:
+                    progress_callback(total - remaining, total)
+            try:
+                source.backup(target, pages=pages_per_step, progress=progress, sleep=0.005)
+            except _BackupRestarted:
+                logging.getLogger(__name__).warning("Database changed too often during backup, copying in one step.")
+                source.backup(target)
+                if progress_callback:
+                    progress_callback(1, 1)
+        finally:
+            target.close()
+        os.replace(tmp_path, target_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+    return target_path
+
+DIGEST_SIZE = hashlib.sha256().digest_size
+# create_snapshot() và prune() giữ khóa ghi của catalog.db (BEGIN IMMEDIATE) trong suốt
+# lúc khử trùng lặp/xóa khối, nên tiến trình khác (giao diện, CLI, sao lưu định kỳ) phải
+# chờ; một snapshot lớn có thể giữ khóa khá lâu nên thời gian chờ dài hơn mặc định
+CATALOG_LOCK_TIMEOUT = 600
+# Mức 1: nhanh hơn mức mặc định vài lần, tỉ lệ nén với trang SQLite gần như tương đương
+COMPRESSION_LEVEL = 1
+
+CATALOG_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS chunks (
+        digest BLOB PRIMARY KEY,
+        pack TEXT NOT NULL,
+        offset INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        compressed INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_chunks_pack ON chunks (pack);
+    CREATE TABLE IF NOT EXISTS snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT NOT NULL,
+        label TEXT,
+        size INTEGER NOT NULL,
+        chunk_size INTEGER NOT NULL,
+        new_chunks INTEGER NOT NULL,
+        manifest BLOB NOT NULL
+    );
+'''
+
+
+class BackupStore:
+    """
+    Kho sao lưu tăng dần, khử trùng lặp theo nội dung. Dùng chung được giữa nhiều
+    tiến trình: các thao tác ghi vào kho được tuần tự hóa bằng khóa của catalog.db.
+
+    Mỗi snapshot là một bản sao nhất quán (sqlite3 backup API) được chia thành các
+    khối bằng kích thước trang của database. Khối được định danh bằng SHA-256; chỉ
+    những khối chưa có trong kho mới được nén (zlib) và ghi thêm vào một file pack
+    của snapshot đó. Danh mục catalog.db lưu vị trí từng khối và manifest (danh sách
+    digest theo thứ tự) của từng snapshot, đủ để dựng lại database bất kỳ lúc nào.
+    """
+
+    def __init__(self, store_dir="backups", compress=True):
+        self.store_dir = store_dir
+        self.compress = compress
+        self.pack_dir = os.path.join(store_dir, "packs")
+        self.catalog_path = os.path.join(store_dir, "catalog.db")
+        os.makedirs(self.pack_dir, exist_ok=True)
+        with self._connect() as catalog:
+            catalog.executescript(CATALOG_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.catalog_path, timeout=CATALOG_LOCK_TIMEOUT)
+
+    @staticmethod
+    def _read_page_size(path):
+        """Đọc kích thước trang từ header của file SQLite (byte 16-17, 1 nghĩa là 65536)."""
+        with open(path, 'rb') as f:
+            header = f.read(100)
+        page_size = int.from_bytes(header[16:18], 'big')
+        return 65536 if page_size == 1 else (page_size or 4096)
+
+    @timed("backup.create_snapshot")
+    def create_snapshot(self, db_path, label=None, progress_callback=None):
+        """
+        Tạo snapshot của database đang mở. progress_callback(done, total) được gọi
+        trong cả hai giai đoạn (sao chép nhất quán rồi chia khối).
+        Trả về id của snapshot.
+        """
+        created_at = datetime.now()
+        stamp = created_at.strftime('%Y%m%d%H%M%S%f')
+        copy_path = os.path.join(self.store_dir, f"snapshot_{stamp}.tmp")
+        pack_name = f"{stamp}.pack"
+        pack_path = os.path.join(self.pack_dir, pack_name)
+
+        def copy_progress(pages_done, total_pages):
+            if progress_callback:
+                progress_callback(pages_done, total_pages * 2)
+
+        try:
+            online_backup(db_path, copy_path, copy_progress)
+            size = os.path.getsize(copy_path)
+            chunk_size = self._read_page_size(copy_path)
+            total_chunks = (size + chunk_size - 1) // chunk_size
+
+            manifest = bytearray()
+            new_chunks = 0
+            with self._connect() as catalog, open(copy_path, 'rb') as source, open(pack_path, 'ab') as pack:
+                # Khóa từ lúc kiểm tra khối đã có tới lúc lưu manifest: snapshot khác không chèn
+                # trùng digest, prune() không xóa khối mà snapshot này vừa dùng lại
+                catalog.execute("BEGIN IMMEDIATE")
+                seen = set()
+                offset = pack.tell()
+                for index in range(total_chunks):
+                    data = source.read(chunk_size)
+                    digest = hashlib.sha256(data).digest()
+                    manifest += digest
+                    if digest not in seen and catalog.execute(
+                            "SELECT 1 FROM chunks WHERE digest = ?", (digest,)).fetchone() is None:
+                        stored, compressed = data, 0
+                        if self.compress:
+                            packed = zlib.compress(data, COMPRESSION_LEVEL)
+                            if len(packed) < len(data):
+                                stored, compressed = packed, 1
+                        pack.write(stored)
+                        catalog.execute("INSERT INTO chunks (digest, pack, offset, length, compressed) VALUES (?, ?, ?, ?, ?)",
+                                        (digest, pack_name, offset, len(stored), compressed))
+                        offset += len(stored)
+                        new_chunks += 1
+                    seen.add(digest)
+                    if progress_callback and (index % 256 == 0 or index == total_chunks - 1):
+                        progress_callback(total_chunks + index + 1, total_chunks * 2)
+                pack.flush()
+                os.fsync(pack.fileno())
+                cursor = catalog.execute(
+                    "INSERT INTO snapshots (created_at, label, size, chunk_size, new_chunks, manifest) VALUES (?, ?, ?, ?, ?, ?)",
+                    (created_at.strftime('%Y-%m-%d %H:%M:%S'), label, size, chunk_size, new_chunks, bytes(manifest)))
+                snapshot_id = cursor.lastrowid
+            logging.getLogger(__name__).info(
+                f"Snapshot {snapshot_id} created: {total_chunks} chunks, {new_chunks} new ({offset} bytes in {pack_name}).")
+            return snapshot_id
+        finally:
+            if os.path.exists(copy_path):
+                os.remove(copy_path)
+            if os.path.exists(pack_path) and os.path.getsize(pack_path) == 0:
+                os.remove(pack_path)
+
+    def list_snapshots(self):
+        """Trả về [(id, created_at, label, size, new_chunks), ...], mới nhất trước."""
+        with self._connect() as catalog:
+            return catalog.execute(
+                "SELECT id, created_at, label, size, new_chunks FROM snapshots ORDER BY id DESC").fetchall()
+
+    @timed("backup.restore_snapshot")
+    def restore_snapshot(self, snapshot_id, target_path):
+        """Dựng lại file database của snapshot vào target_path (ghi file tạm rồi đổi tên)."""
+        with self._connect() as catalog:
+            # Giữ giao dịch đọc tới khi đọc xong các pack: prune() phải chờ mới commit và xóa được file
+            catalog.execute("BEGIN")
+            row = catalog.execute("SELECT size, manifest FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Snapshot not found: {snapshot_id}")
+            size, manifest = row
+            locations = {}
+            for start in range(0, len(manifest), DIGEST_SIZE):
+                digest = manifest[start:start + DIGEST_SIZE]
+                if digest not in locations:
+                    locations[digest] = catalog.execute(
+                        "SELECT pack, offset, length, compressed FROM chunks WHERE digest = ?", (digest,)).fetchone()
+
+            tmp_path = target_path + ".part"
+            packs = {}
+            try:
+                with open(tmp_path, 'wb') as target:
+                    for start in range(0, len(manifest), DIGEST_SIZE):
+                        pack_name, offset, length, compressed = locations[manifest[start:start + DIGEST_SIZE]]
+                        pack = packs.get(pack_name)
+                        if pack is None:
+                            pack = packs[pack_name] = open(os.path.join(self.pack_dir, pack_name), 'rb')
+                        pack.seek(offset)
+                        data = pack.read(length)
+                        target.write(zlib.decompress(data) if compressed else data)
+                    target.truncate(size)
+                os.replace(tmp_path, target_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            finally:
+                for pack in packs.values():
+                    pack.close()
+        return target_path
+
+    def prune(self, keep_last=7):
+        """
+        Chỉ giữ keep_last snapshot mới nhất. File pack không còn khối nào được
+        snapshot còn lại tham chiếu sẽ bị xóa; trả về số snapshot đã xóa.
+        """
+        with self._connect() as catalog:
+            # Cùng khóa với create_snapshot(): manifest của snapshot đang tạo dở được tính
+            # là còn tham chiếu vì prune chỉ chạy sau khi nó đã commit
+            catalog.execute("BEGIN IMMEDIATE")
+            removed = catalog.execute(
+                "DELETE FROM snapshots WHERE id NOT IN (SELECT id FROM snapshots ORDER BY id DESC LIMIT ?)",
+                (keep_last,)).rowcount
+            if not removed:
+                return 0
+            referenced = set()
+            for (manifest,) in catalog.execute("SELECT manifest FROM snapshots"):
+                referenced.update(manifest[i:i + DIGEST_SIZE] for i in range(0, len(manifest), DIGEST_SIZE))
+            live_packs = {pack for digest, pack in catalog.execute("SELECT digest, pack FROM chunks") if digest in referenced}
+            dead_packs = [pack for (pack,) in catalog.execute("SELECT DISTINCT pack FROM chunks") if pack not in live_packs]
+            for pack in dead_packs:
+                catalog.execute("DELETE FROM chunks WHERE pack = ?", (pack,))
+        for pack in dead_packs:
+            pack_path = os.path.join(self.pack_dir, pack)
+            if os.path.exists(pack_path):
+                os.remove(pack_path)
+            logging.getLogger(__name__).info(f"Removed unreferenced backup pack: {pack}")
+        return removed
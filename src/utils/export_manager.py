@@ -1,186 +1,210 @@
-import threading
-from tkinter import filedialog, messagebox, Toplevel, ttk
-from datetime import datetime
+from xml.sax.saxutils import escape
 import logging
 import os
+import re
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import Cell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-import tkinter as tk # For Toplevel and ttk.Progressbar
-from src.database.db_manager import DatabaseManager 
-
-def _show_progress_bar(root):
-    progress_window = tk.Toplevel(root)
-    progress_window.title("Đang xử lý...")
-    progress_window.geometry("300x50")
-    progress_window.transient(root)
-    progress_window.grab_set()
-    progress_label = ttk.Label(progress_window, text="Đang xuất file, vui lòng chờ...", padding=5)
-    progress_label.pack(side=tk.TOP, fill=tk.X, expand=True)
-    progress_bar = ttk.Progressbar(progress_window, mode='indeterminate')
-    progress_bar.pack(side=tk.TOP, fill=tk.X, expand=True, padx=10)
-    progress_bar.start(10)
-    root.update_idletasks()
-    logging.getLogger(__name__).info("Progress bar shown.")
-    return progress_window
-
-def _hide_progress_bar(progress_window):
-    if progress_window:
-        progress_window.destroy()
-        logging.getLogger(__name__).info("Progress bar hidden.")
-
-def export_excel_report(root, db_path, from_date, to_date, task_filter, status_filter):
-    logging.getLogger(__name__).info(f"Starting Excel export for {from_date} to {to_date}.")
-    # TẠO KẾT NỐI MỚI TRONG LUỒNG NÀY
-    db_manager = DatabaseManager(db_name=db_path)
-    
-    report_data = db_manager.get_records_by_filters(
-        from_date, 
-        to_date, 
-        task=task_filter,
-        status=status_filter
-    )
-    
-    if not report_data:
-        db_manager.close() # ĐÓNG KẾT NỐI CỦA LUỒNG NÀY
-        root.after(0, lambda: messagebox.showinfo("Cảnh báo", "Không có dữ liệu để xuất Excel."))
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+
+from src.utils.instrumentation import timed
+
+EXPORT_CHUNK_SIZE = 1000
+REPORT_HEADERS = ['Ngày', 'Công việc', 'Phòng/Khoa', 'Chi tiết', 'Trạng thái']
+EXCEL_COLUMN_WIDTHS = [15, 30, 20, 50, 15]
+SUMMARY_SECTIONS = [("task", "Công việc"), ("status", "Trạng thái"), ("department", "Phòng/Khoa"), ("week", "Tuần")]
+WORD_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'templates', 'word_template.docx')
+WORD_GROUP_TITLES = {"date": "Ngày", "task": "Công việc"}
+# Ký tự điều khiển không hợp lệ trong XML (trừ tab và xuống dòng)
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _register_excel_styles(wb):
+    """Đăng ký các named style dùng chung một lần cho cả workbook."""
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    wb.add_named_style(NamedStyle(name="report_title", font=Font(bold=True, size=16, color="000000"),
+                                  alignment=Alignment(horizontal="center", vertical="center")))
+    wb.add_named_style(NamedStyle(name="report_header", font=Font(bold=True, color="FFFFFF"),
+                                  fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+                                  border=border, alignment=Alignment(horizontal="center")))
+    wb.add_named_style(NamedStyle(name="report_cell", border=border))
+    wb.add_named_style(NamedStyle(name="report_details", border=border,
+                                  alignment=Alignment(wrap_text=True, vertical="top")))
+
+def _styled_cell(ws, value, style):
+    cell = Cell(ws, row=1, column=1, value=value)
+    cell.style = style
+    return cell
+
+def get_report_summary(db_manager, from_date, to_date, task_filter=None, status_filter=None):
+    """Lấy các bảng tổng hợp (đọc từ bảng rollup) cho sheet Tổng hợp: [(tiêu đề, [(nhóm, số)]), ...]."""
+    return [
+        (label, db_manager.get_summary(from_date, to_date, group_by, task=task_filter or None, status=status_filter or None))
+        for group_by, label in SUMMARY_SECTIONS
+    ]
+
+def _write_summary_sheet(wb, summary, from_date, to_date):
+    ws = wb.create_sheet("Tổng hợp")
+    ws.column_dimensions['A'].width = 60
+    ws.column_dimensions['B'].width = 15
+    ws.append([_styled_cell(ws, "TỔNG HỢP CÔNG VIỆC", "report_title")])
+    ws.append([f"Thời gian: {from_date} đến {to_date}"])
+    for label, rows in summary:
+        ws.append([])
+        ws.append([_styled_cell(ws, label, "report_header"), _styled_cell(ws, "Số bản ghi", "report_header")])
+        for key, count in rows:
+            ws.append([_styled_cell(ws, key or "(không có)", "report_cell"), _styled_cell(ws, count, "report_cell")])
+
+def write_excel_report(filename, chunks, from_date, to_date, progress_callback=None, summary=None):
+    """
+    Ghi báo cáo Excel theo luồng bằng workbook write-only: các dòng được lấy từ
+    `chunks` (iterable các lô dòng) và ghi thẳng ra file, nên bộ nhớ không tăng
+    theo số dòng. progress_callback(rows_written) được gọi sau mỗi lô.
+    Nếu có `summary` (xem get_report_summary) thì thêm sheet Tổng hợp.
+    Trả về số dòng dữ liệu đã ghi.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Báo cáo công việc")
+    _register_excel_styles(wb)
+
+    for col, width in enumerate(EXCEL_COLUMN_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    ws.merged_cells.add('A1:E1')
+    ws.append([_styled_cell(ws, "BÁO CÁO CÔNG VIỆC", "report_title")])
+    ws.append([])
+    ws.append([f"Thời gian: {from_date} đến {to_date}"])
+    ws.append([])
+    ws.append([_styled_cell(ws, header, "report_header") for header in REPORT_HEADERS])
+
+    # Style của ô dữ liệu được tính một lần rồi dùng lại cho mọi ô
+    cell_style = _styled_cell(ws, None, "report_cell")._style
+    details_style = _styled_cell(ws, None, "report_details")._style
+    column_styles = [cell_style, cell_style, cell_style, details_style, cell_style]
+
+    rows_written = 0
+    for chunk in chunks:
+        for row_data in chunk:
+            ws.append([Cell(ws, row=1, column=1, value=value, style_array=style)
+                       for value, style in zip(row_data, column_styles)])
+        rows_written += len(chunk)
+        if progress_callback:
+            progress_callback(rows_written)
+
+    if summary:
+        _write_summary_sheet(wb, summary, from_date, to_date)
+
+    wb.save(filename)
+    return rows_written
+
+@timed("export.excel")
+def export_excel(db_manager, filename, from_date, to_date, task=None, status=None, progress_callback=None):
+    """
+    Xuất báo cáo Excel theo bộ lọc, không cần giao diện (dùng cho UI và CLI).
+    Trả về số dòng đã ghi; 0 nghĩa là không có dữ liệu và file không được tạo.
+    Dùng kết nối đọc của luồng gọi; luồng nền nên gọi db_manager.release_connection() sau đó.
+
+    Các dòng lấy từ RecordStore (dùng lại kết quả báo cáo vừa xem nếu còn trong bộ nhớ đệm),
+    chi tiết được đọc theo id từng lô nên chỉ một lô chuỗi chi tiết nằm trong bộ nhớ.
+    """
+    store = db_manager.get_record_store(from_date, to_date, task=task or None, status=status or None)
+    if not len(store):
         logging.getLogger(__name__).warning("No data found for Excel export.")
-        return
-    
-    filename = filedialog.asksaveasfilename(
-        parent=root,
-        defaultextension=".xlsx",
-        filetypes=[("Excel files", "*.xlsx")],
-        initialfile=f"BaoCao_CongViec_{datetime.now().strftime('%Y%m%d')}.xlsx"
-    )
-    
-    if not filename:
-        db_manager.close() # ĐÓNG KẾT NỐI CỦA LUỒNG NÀY
-        logging.getLogger(__name__).info("Excel export cancelled by user.")
-        return
-    
-    progress_window = _show_progress_bar(root)
-
-    try:
-        # ... (phần code tạo và ghi dữ liệu vào file Excel không thay đổi)
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Báo cáo công việc"
-        
-        title_font = Font(bold=True, size=16, color="000000")
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                        top=Side(style='thin'), bottom=Side(style='thin'))
-        
-        ws.merge_cells('A1:E1')
-        title_cell = ws['A1']
-        title_cell.value = "BÁO CÁO CÔNG VIỆC"
-        title_cell.font = title_font
-        title_cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        current_row = 3
-        ws[f'A{current_row}'] = f"Thời gian: {from_date} đến {to_date}"
-        current_row += 2 
-        
-        headers = ['Ngày', 'Công việc', 'Phòng/Khoa', 'Chi tiết', 'Trạng thái']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=current_row, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = border
-            cell.alignment = Alignment(horizontal="center")
-        
-        for row_data in report_data:
-            current_row += 1
-            for col_idx, value in enumerate(row_data, 1):
-                cell = ws.cell(row=current_row, column=col_idx, value=value)
-                cell.border = border
-                if col_idx == 4: # Details column
-                    cell.alignment = Alignment(wrap_text=True, vertical="top")
-        
-        column_widths = [15, 30, 20, 50, 15]
-        for col, width in enumerate(column_widths, start=1):
-            col_letter = get_column_letter(col)
-            ws.column_dimensions[col_letter].width = width
-        
-        wb.save(filename)
-        root.after(0, lambda: messagebox.showinfo("Thành công", f"Đã xuất báo cáo Excel thành công!"))
-        logging.getLogger(__name__).info(f"Excel report successfully exported to: {filename}")
-    except Exception as e:
-        root.after(0, lambda: messagebox.showerror("Lỗi", f"Không thể xuất báo cáo Excel: {e}"))
-        logging.getLogger(__name__).error(f"Excel export failed: {e}", exc_info=True)
-    finally:
-        _hide_progress_bar(progress_window)
-        db_manager.close() # ĐẢM BẢO KẾT NỐI LUÔN ĐƯỢC ĐÓNG
-def export_word_report(root, db_path, from_date, to_date, task_filter, status_filter):
-    logging.getLogger(__name__).info(f"Starting Word export for {from_date} to {to_date}.")
-
-    # TẠO KẾT NỐI MỚI TRONG LUỒNG NÀY
-    db_manager = DatabaseManager(db_name=db_path)
-
-    report_data = db_manager.get_records_by_filters(
-        from_date, 
-        to_date, 
-        task=task_filter,
-        status=status_filter
+        return 0
+    summary = get_report_summary(db_manager, from_date, to_date, task, status)
+    rows_written = write_excel_report(filename, store.iter_chunks(db_manager, EXPORT_CHUNK_SIZE), from_date, to_date,
+                                      progress_callback=progress_callback, summary=summary)
+    logging.getLogger(__name__).info(f"Excel report successfully exported to: {filename} ({rows_written} rows)")
+    return rows_written
+
+def _new_word_document():
+    """Tạo Document từ templates/word_template.docx nếu là file hợp lệ, ngược lại dùng mẫu mặc định."""
+    if os.path.isfile(WORD_TEMPLATE_PATH) and os.path.getsize(WORD_TEMPLATE_PATH) > 0:
+        try:
+            return Document(WORD_TEMPLATE_PATH)
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Word template is invalid, using default document: {e}")
+    return Document()
+
+def _word_cell_xml(value, width):
+    """Dựng XML của một ô bảng, giữ xuống dòng và tab như cell.text của python-docx."""
+    text = _INVALID_XML_CHARS.sub('', str(value) if value else "")
+    runs = '<w:br/>'.join(
+        '<w:tab/>'.join(f'<w:t xml:space="preserve">{escape(part)}</w:t>' for part in line.split('\t'))
+        for line in text.split('\n')
     )
+    return f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/></w:tcPr><w:p><w:r>{runs}</w:r></w:p></w:tc>'
+
+def _add_word_table(doc, chunks, progress_callback, rows_written):
+    """
+    Thêm một bảng báo cáo vào doc. Mỗi lô dòng trong chunks được dựng thành XML
+    rồi gắn thẳng vào <w:tbl>, tránh table.add_row()/cell.text cho từng ô.
+    Trả về tổng số dòng đã ghi (cộng dồn từ rows_written).
+    """
+    table = doc.add_table(rows=1, cols=len(REPORT_HEADERS))
+    table.style = 'Table Grid'
+    for i, header in enumerate(REPORT_HEADERS):
+        cell = table.cell(0, i)
+        cell.text = header
+        cell.paragraphs[0].runs[0].bold = True
+
+    widths = [tc.tcPr.find(qn('w:tcW')).get(qn('w:w')) for tc in table._tbl.tr_lst[0].tc_lst]
+    tbl = table._tbl
+    for chunk in chunks:
+        rows_xml = ''.join(
+            '<w:tr>' + ''.join(_word_cell_xml(value, width) for value, width in zip(row_data, widths)) + '</w:tr>'
+            for row_data in chunk
+        )
+        for tr in list(parse_xml(f'<w:tbl {nsdecls("w")}>{rows_xml}</w:tbl>')):
+            tbl.append(tr)
+        rows_written += len(chunk)
+        if progress_callback:
+            progress_callback(rows_written)
+    return rows_written
+
+def write_word_report(filename, sections, from_date, to_date, group_by=None, progress_callback=None):
+    """
+    Ghi báo cáo Word từ `sections`: iterable các (khóa nhóm, số dòng, các lô dòng).
+    group_by=None ghi một bảng duy nhất (mục đầu tiên); "date" hoặc "task" ghi mỗi nhóm
+    thành một mục có tiêu đề riêng. progress_callback(rows_written) được gọi sau mỗi lô.
+    Trả về số dòng đã ghi.
+    """
+    doc = _new_word_document()
+
+    title = doc.add_heading('BÁO CÁO CÔNG VIỆC', 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
     
-    if not report_data:
-        db_manager.close() # ĐÓNG KẾT NỐI CỦA LUỒNG NÀY
-        root.after(0, lambda: messagebox.showinfo("Cảnh báo", "Không có dữ liệu để xuất Word."))
+    doc.add_paragraph(f"Thời gian báo cáo: {from_date} đến {to_date}")
+    doc.add_paragraph("")
+    doc.add_heading('CHI TIẾT CÔNG VIỆC', level=1)
+
+    rows_written = 0
+    for key, row_count, chunks in sections:
+        if group_by is not None:
+            doc.add_heading(f"{WORD_GROUP_TITLES[group_by]}: {key} ({row_count} mục)", level=2)
+        rows_written = _add_word_table(doc, chunks, progress_callback, rows_written)
+
+    doc.save(filename)
+    return rows_written
+
+@timed("export.word")
+def export_word(db_manager, filename, from_date, to_date, task=None, status=None, group_by=None, progress_callback=None):
+    """Giống export_excel nhưng xuất báo cáo Word (group_by: None, "date" hoặc "task")."""
+    store = db_manager.get_record_store(from_date, to_date, task=task or None, status=status or None)
+    if not len(store):
         logging.getLogger(__name__).warning("No data found for Word export.")
-        return
-    
-    filename = filedialog.asksaveasfilename(
-        parent=root,
-        defaultextension=".docx",
-        filetypes=[("Word files", "*.docx")],
-        initialfile=f"BaoCao_CongViec_{datetime.now().strftime('%Y%m%d')}.docx"
-    )
-    
-    if not filename:
-        db_manager.close() # ĐÓNG KẾT NỐI CỦA LUỒNG NÀY
-        logging.getLogger(__name__).info("Word export cancelled by user.")
-        return
-    
-    progress_window = _show_progress_bar(root)
-
-    try:
-        doc = Document()
-        
-        title = doc.add_heading('BÁO CÁO CÔNG VIỆC', 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        doc.add_paragraph(f"Thời gian báo cáo: {from_date} đến {to_date}")
-        doc.add_paragraph("")
-        doc.add_heading('CHI TIẾT CÔNG VIỆC', level=1)
-        
-        table = doc.add_table(rows=1, cols=5)
-        table.style = 'Table Grid'
-        
-        headers = ['Ngày', 'Công việc', 'Phòng/Khoa', 'Chi tiết', 'Trạng thái']
-        for i, header in enumerate(headers):
-            cell = table.cell(0, i)
-            cell.text = header
-            cell.paragraphs[0].runs[0].bold = True
-        
-        for row_data in report_data:
-            row = table.add_row()
-            row.cells[0].text = str(row_data[0])
-            row.cells[1].text = str(row_data[1])
-            row.cells[2].text = str(row_data[2]) if row_data[2] else ""
-            row.cells[3].text = str(row_data[3]) if row_data[3] else ""
-            row.cells[4].text = str(row_data[4])
-        
-        doc.save(filename)
-        root.after(0, lambda: messagebox.showinfo("Thành công", f"Đã xuất báo cáo Word thành công!"))
-        logging.getLogger(__name__).info(f"Word report successfully exported to: {filename}")
-    except Exception as e:
-        root.after(0, lambda: messagebox.showerror("Lỗi", f"Không thể xuất báo cáo Word: {e}"))
-        logging.getLogger(__name__).error(f"Word export failed: {e}", exc_info=True)
-    finally:
-        _hide_progress_bar(progress_window)
-        db_manager.close() # ĐẢM BẢO KẾT NỐI LUÔN ĐƯỢC ĐÓNG
\ No newline at end of file
+        return 0
+    if group_by is None:
+        sections = [(None, len(store), store.iter_chunks(db_manager, EXPORT_CHUNK_SIZE))]
+    else:
+        # Dòng đã được sắp theo ngày giảm dần; nhóm (trong bộ nhớ) giữ thứ tự xuất hiện đầu tiên
+        sections = ((key, len(indexes), store.iter_chunks(db_manager, EXPORT_CHUNK_SIZE, indexes))
+                    for key, indexes in store.group_indexes(group_by).items())
+    rows_written = write_word_report(filename, sections, from_date, to_date, group_by=group_by,
+                                     progress_callback=progress_callback)
+    logging.getLogger(__name__).info(f"Word report successfully exported to: {filename} ({rows_written} rows)")
+    return rows_written
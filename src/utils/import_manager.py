@@ -0,0 +1,232 @@
+import csv
+import logging
+import os
+import re
+from datetime import date, datetime
+from itertools import chain
+from operator import itemgetter
+
+from src.database.department_index import normalize_text
+from src.utils.instrumentation import timed
+
+IMPORT_BATCH_SIZE = 100000
+# Số lô đã gửi sang hàng đợi ghi nhưng chưa commit; giới hạn để bộ nhớ không tăng theo file
+IMPORT_MAX_PENDING_BATCHES = 1
+IMPORT_MAX_ERRORS = 100
+DETAILS_MAX_LENGTH = 1000
+HEADER_SCAN_ROWS = 20
+RECORD_STATUSES = ["Đang thực hiện", "Hoàn thành", "Tạm dừng"]
+DEFAULT_IMPORT_STATUS = "Hoàn thành"
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d', '%d/%m/%y', '%Y-%m-%d %H:%M:%S']
+
+# Cùng thứ tự với REPORT_HEADERS của export_manager (dùng khi file không có dòng tiêu đề)
+IMPORT_COLUMNS = ("work_date", "task", "department", "details", "status")
+# Tên cột (không dấu) -> trường; chấp nhận tiêu đề của file Excel xuất ra và tên tiếng Anh
+COLUMN_ALIASES = {
+    "work_date": {"ngay", "ngay lam viec", "date", "work_date"},
+    "task": {"cong viec", "cong viec chinh", "task", "task_description"},
+    "department": {"phong/khoa", "phong khoa", "khoa/phong", "department"},
+    "details": {"chi tiet", "noi dung", "details"},
+    "status": {"trang thai", "status"},
+}
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _iter_csv_rows(filename):
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(f, dialect)
+
+
+def _iter_xlsx_rows(filename):
+    from openpyxl import load_workbook
+
+    # read_only: các dòng được đọc dần từ file, không nạp cả sheet vào bộ nhớ
+    wb = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def iter_source_rows(filename):
+    """Đọc lần lượt các dòng thô (list giá trị) từ file .csv hoặc .xlsx."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return _iter_csv_rows(filename)
+    if extension in ('.xlsx', '.xlsm'):
+        return _iter_xlsx_rows(filename)
+    raise ValueError(f"Unsupported import file type: {extension}")
+
+
+def _match_header(row):
+    """Trả về {trường: chỉ số cột} nếu row là dòng tiêu đề (có ít nhất cột ngày và công việc)."""
+    columns = {}
+    for index, value in enumerate(row):
+        name = normalize_text(str(value)) if value is not None else ""
+        for field, aliases in COLUMN_ALIASES.items():
+            if name in aliases and field not in columns:
+                columns[field] = index
+    if "work_date" in columns and "task" in columns:
+        return columns
+    return None
+
+
+class RecordNormalizer:
+    """
+    Kiểm tra và chuẩn hóa một dòng nhập: ngày về dạng YYYY-MM-DD, trạng thái và công
+    việc về đúng cách viết trong cấu hình, Phòng/Khoa về cách viết đã có trong database.
+    Các giá trị lặp lại được ghi nhớ nên chi phí chuẩn hóa gần như không đổi theo số dòng.
+    """
+
+    def __init__(self, main_tasks, departments=()):
+        # Giá trị thô -> giá trị đã chuẩn hóa (lỗi không được ghi nhớ nên vẫn được báo cho từng dòng)
+        self._date_cache, self._task_cache, self._department_cache, self._status_cache = {}, {}, {}, {}
+        self._statuses = {normalize_text(status): status for status in RECORD_STATUSES}
+        self._tasks = {normalize_text(task): task for task in main_tasks}
+        self._departments = {normalize_text(name): name for name in departments}
+        self.unknown_tasks = set()
+
+    def normalize_date(self, value):
+        if isinstance(value, datetime):
+            return value.date().isoformat()
+        if isinstance(value, date):
+            return value.isoformat()
+        text = str(value or "").strip()
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt).date().isoformat()
+            except ValueError:
+                continue
+        raise ValueError(f"Ngày không hợp lệ: {text!r}")
+
+    @staticmethod
+    def _clean(value):
+        return _WHITESPACE.sub(' ', str(value)).strip() if value is not None else ""
+
+    def normalize_status(self, value):
+        text = self._clean(value)
+        if not text:
+            return DEFAULT_IMPORT_STATUS
+        status = self._statuses.get(normalize_text(text))
+        if status is None:
+            raise ValueError(f"Trạng thái không hợp lệ: {text!r}")
+        return status
+
+    def normalize_task(self, value):
+        text = self._clean(value)
+        if not text:
+            raise ValueError("Thiếu công việc chính")
+        key = normalize_text(text)
+        task = self._tasks.get(key)
+        if task is None:
+            # Công việc cũ không còn trong cấu hình vẫn được nhập nguyên văn
+            self.unknown_tasks.add(text)
+            task = self._tasks[key] = text
+        return task
+
+    def normalize_department(self, value):
+        text = self._clean(value)
+        if not text:
+            return ""
+        return self._departments.setdefault(normalize_text(text), text)
+
+    def _memoized(self, cache, normalize, value):
+        try:
+            return cache[value]
+        except KeyError:
+            result = cache[value] = normalize(value)
+            return result
+        except TypeError:  # giá trị không băm được
+            return normalize(value)
+
+    def normalize(self, work_date, task, department, details, status):
+        details = "" if details is None else str(details).strip()
+        work_date = self._memoized(self._date_cache, self.normalize_date, work_date)
+        status = self._memoized(self._status_cache, self.normalize_status, status)
+        # Công việc chuẩn hóa sau cùng để dòng bị loại không được tính vào unknown_tasks
+        return (work_date, self._memoized(self._task_cache, self.normalize_task, task),
+                self._memoized(self._department_cache, self.normalize_department, department),
+                details[:DETAILS_MAX_LENGTH], status)
+
+
+@timed("import.records")
+def import_records(db_manager, filename, main_tasks, progress_callback=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Nhập nhật ký từ file .csv/.xlsx vào database, không cần giao diện.
+
+    Dòng tiêu đề được tìm trong HEADER_SCAN_ROWS dòng đầu (nhận cả file Excel do
+    ứng dụng xuất ra); nếu không có, các cột được hiểu theo thứ tự REPORT_HEADERS.
+    Các dòng hợp lệ được chèn bằng executemany theo lô batch_size dòng, mỗi lô một
+    giao dịch qua hàng đợi ghi, trong khi lô tiếp theo đang được đọc.
+    progress_callback(rows_read, rows_imported) được gọi sau mỗi lô.
+    Trả về dict: imported, skipped, errors [(dòng, lỗi), ...], unknown_tasks.
+    """
+    normalizer = RecordNormalizer(main_tasks, db_manager.departments.names())
+    rows = iter_source_rows(filename)
+    columns = None
+    pending_rows = []
+    line = 0
+    for line, row in enumerate(rows, start=1):
+        pending_rows.append((line, row))
+        columns = _match_header(row)
+        if columns or line >= HEADER_SCAN_ROWS:
+            break
+    if columns:
+        pending_rows = []
+    else:
+        columns = {field: index for index, field in enumerate(IMPORT_COLUMNS)}
+    indexes = [columns.get(field) for field in IMPORT_COLUMNS]
+    start_line = pending_rows[0][0] if pending_rows else line + 1
+
+    result = {"imported": 0, "skipped": 0, "errors": [], "unknown_tasks": []}
+    in_flight = []
+    batch = []
+    rows_read = 0
+
+    def wait_for(future):
+        result["imported"] += future.result()
+
+    def flush_batch():
+        # Chèn theo (ngày, công việc): các chỉ mục theo ngày/công việc được ghi gần như tuần tự
+        batch.sort(key=itemgetter(0, 1))
+        in_flight.append(db_manager.submit_insert_records(batch))
+        while len(in_flight) > IMPORT_MAX_PENDING_BATCHES:
+            wait_for(in_flight.pop(0))
+        if progress_callback:
+            progress_callback(rows_read, result["imported"])
+
+    source = (row for _, row in pending_rows)
+    try:
+        for line, row in enumerate(chain(source, rows), start=start_line):
+            rows_read += 1
+            if not any(value not in (None, "") for value in row):
+                continue
+            values = [row[i] if i is not None and i < len(row) else None for i in indexes]
+            try:
+                batch.append(normalizer.normalize(*values))
+            except ValueError as e:
+                result["skipped"] += 1
+                if len(result["errors"]) < IMPORT_MAX_ERRORS:
+                    result["errors"].append((line, str(e)))
+                continue
+            if len(batch) >= batch_size:
+                flush_batch()
+                batch = []
+        if batch:
+            flush_batch()
+    finally:
+        for future in in_flight:
+            wait_for(future)
+
+    if progress_callback:
+        progress_callback(rows_read, result["imported"])
+    result["unknown_tasks"] = sorted(normalizer.unknown_tasks)
+    logging.getLogger(__name__).info(
+        f"Imported {result['imported']} records from {filename} ({result['skipped']} skipped).")
+    return result
@@ -0,0 +1,219 @@
+"""
+Đo độ trễ các đường nóng (truy vấn database, xuất file, sao lưu, callback Tk).
+
+Mỗi tên thao tác có một histogram độ trễ chia bucket theo thang log (sai số ~9%),
+nên ghi một mẫu chỉ tốn một phép log và một lần khóa, bộ nhớ không tăng theo số mẫu.
+Các lần chạy chậm hơn SLOW_THRESHOLD_MS được giữ lại (tối đa SLOW_SAMPLE_LIMIT mẫu
+gần nhất) kèm tham số để xem trong hộp thoại chẩn đoán hoặc file JSON gửi kèm báo lỗi.
+
+    @timed("export.excel")
+    def export_excel(...): ...
+
+    with timed("backup.snapshot"):
+        ...
+
+    @instrument_methods("db")
+    class DatabaseManager: ...
+
+Module này không import tkinter để dùng được cả từ dòng lệnh.
+"""
+import functools
+import json
+import math
+import threading
+import time
+import types
+from collections import deque
+from datetime import datetime
+
+SLOW_THRESHOLD_MS = 100
+SLOW_SAMPLE_LIMIT = 50
+PERCENTILES = (50, 95, 99)
+# Bucket thứ i chứa các mẫu trong [2^(i/8), 2^((i+1)/8)) micro giây
+_BUCKETS_PER_DOUBLING = 8
+_DETAIL_MAX_LENGTH = 200
+# Giống inspect.CO_GENERATOR; không import inspect để khởi động nhanh hơn (~8 ms)
+_CO_GENERATOR = 0x20
+
+
+class LatencyHistogram:
+    """Histogram độ trễ (giây) với bucket theo thang log; percentile trả về theo ms."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        micros = seconds * 1e6
+        index = int(math.log2(micros) * _BUCKETS_PER_DOUBLING) if micros > 1 else 0
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        if rank >= self.count:
+            return self.max * 1000
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                # Điểm giữa (theo thang log) của bucket, không vượt quá giá trị lớn nhất đã gặp
+                micros = 2 ** ((index + 0.5) / _BUCKETS_PER_DOUBLING)
+                return min(micros / 1000, self.max * 1000)
+        return self.max * 1000
+
+    def summary(self):
+        result = {"count": self.count, "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0}
+        for p in PERCENTILES:
+            result[f"p{p}_ms"] = round(self.percentile(p), 3)
+        result["max_ms"] = round(self.max * 1000, 3)
+        result["total_ms"] = round(self.total * 1000, 3)
+        return result
+
+
+class MetricsRegistry:
+    """Tập histogram theo tên thao tác và các mẫu chậm gần nhất (an toàn giữa các luồng)."""
+
+    def __init__(self, slow_threshold_ms=SLOW_THRESHOLD_MS, slow_sample_limit=SLOW_SAMPLE_LIMIT):
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._slow_samples = deque(maxlen=slow_sample_limit)
+        self._started_at = datetime.now()
+
+    def record(self, name, seconds, detail=None):
+        """Ghi một mẫu; detail (chuỗi hoặc hàm trả về chuỗi) chỉ được dùng khi mẫu chậm."""
+        if not self.enabled:
+            return
+        slow = seconds >= self.slow_threshold
+        if slow and callable(detail):
+            detail = detail()
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.add(seconds)
+            if slow:
+                self._slow_samples.append({
+                    "name": name,
+                    "duration_ms": round(seconds * 1000, 3),
+                    "at": datetime.now().isoformat(timespec="milliseconds"),
+                    "thread": threading.current_thread().name,
+                    "detail": (detail or "")[:_DETAIL_MAX_LENGTH],
+                })
+
+    def summary(self):
+        """{tên: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, total_ms}} theo tên."""
+        with self._lock:
+            return {name: self._histograms[name].summary() for name in sorted(self._histograms)}
+
+    def slow_samples(self):
+        """Các mẫu chậm, mới nhất trước."""
+        with self._lock:
+            return list(reversed(self._slow_samples))
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._slow_samples.clear()
+            self._started_at = datetime.now()
+
+    def snapshot(self):
+        import platform
+
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "since": self._started_at.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "metrics": self.summary(),
+            "slow_samples": self.slow_samples(),
+        }
+
+    def dump_json(self, filename):
+        """Ghi toàn bộ số liệu ra file JSON (để đính kèm báo lỗi). Trả về filename."""
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+        return filename
+
+
+METRICS = MetricsRegistry()
+
+
+class timed:
+    """Decorator hoặc context manager ghi thời gian chạy vào METRICS dưới tên name."""
+
+    def __init__(self, name, registry=None):
+        self.name = name
+        self.registry = registry or METRICS
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.record(self.name, time.perf_counter() - self._started)
+        return False
+
+    def __call__(self, func):
+        return _wrap(func, self.name, self.registry)
+
+
+def _describe_call(args, kwargs):
+    # Bỏ qua đối tượng không có repr riêng (db_manager, callback...), chỉ giữ tham số có nghĩa
+    parts = [repr(arg) for arg in args if type(arg).__repr__ is not object.__repr__]
+    parts += [f"{key}={value!r}" for key, value in kwargs.items()
+              if value is not None and type(value).__repr__ is not object.__repr__]
+    return ", ".join(parts)
+
+
+def _wrap(func, name, registry, skip_self=False):
+    if func.__code__.co_flags & _CO_GENERATOR:
+        # Hàm sinh (ví dụ phân trang): đo từng bước next(), mỗi bước là một lần truy vấn
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            detail = lambda: _describe_call(args[1:] if skip_self else args, kwargs)
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    registry.record(name, time.perf_counter() - started, detail)
+                    return
+                registry.record(name, time.perf_counter() - started, detail)
+                yield item
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            registry.record(name, time.perf_counter() - started,
+                            lambda: _describe_call(args[1:] if skip_self else args, kwargs))
+    return wrapper
+
+
+def instrument_methods(prefix, registry=None):
+    """
+    Class decorator: đo mọi phương thức công khai (không bắt đầu bằng '_') của lớp
+    dưới tên "prefix.tên_phương_thức". Property, staticmethod và classmethod được giữ nguyên.
+    """
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or not isinstance(value, types.FunctionType):
+                continue
+            setattr(cls, attr, _wrap(value, f"{prefix}.{attr}", registry or METRICS, skip_self=True))
+        return cls
+    return decorate
@@ -0,0 +1,151 @@
+"""
+Ghi log bất đồng bộ: logger chỉ đưa bản ghi vào hàng đợi (QueueHandler), một luồng
+nền (QueueListener) mới định dạng và ghi ra file/console. Luồng Tk không bao giờ phải
+chờ ghi đĩa dù log nhiều đến đâu.
+
+File log xoay vòng theo dung lượng (RotatingFileHandler), mỗi dòng là một đối tượng JSON
+(JSON lines) để dễ lọc bằng jq hoặc gửi kèm báo lỗi. Mức log theo module cấu hình trong
+config.json, mục "logging":
+
+    "logging": {
+        "level": "INFO",
+        "console_level": "INFO",
+        "file": "logs/app.log",
+        "max_bytes": 2097152,
+        "backup_count": 5,
+        "format": "json",
+        "levels": {"src.database": "DEBUG", "PIL": "WARNING"}
+    }
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime
+
+DEFAULT_LOGGING_CONFIG = {
+    "level": "INFO",
+    "console_level": "INFO",
+    "file": os.path.join("logs", "app.log"),
+    "max_bytes": 2 * 1024 * 1024,
+    "backup_count": 5,
+    "format": "json",
+    "levels": {},
+}
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Giới hạn hàng đợi để bộ nhớ không tăng mãi nếu ổ đĩa bị treo; quá giới hạn thì bỏ bản ghi
+LOG_QUEUE_SIZE = 10000
+
+_listener = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Mỗi bản ghi là một dòng JSON: ts, level, logger, thread, msg và exc (nếu có)."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler mặc định gộp traceback vào msg; ở đây traceback được giữ riêng trong
+    exc_text để file JSON có trường "exc" và console vẫn in như cũ. Hàng đợi đầy thì
+    bỏ bản ghi thay vì chặn luồng gọi.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def _level(name, default=logging.INFO):
+    level = logging.getLevelName(str(name).upper())
+    return level if isinstance(level, int) else default
+
+
+def setup_logging(config=None):
+    """
+    Cài đặt pipeline log cho ứng dụng giao diện. config là mục "logging" trong config.json
+    (thiếu khóa nào thì dùng DEFAULT_LOGGING_CONFIG). Gọi lại sẽ thay cấu hình cũ.
+    Luồng ghi log được dừng (và xả hết hàng đợi) khi thoát chương trình.
+    """
+    global _listener
+    settings = {**DEFAULT_LOGGING_CONFIG, **(config or {})}
+    stop_logging()
+
+    handlers = []
+    log_file = settings["file"]
+    if log_file:
+        if os.path.dirname(log_file):
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=settings["max_bytes"], backupCount=settings["backup_count"],
+            encoding='utf-8', delay=True)
+        file_handler.setFormatter(JsonLinesFormatter() if settings["format"] == "json"
+                                  else logging.Formatter(TEXT_FORMAT))
+        handlers.append(file_handler)
+
+    # sys.stdout là None khi đóng gói không có console (pythonw, PyInstaller --noconsole)
+    if sys.stdout is not None:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        console_handler.setLevel(_level(settings["console_level"]))
+        handlers.append(console_handler)
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(_QueueHandler(log_queue))
+    # Mức của root quyết định bản ghi nào được tạo ra; DEBUG chỉ bật khi cấu hình yêu cầu
+    root.setLevel(_level(settings["level"]))
+    for name, level in settings["levels"].items():
+        logging.getLogger(name).setLevel(_level(level))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Xả hàng đợi, dừng luồng ghi log và đóng file."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,129 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+
+from src.utils.instrumentation import METRICS
+
+
+class QueryExecutor:
+    """
+    Chạy các truy vấn đọc database trên một luồng nền để không chặn vòng lặp Tk.
+
+    Mỗi yêu cầu được gửi kèm một khóa (key); yêu cầu mới cùng khóa sẽ thay thế
+    yêu cầu cũ: yêu cầu cũ chưa chạy sẽ bị bỏ qua, đang chạy thì kết quả bị hủy.
+    Kết quả được đưa về luồng Tk qua hàng đợi và được đọc bằng root.after().
+    """
+    POLL_INTERVAL_MS = 30
+
+    def __init__(self, root):
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._latest = {}  # key -> id của yêu cầu mới nhất
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending = 0
+        self._poll_id = None
+        self._worker = threading.Thread(target=self._run, name="QueryExecutor", daemon=True)
+        self._worker.start()
+
+    def submit(self, key, func, *args, on_done=None, on_error=None, **kwargs):
+        """
+        Gửi func(*args, **kwargs) sang luồng nền. on_done(result) hoặc on_error(exc)
+        được gọi trên luồng Tk nếu yêu cầu chưa bị thay thế. Trả về id của yêu cầu.
+        """
+        request_id = next(self._ids)
+        with self._lock:
+            self._latest[key] = request_id
+        self._requests.put((key, request_id, func, args, kwargs, on_done, on_error))
+        self._pending += 1
+        self._schedule_poll()
+        return request_id
+
+    def watch(self, key, future, on_done=None, on_error=None):
+        """
+        Chờ một concurrent.futures.Future (ví dụ thao tác trong hàng đợi ghi) và gọi
+        on_done(result) hoặc on_error(exc) trên luồng Tk khi nó hoàn tất.
+        """
+        request_id = next(self._ids)
+        with self._lock:
+            self._latest[key] = request_id
+        self._pending += 1
+
+        def deliver(done):
+            error = done.exception()
+            result = done.result() if error is None else None
+            self._results.put((key, request_id, result, error, on_done, on_error))
+        future.add_done_callback(deliver)
+        self._schedule_poll()
+        return request_id
+
+    def cancel(self, key):
+        """Hủy yêu cầu đang chờ hoặc đang chạy của khóa key (kết quả sẽ bị bỏ qua)."""
+        with self._lock:
+            self._latest.pop(key, None)
+
+    def is_current(self, key, request_id):
+        with self._lock:
+            return self._latest.get(key) == request_id
+
+    def shutdown(self):
+        """Dừng luồng nền; các yêu cầu còn lại bị bỏ qua."""
+        with self._lock:
+            self._latest.clear()
+        self._requests.put(None)
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+        self._worker.join(timeout=2)
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            key, request_id, func, args, kwargs, on_done, on_error = request
+            if not self.is_current(key, request_id):
+                self._results.put((key, request_id, None, None, None, None))
+                continue
+            try:
+                result, error = func(*args, **kwargs), None
+            except Exception as e:
+                self.logger.error(f"Background query '{key}' failed: {e}", exc_info=True)
+                result, error = None, e
+            self._results.put((key, request_id, result, error, on_done, on_error))
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                key, request_id, result, error, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            with self._lock:
+                if self._latest.get(key) != request_id:
+                    continue  # đã bị thay thế hoặc hủy
+                del self._latest[key]
+            callback, value = (on_error, error) if error is not None else (on_done, result)
+            if callback:
+                started = time.perf_counter()
+                try:
+                    callback(value)
+                except Exception as e:
+                    self.logger.error(f"Callback for background query '{key}' failed: {e}", exc_info=True)
+                # Callback chạy trên luồng Tk: thời gian này là lúc giao diện bị đứng
+                METRICS.record(f"tk.callback.{key[0] if isinstance(key, tuple) else key}",
+                               time.perf_counter() - started)
+        if self._pending > 0:
+            self._schedule_poll()
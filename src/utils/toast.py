@@ -27,7 +27,7 @@ class Toast:
 
         self._fade_in()
         self.root.after(duration_ms, self._fade_out)
-        self.logger.info(f"Toast displayed: '{message}' with color {color}")
+        self.logger.debug("Toast displayed: '%s' with color %s", message, color)
 
     def _fade_in(self):
         alpha = self.toast_window.attributes('-alpha')
@@ -1,4 +1,3 @@
-import requests
 import logging
 import subprocess
 import os
@@ -26,6 +25,8 @@ class AutoUpdater:
 
     def _download_and_prompt_install(self, download_url, version_tag):
         """Tải xuống file .exe mới và nhắc người dùng chạy nó."""
+        import requests
+
         try:
             self.logger.info(f"Attempting to download update from: {download_url}")
             response = requests.get(download_url, stream=True, timeout=30)
@@ -75,6 +76,9 @@ class AutoUpdater:
                 messagebox.showinfo("Kiểm tra cập nhật", "URL kiểm tra cập nhật chưa được cấu hình.")
             return
 
+        # requests chỉ được nạp khi thực sự kiểm tra cập nhật (chạy trên luồng nền)
+        import requests
+
         self.logger.info(f"Checking for updates from: {self.update_repo_url}")
         try:
             response = requests.get(self.update_repo_url, timeout=5)
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Chạy được cả bằng `pytest` lẫn `python -m pytest` từ thư mục gốc
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.database.db_manager import DatabaseManager  # noqa: E402
+
+# Bảng work_diary do phiên bản cũ tạo (trước migration 002): mọi cột trừ id đều cho phép NULL
+LEGACY_WORK_DIARY_SCHEMA = '''
+    CREATE TABLE work_diary (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, work_date TEXT, task_description TEXT,
+        department TEXT, details TEXT, status TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+'''
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """DatabaseManager trên database mới (đã áp dụng mọi migration), đóng khi test kết thúc."""
+    db_manager = DatabaseManager(str(tmp_path / "work_diary.db"))
+    yield db_manager
+    db_manager.close()
+
+
+@pytest.fixture
+def legacy_database(tmp_path):
+    """
+    Tạo database kiểu cũ chưa qua migration nào: legacy_database(rows) trả về đường dẫn file.
+    rows là các dict cột -> giá trị của work_diary.
+    """
+    def create(rows):
+        path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE schema_version (version INTEGER PRIMARY KEY)")
+        conn.execute("INSERT INTO schema_version VALUES (0)")
+        conn.execute(LEGACY_WORK_DIARY_SCHEMA)
+        for row in rows:
+            conn.execute(f"INSERT INTO work_diary ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                         tuple(row.values()))
+        conn.commit()
+        conn.close()
+        return path
+    return create
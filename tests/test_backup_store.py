@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from src.utils.backup_store import BackupStore
+
+
+def make_database(path, rows):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS notes (id INTEGER PRIMARY KEY, body TEXT)")
+        conn.executemany("INSERT INTO notes (body) VALUES (?)", ((f"ghi chú {i} " * 20,) for i in range(rows)))
+    conn.close()
+
+
+def read_notes(path):
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        rows = conn.execute("SELECT id, body FROM notes ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_snapshot_restore_round_trip(tmp_path, compress):
+    db_path = str(tmp_path / "source.db")
+    make_database(db_path, 2000)
+    store = BackupStore(str(tmp_path / "backups"), compress=compress)
+
+    first = store.create_snapshot(db_path, label="first")
+    before = read_notes(db_path)
+    make_database(db_path, 50)
+    second = store.create_snapshot(db_path, label="second")
+    after = read_notes(db_path)
+
+    assert read_notes(store.restore_snapshot(first, str(tmp_path / "first.db"))) == before
+    assert read_notes(store.restore_snapshot(second, str(tmp_path / "second.db"))) == after
+    assert not os.path.exists(str(tmp_path / "second.db.part"))
+
+
+def test_second_snapshot_stores_only_changed_pages(tmp_path):
+    db_path = str(tmp_path / "source.db")
+    make_database(db_path, 2000)
+    store = BackupStore(str(tmp_path / "backups"))
+    progress = []
+
+    first = store.create_snapshot(db_path, progress_callback=lambda done, total: progress.append((done, total)))
+    make_database(db_path, 10)
+    second = store.create_snapshot(db_path)
+    unchanged = store.create_snapshot(db_path)
+
+    snapshots = {row[0]: row for row in store.list_snapshots()}
+    assert [row[0] for row in store.list_snapshots()] == [unchanged, second, first]
+    assert 0 < snapshots[second][4] < snapshots[first][4] / 4
+    assert snapshots[unchanged][4] == 0
+    assert progress[-1][0] == progress[-1][1]
+
+
+def test_restore_unknown_snapshot(tmp_path):
+    store = BackupStore(str(tmp_path / "backups"))
+    with pytest.raises(KeyError):
+        store.restore_snapshot(42, str(tmp_path / "missing.db"))
+
+
+def dump(path):
+    with sqlite3.connect(path) as conn:
+        lines = list(conn.iterdump())
+    conn.close()
+    return lines
+
+
+def test_prune_removes_unreferenced_packs(tmp_path):
+    backups = tmp_path / "backups"
+    store = BackupStore(str(backups))
+    ids, dumps = [], []
+    for generation in range(4):
+        # Mỗi lần là một database khác, chỉ trùng trang thứ 2 (được lưu trong pack đầu tiên)
+        db_path = str(tmp_path / f"source_{generation}.db")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(f"CREATE TABLE notes_{generation} (body TEXT)")
+            conn.executemany(f"INSERT INTO notes_{generation} VALUES (?)",
+                             ((f"thế hệ {generation} dòng {i} " * 10,) for i in range(300)))
+        conn.close()
+        ids.append(store.create_snapshot(db_path))
+        dumps.append(dump(db_path))
+    assert len(os.listdir(backups / "packs")) == 4
+
+    assert store.prune(keep_last=2) == 2
+    assert store.prune(keep_last=2) == 0
+    assert [row[0] for row in store.list_snapshots()] == ids[:1:-1]
+    # Pack của snapshot thứ 2 không còn được tham chiếu; pack đầu tiên còn giữ trang dùng chung
+    assert len(os.listdir(backups / "packs")) == 3
+    for snapshot_id, expected in zip(ids[2:], dumps[2:]):
+        assert dump(store.restore_snapshot(snapshot_id, str(tmp_path / f"restored_{snapshot_id}.db"))) == expected
+
+
+def test_database_manager_restore_snapshot(tmp_path, db_manager):
+    backup_dir = str(tmp_path / "backups")
+    changes = []
+    db_manager.add_change_listener(lambda version, kinds: changes.append(kinds))
+    db_manager.add_record("2026-01-05", "Sửa máy in", "Khoa Nội", "thay hộp mực", "Hoàn thành")
+    snapshot_id = db_manager.backup_database(backup_dir)
+    db_manager.add_record("2026-01-06", "Lắp camera", "Phòng IT", "camera cổng", "Đang thực hiện")
+    assert db_manager.get_total_records() == 2
+
+    progress = []
+    ok, error = db_manager.restore_snapshot(
+        snapshot_id, backup_dir, progress_callback=lambda done, total: progress.append(done / total))
+
+    assert (ok, error) == (True, None)
+    assert changes[-1] == {"restore"}
+    assert progress and progress[-1] == pytest.approx(1.0)
+    assert db_manager.get_total_records() == 1
+    assert [row[2] for row in db_manager.search("máy in")] == ["Sửa máy in"]
+    assert db_manager.search("camera") == []
+    assert db_manager.get_summary("2026-01-01", "2026-01-31") == [("Sửa máy in", 1)]
+    # Snapshot an toàn trước khi phục hồi giữ lại dữ liệu vừa bị thay thế
+    assert len(db_manager.list_backups(backup_dir)) == 2
+
+def test_concurrent_snapshots_and_prune_keep_store_consistent(tmp_path):
+    store_dir = str(tmp_path / "backups")
+    BackupStore(store_dir)
+    errors, done = [], threading.Event()
+
+    def snapshots(worker):
+        # Mỗi luồng một BackupStore riêng, như giao diện, CLI và sao lưu định kỳ cùng dùng một kho
+        store, db_path = BackupStore(store_dir), str(tmp_path / f"source_{worker}.db")
+        for generation in range(12):
+            make_database(db_path, 100 * (generation % 3 + 1))
+            try:
+                snapshot_id = store.create_snapshot(db_path)
+                read_notes(store.restore_snapshot(snapshot_id, str(tmp_path / f"check_{worker}.db")))
+            except KeyError:
+                pass  # đã bị prune ngay sau khi tạo
+            except Exception as e:
+                errors.append(e)
+
+    def pruner():
+        store = BackupStore(store_dir)
+        while not done.is_set():
+            try:
+                store.prune(keep_last=2)
+            except Exception as e:
+                errors.append(e)
+
+    workers = [threading.Thread(target=snapshots, args=(worker,)) for worker in range(3)]
+    prune_thread = threading.Thread(target=pruner)
+    for thread in workers + [prune_thread]:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    done.set()
+    prune_thread.join()
+
+    assert errors == []
+    store = BackupStore(store_dir)
+    for snapshot_id, *_ in store.list_snapshots():
+        read_notes(store.restore_snapshot(snapshot_id, str(tmp_path / f"final_{snapshot_id}.db")))
@@ -0,0 +1,60 @@
+import sqlite3
+import threading
+import time
+
+
+def test_reads_do_not_wait_for_running_write(db_manager):
+    db_manager.add_record("2026-01-01", "Sửa máy in", "Khoa Nội", "kẹt giấy", "Hoàn thành")
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_write(cursor):
+        cursor.execute("INSERT INTO work_diary (work_date, task_description, department, details, status) "
+                       "VALUES ('2026-01-02', 'Lắp camera', '', '', 'Hoàn thành')")
+        started.set()
+        release.wait(5)
+        return None, None
+
+    pending = db_manager.write_queue.submit(slow_write, urgent=True)
+    assert started.wait(5)
+    try:
+        start = time.perf_counter()
+        assert db_manager.poll_changes() == db_manager.data_version
+        assert len(db_manager.get_record_store("2026-01-01", "2026-01-31")) == 1
+        # Chưa có số đếm trong bộ nhớ: COUNT(*) chạy trên kết nối đọc, chỉ thấy dữ liệu đã commit
+        assert db_manager.get_total_records() == 1
+        assert time.perf_counter() - start < 1
+    finally:
+        release.set()
+    pending.result(5)
+    assert db_manager.get_total_records() == 2
+
+
+def test_external_change_invalidates_cached_store(db_manager):
+    db_manager.add_record("2026-01-01", "Sửa máy in", "Khoa Nội", "kẹt giấy", "Hoàn thành")
+    changes = []
+    db_manager.add_change_listener(lambda version, kinds: changes.append(kinds))
+    store = db_manager.get_record_store("2026-01-01", "2026-01-31")
+    assert db_manager.get_record_store("2026-01-01", "2026-01-31") is store
+
+    # Ghi từ một tiến trình/kết nối khác
+    other = sqlite3.connect(db_manager.db_path)
+    with other:
+        other.execute("INSERT INTO work_diary (work_date, task_description, department, details, status) "
+                      "VALUES ('2026-01-03', 'Lắp camera', '', '', 'Hoàn thành')")
+    other.close()
+
+    refreshed = db_manager.get_record_store("2026-01-01", "2026-01-31")
+    assert len(refreshed) == 2
+    assert changes == [{"external"}]
+    assert db_manager.get_total_records() == 2
+
+
+def test_own_writes_are_not_reported_as_external(db_manager):
+    changes = []
+    db_manager.add_change_listener(lambda version, kinds: changes.append(kinds))
+    db_manager.add_record("2026-01-01", "Sửa máy in", "Khoa Nội", "kẹt giấy", "Hoàn thành")
+    db_manager.poll_changes()
+
+    assert changes == [{"insert"}]
+    assert db_manager.get_total_records() == 1
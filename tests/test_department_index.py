@@ -0,0 +1,38 @@
+from src.database.department_index import DepartmentIndex, normalize_text
+
+
+def test_normalize_text_strips_vietnamese_diacritics():
+    assert normalize_text("  Phòng Điều Dưỡng ") == "phong dieu duong"
+    assert normalize_text(None) == ""
+
+
+def test_suggest_is_accent_insensitive_and_prefers_prefix():
+    index = DepartmentIndex()
+    index.load([("Khoa Nội", 5, "2026-01-01"), ("Nội trú", 1, "2026-01-02"), ("Khoa Ngoại", 9, "2026-01-03")])
+
+    assert index.suggest("noi") == ["Nội trú", "Khoa Nội"]
+    assert index.suggest("khoa") == ["Khoa Ngoại", "Khoa Nội"]
+    assert index.suggest("") == []
+    assert index.suggest("khoa", limit=1) == ["Khoa Ngoại"]
+
+
+def test_ties_are_ranked_by_last_use():
+    index = DepartmentIndex()
+    index.load([("Khoa A", 2, "2026-01-01"), ("Khoa B", 2, "2026-03-01")])
+    assert index.suggest("khoa") == ["Khoa B", "Khoa A"]
+
+
+def test_add_and_remove_keep_counts():
+    index = DepartmentIndex()
+    index.load([("Khoa Nội", 1, "2026-01-01"), ("", 3, None)])
+    index.add("Khoa Ngoại", "2026-02-01", count=2)
+    index.add("Khoa Nội", "2026-03-01", count=2)
+
+    assert index.suggest("khoa") == ["Khoa Nội", "Khoa Ngoại"]
+    index.remove("Khoa Nội")
+    index.remove("Khoa Nội")
+    assert index.suggest("khoa") == ["Khoa Ngoại", "Khoa Nội"]
+    index.remove("Khoa Nội")
+    assert sorted(index.names()) == ["Khoa Ngoại"]
+    assert len(index) == 1
+    index.remove("Không có")
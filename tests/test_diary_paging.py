@@ -0,0 +1,96 @@
+import pytest
+
+from src.ui.components.diary_tab import DiaryTab
+
+PAGE_SIZE = 5
+
+
+@pytest.fixture(autouse=True)
+def records(db_manager):
+    db_manager.submit_insert_records([(f"2026-01-{i + 1:02d}", f"Công việc {i}", "Khoa Nội", "", "Hoàn thành")
+                                      for i in range(20)]).result()
+
+
+class ListState:
+    """Trạng thái danh sách của DiaryTab (dòng hiển thị, khóa, con trỏ) không cần Tk."""
+
+    def __init__(self, db_manager, sort, descending):
+        self.db_manager, self.sort, self.descending = db_manager, sort, descending
+        self.loaded, self.cursor = {}, None
+        self.refresh()
+
+    def next_page(self):
+        rows, keys = self.db_manager.get_records_page(PAGE_SIZE, self.cursor, self.sort, self.descending)
+        self.cursor = keys[-1] if len(rows) == PAGE_SIZE else None
+        self.loaded.update((str(row[0]), (row, key)) for row, key in zip(rows, keys))
+
+    def refresh(self, stale=frozenset()):
+        page = self.db_manager.get_records_page(PAGE_SIZE, None, self.sort, self.descending)
+        saved = self.db_manager.get_records_by_ids([int(iid) for iid in stale], self.sort)
+        self.loaded, self.cursor = DiaryTab._merge_first_page(
+            list(self.loaded), self.loaded, page, saved, stale, self.cursor, self.descending, PAGE_SIZE)
+
+    def ids(self):
+        return [row[0] for row, _ in self.loaded.values()]
+
+    def expected_ids(self):
+        """Toàn bộ các dòng tới con trỏ hiện tại, truy vấn lại từ đầu."""
+        ids = []
+        for page in self.db_manager.iter_records_page(PAGE_SIZE, sort=self.sort, descending=self.descending):
+            for row in page:
+                ids.append(row[0])
+                if self.cursor is not None and row[0] == self.loaded[list(self.loaded)[-1]][0][0]:
+                    return ids
+        return ids
+
+
+@pytest.mark.parametrize("sort", ["date", "task"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_refresh_requeries_first_page_and_keeps_loaded_pages(db_manager, sort, descending):
+    state = ListState(db_manager, sort, descending)
+    state.next_page()
+    state.next_page()
+    assert len(state.ids()) == 15
+
+    # Đứng đầu danh sách theo cả ngày lẫn công việc
+    new_id = db_manager.add_record("2026-02-01" if descending else "2025-12-01",
+                                   "Việc mới" if descending else "An toàn mạng", "", "", "Hoàn thành")
+    first_id = state.ids()[0]
+    db_manager.delete_record(first_id)
+    state.refresh()
+
+    assert state.ids()[0] == new_id
+    assert first_id not in state.ids()
+    assert state.ids() == state.expected_ids()
+    # Con trỏ cũ được giữ: trang kế tiếp không nạp trùng cũng không bỏ sót
+    state.next_page()
+    assert state.ids() == state.expected_ids()
+    while state.cursor is not None:
+        state.next_page()
+    assert sorted(state.ids()) == sorted(row[0] for page in db_manager.iter_records_page(100) for row in page)
+
+
+def test_saved_deep_rows_are_placed_within_loaded_pages(db_manager):
+    state = ListState(db_manager, "date", True)
+    state.next_page()
+    deep_id = state.ids()[8]
+    db_manager.update_record(deep_id, "2026-01-15", "Đã sửa", "", "", "Hoàn thành")
+    old_date_id = db_manager.add_record("2026-01-12", "Bổ sung ngày cũ", "", "", "Hoàn thành")
+    beyond_id = db_manager.add_record("2025-06-01", "Ngoài vùng đã nạp", "", "", "Hoàn thành")
+    state.refresh(frozenset(str(i) for i in (deep_id, old_date_id, beyond_id)))
+
+    assert state.ids() == state.expected_ids()
+    assert state.loaded[str(deep_id)][0][2] == "Đã sửa"
+    assert beyond_id not in state.ids()
+
+
+def test_short_first_page_replaces_everything(db_manager):
+    state = ListState(db_manager, "id", True)
+    while state.cursor is not None:
+        state.next_page()
+    for record_id in state.ids()[:16]:
+        db_manager.delete_record(record_id)
+    state.refresh()
+
+    assert state.cursor is None
+    assert state.ids() == [4, 3, 2, 1]
@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+
+from src.database.db_manager import BULK_INSERT_MIN_ROWS, MIGRATION_DIR, DatabaseManager
+
+STATS_FROM_RECORDS = '''
+    SELECT work_date, task_description, COALESCE(status, ''), COALESCE(department, ''), COUNT(*)
+    FROM work_diary GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+'''
+STATS_TABLE = 'SELECT * FROM work_diary_daily_stats ORDER BY 1, 2, 3, 4'
+
+
+def check_derived_tables(db_path):
+    """Bảng tổng hợp và chỉ mục FTS phải khớp với work_diary."""
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute(STATS_TABLE).fetchall() == conn.execute(STATS_FROM_RECORDS).fetchall()
+        conn.execute("INSERT INTO work_diary_fts(work_diary_fts, rank) VALUES ('integrity-check', 1)")
+    finally:
+        conn.close()
+
+
+def test_upgrade_from_version_2_keeps_records(tmp_path):
+    db_path = str(tmp_path / "work_diary.db")
+    conn = sqlite3.connect(db_path)
+    for version, name in ((1, "001_create_diary_table.sql"), (2, "002_create_work_diary_table.sql")):
+        with open(f"{MIGRATION_DIR}/{name}", encoding="utf-8") as f:
+            conn.executescript(f.read())
+    conn.execute("CREATE TABLE schema_version (version INTEGER PRIMARY KEY)")
+    conn.executemany("INSERT INTO schema_version VALUES (?)", ((1,), (2,)))
+    conn.executemany(
+        "INSERT INTO work_diary (work_date, task_description, department, details, status) VALUES (?, ?, ?, ?, ?)",
+        [("2025-12-01", "Sửa máy in", None, "kẹt giấy", "Hoàn thành"),
+         ("2025-12-01", "Sửa máy in", "Khoa Nội", "thay mực", "Hoàn thành"),
+         ("2025-12-02", "Lắp camera", None, "cổng chính", "Đang thực hiện")])
+    conn.commit()
+    conn.close()
+
+    db_manager = DatabaseManager(db_path)
+    try:
+        assert db_manager.conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] == 6
+        # 005: Phòng/Khoa trống lưu là ''
+        assert db_manager.conn.execute("SELECT COUNT(*) FROM work_diary WHERE department IS NULL").fetchone()[0] == 0
+        assert [row[2] for row in db_manager.search("may in")] == ["Sửa máy in", "Sửa máy in"]
+        assert db_manager.get_summary("2025-12-01", "2025-12-31") == [("Sửa máy in", 2), ("Lắp camera", 1)]
+        db_manager.explain_public_queries()
+    finally:
+        db_manager.close()
+    check_derived_tables(db_path)
+
+    # Mở lại không áp dụng lại migration nào
+    DatabaseManager(db_path).close()
+    check_derived_tables(db_path)
+
+
+def test_triggers_keep_derived_tables_in_sync(db_manager):
+    first = db_manager.add_record("2026-01-01", "Sửa máy in", "Khoa Nội", "kẹt giấy", "Đang thực hiện")
+    second = db_manager.add_record("2026-01-01", "Sửa máy in", "", "thay mực", "Đang thực hiện")
+    db_manager.update_record(first, "2026-01-02", "Sửa máy in", "Khoa Ngoại", "đã thay trục", "Hoàn thành")
+    db_manager.delete_record(second)
+    check_derived_tables(db_manager.db_path)
+
+    assert db_manager.get_summary("2026-01-01", "2026-01-31", group_by="status") == [("Hoàn thành", 1)]
+    assert db_manager.search("trục")[0][0] == first
+    assert db_manager.search("mực") == []
+
+
+def test_bulk_insert_rebuilds_derived_rows(db_manager):
+    db_manager.add_record("2026-01-01", "Lắp camera", "Phòng IT", "trước lô", "Hoàn thành")
+    rows = [(f"2026-02-{i % 28 + 1:02d}", f"Công việc {i % 5}", f"Khoa {i % 3}", f"chi tiết số {i}",
+             "Hoàn thành" if i % 2 else "Đang thực hiện") for i in range(BULK_INSERT_MIN_ROWS + 10)]
+    assert db_manager.submit_insert_records(rows).result() == len(rows)
+    db_manager.add_record("2026-03-01", "Lắp camera", "Phòng IT", "sau lô", "Hoàn thành")
+    check_derived_tables(db_manager.db_path)
+
+    assert db_manager.get_total_records() == len(rows) + 2
+    # Trigger bị tạm bỏ trong lúc chèn lô phải được tạo lại
+    triggers = {row[0] for row in db_manager.conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert {"work_diary_fts_ai", "work_diary_stats_ai"} <= triggers
+    assert len(db_manager.search("sau lô")) == 1
+
+
+@pytest.mark.parametrize("sort", ["date", "id", "task", "status", "department"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_keyset_paging_returns_every_legacy_row(legacy_database, sort, descending):
+    db_path = legacy_database([
+        {"work_date": f"2026-01-{i % 6 + 1:02d}", "task_description": f"Công việc {i % 3}",
+         "department": None if i % 2 else "Khoa Nội", "details": "",
+         "status": None if i % 3 else "Hoàn thành", "created_at": None if i % 4 else "2026-01-01 08:00:00"}
+        for i in range(25)])
+
+    db_manager = DatabaseManager(db_path)
+    try:
+        pages = list(db_manager.iter_records_page(page_size=4, sort=sort, descending=descending))
+        ids = [row[0] for page in pages for row in page]
+        assert sorted(ids) == list(range(1, 26))
+        assert db_manager.conn.execute(
+            "SELECT COUNT(*) FROM work_diary WHERE created_at IS NULL OR status IS NULL").fetchone()[0] == 0
+    finally:
+        db_manager.close()
+    check_derived_tables(db_path)
@@ -0,0 +1,74 @@
+import pytest
+
+from src.database.db_manager import DatabaseManager
+
+
+def test_public_queries_use_indexes_on_new_database(db_manager):
+    plans = db_manager.explain_public_queries()
+    assert "get_recent_records" in plans
+    assert "search" in plans
+
+
+def test_public_queries_use_indexes_after_analyze(db_manager):
+    rows = [(f"2026-{month:02d}-{day:02d}", f"Công việc {i % 7}", f"Khoa {i % 11}", f"chi tiết {i}",
+             ("Hoàn thành", "Đang thực hiện", "Tạm dừng")[i % 3])
+            for i, (month, day) in enumerate((m, d) for m in range(1, 13) for d in range(1, 29) for _ in range(3))]
+    db_manager.submit_insert_records(rows).result()
+    # Thống kê của ANALYZE có thể làm query planner đổi kế hoạch
+    with db_manager._write_transaction() as cursor:
+        cursor.execute("ANALYZE")
+    db_manager.explain_public_queries()
+
+
+def test_explain_rejects_full_table_scan(db_manager):
+    with pytest.raises(AssertionError, match="không dùng index"):
+        db_manager.explain("SELECT * FROM work_diary WHERE details = ?", ("x",))
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM work_diary AS entries WHERE details = ?",
+    "SELECT * FROM work_diary_daily_stats s WHERE record_count = ?",
+    "SELECT w.id FROM work_diary w JOIN work_diary_daily_stats d ON d.work_date = w.work_date WHERE d.record_count = ?",
+])
+def test_explain_rejects_full_scan_under_any_alias(db_manager, query):
+    with pytest.raises(AssertionError, match="không dùng index"):
+        db_manager.explain(query, (1,))
+
+
+@pytest.mark.parametrize("detail, full_scan", [
+    ("SCAN work_diary", True),
+    ("SCAN TABLE work_diary", True),           # SQLite < 3.36
+    ("SCAN entries", True),
+    ("SCAN TABLE work_diary AS w", True),
+    ("SCAN work_diary USING INDEX idx_work_diary_date_created", False),
+    ("SCAN TABLE work_diary USING COVERING INDEX idx_work_diary_department", False),
+    ("SCAN work_diary_fts VIRTUAL TABLE INDEX 32:M3", False),
+    ("SCAN TABLE work_diary_fts VIRTUAL TABLE INDEX 32:M3", False),
+    ("SCAN (subquery-1)", False),
+    ("SCAN CONSTANT ROW", False),
+    ("SEARCH w USING INTEGER PRIMARY KEY (rowid=?)", False),
+])
+def test_full_scan_detection_covers_old_and_new_plan_wording(detail, full_scan):
+    assert DatabaseManager._is_full_scan(detail) is full_scan
+
+
+def test_migrations_upgrade_legacy_database(legacy_database):
+    path = legacy_database([
+        {"work_date": "2026-01-02", "task_description": "Sửa máy in", "department": None,
+         "details": "máy in tầng 2 kẹt giấy", "status": "Hoàn thành"},
+        {"work_date": "2026-01-03", "task_description": "Cài phần mềm", "department": "Khoa Nội",
+         "details": "cài đặt office", "status": "Đang thực hiện"},
+    ])
+
+    db_manager = DatabaseManager(path)
+    try:
+        versions = [row[0] for row in db_manager.conn.execute("SELECT version FROM schema_version ORDER BY version")]
+        assert versions[-1] == 6
+        assert db_manager.get_total_records() == 2
+        # Migration 005: NULL -> '' cho Phòng/Khoa; FTS và bảng tổng hợp được dựng từ dữ liệu cũ
+        assert db_manager.get_record_by_id(1)[3] == ""
+        assert [row[0] for row in db_manager.search("kẹt giấy")] == [1]
+        assert dict(db_manager.get_summary("2026-01-01", "2026-01-31", "task")) == {"Sửa máy in": 1, "Cài phần mềm": 1}
+        db_manager.explain_public_queries()
+    finally:
+        db_manager.close()
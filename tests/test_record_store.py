@@ -0,0 +1,91 @@
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from src.database.record_store import RecordStore
+
+TASKS = ("Quản trị mạng", "Hỗ trợ người dùng", "Camera")
+STATUSES = ("Hoàn thành", "Đang thực hiện")
+
+
+@pytest.fixture
+def rows():
+    start = date(2025, 12, 20)
+    return [(i + 1, (start + timedelta(days=i // 3)).isoformat(), TASKS[i % 3], f"Khoa {i % 4}" if i % 5 else None,
+             STATUSES[i % 2]) for i in range(90)]
+
+
+@pytest.fixture
+def store(rows):
+    store = RecordStore()
+    store.extend(rows)
+    return store
+
+
+def test_rows_round_trip(store, rows):
+    expected = [(i, d, t, dep or "", "", s) for i, d, t, dep, s in rows]
+    assert list(store.rows()) == expected
+    assert len(store) == len(rows)
+    assert len(store.tables["task"]) == len(TASKS)
+
+
+def test_rows_with_indexes_and_details(store):
+    assert list(store.rows([2, 0], ["b", "a"])) == [
+        (3, "2025-12-20", TASKS[2], "Khoa 2", "b", STATUSES[0]),
+        (1, "2025-12-20", TASKS[0], "", "a", STATUSES[0]),
+    ]
+
+
+@pytest.mark.parametrize("group_by, expression", [
+    ("date", "work_date"),
+    ("week", "strftime('%Y-W%W', work_date)"),
+    ("task", "task"),
+    ("status", "status"),
+    ("department", "COALESCE(department, '')"),
+])
+def test_group_indexes_match_sql(store, rows, group_by, expression):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE r (id, work_date, task, department, status)")
+    conn.executemany("INSERT INTO r VALUES (?, ?, ?, ?, ?)", rows)
+    expected = dict(conn.execute(f"SELECT {expression}, COUNT(*) FROM r GROUP BY 1"))
+
+    groups = store.group_indexes(group_by)
+    assert {key: len(indexes) for key, indexes in groups.items()} == expected
+    assert sorted(i for indexes in groups.values() for i in indexes) == list(range(len(rows)))
+    # Các nhóm theo thứ tự xuất hiện đầu tiên
+    assert [indexes[0] for indexes in groups.values()] == sorted(indexes[0] for indexes in groups.values())
+
+
+def test_group_indexes_rejects_unknown_column(store):
+    with pytest.raises(ValueError):
+        store.group_indexes("details")
+
+
+class FakeDetails:
+    def __init__(self):
+        self.calls = []
+
+    def get_details(self, ids):
+        self.calls.append(list(ids))
+        return [f"chi tiết {i}" for i in ids]
+
+
+def test_iter_chunks_reads_details_per_chunk(store, rows):
+    db_manager = FakeDetails()
+    chunks = list(store.iter_chunks(db_manager, chunk_size=40))
+
+    assert [len(chunk) for chunk in chunks] == [40, 40, 10]
+    assert [len(ids) for ids in db_manager.calls] == [40, 40, 10]
+    assert chunks[0][0] == (rows[0][1], rows[0][2], "", "chi tiết 1", rows[0][4])
+
+    indexes = store.group_indexes("task")[TASKS[1]]
+    selected = [row for chunk in store.iter_chunks(db_manager, 7, indexes) for row in chunk]
+    assert [row[1] for row in selected] == [TASKS[1]] * len(indexes)
+
+
+def test_nbytes_grows_with_rows(store):
+    empty = RecordStore()
+    assert empty.nbytes() == 0
+    # ~24 byte mỗi dòng cộng bảng chuỗi
+    assert 24 * len(store) <= store.nbytes() < 24 * len(store) + 2048
@@ -0,0 +1,65 @@
+from src.database.record_store import RecordStore
+from src.database.result_cache import ResultCache, estimate_size
+
+
+def test_get_returns_entry_for_same_data_version():
+    cache = ResultCache(max_bytes=1 << 20, max_entries=10)
+    rows = [(1, "2026-01-01", "Công việc")]
+    cache.put("key", 3, rows)
+
+    assert cache.get("key", 3) is rows
+    assert cache.stats()["hits"] == 1
+
+
+def test_newer_data_version_discards_entry():
+    cache = ResultCache(max_bytes=1 << 20, max_entries=10)
+    cache.put("key", 3, [(1,)])
+
+    assert cache.get("key", 4) is None
+    assert cache.get("key", 3) is None
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 2}
+
+
+def test_evicts_least_recently_used_by_entry_count():
+    cache = ResultCache(max_bytes=1 << 20, max_entries=2)
+    cache.put("a", 1, [(1,)])
+    cache.put("b", 1, [(2,)])
+    cache.get("a", 1)
+    cache.put("c", 1, [(3,)])
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == [(1,)]
+    assert cache.get("c", 1) == [(3,)]
+
+
+def test_evicts_by_size_and_skips_oversized_results():
+    rows = [(i, f"chi tiết {i}") for i in range(100)]
+    size = estimate_size(rows)
+    cache = ResultCache(max_bytes=size * 2 + size // 2, max_entries=10)
+    for key in "abc":
+        cache.put(key, 1, list(rows))
+
+    assert cache.get("a", 1) is None
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+    cache.put("big", 1, rows * 10)
+    assert cache.get("big", 1) is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_replacing_key_keeps_byte_count():
+    cache = ResultCache(max_bytes=1 << 20, max_entries=10)
+    cache.put("key", 1, [(1, "a")])
+    cache.put("key", 2, [(1, "a")])
+
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == estimate_size([(1, "a")])
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+
+def test_record_store_size_uses_nbytes():
+    store = RecordStore()
+    store.extend([(1, "2026-01-01", "Công việc", "Khoa Nội", "Hoàn thành")])
+    assert estimate_size(store) == store.nbytes()
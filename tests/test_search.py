@@ -0,0 +1,32 @@
+def test_search_ranks_whole_match_set(db_manager):
+    # Dòng liên quan nhất là dòng cũ nhất, đứng sau hàng nghìn dòng khớp mới hơn
+    rows = [("2020-01-01", "Sửa máy in", "Khoa Nội", "máy in máy in máy in kẹt giấy", "Hoàn thành")]
+    rows += [("2026-01-01", f"Công việc {i}", "Phòng IT", f"kiểm tra thiết bị, có máy in số {i} và nhiều việc khác",
+              "Hoàn thành") for i in range(2000)]
+    db_manager.submit_insert_records(rows).result()
+
+    results = db_manager.search("máy in", limit=10)
+    assert len(results) == 10
+    assert results[0][1] == "2020-01-01"
+    assert "[máy]" in results[0][5]
+
+
+def test_search_pages_with_offset(db_manager):
+    rows = [("2026-01-01", f"Bảo trì camera {i}", "Phòng IT", "camera " * (i % 5 + 1), "Hoàn thành")
+            for i in range(30)]
+    db_manager.submit_insert_records(rows).result()
+
+    everything = db_manager.search("camera", limit=100)
+    pages = db_manager.search("camera", limit=12) + db_manager.search("camera", limit=12, offset=12) \
+        + db_manager.search("camera", limit=12, offset=24)
+    assert len(everything) == 30
+    assert [row[0] for row in pages] == [row[0] for row in everything]
+
+
+def test_search_date_filter(db_manager):
+    rows = [(f"2026-01-{day:02d}", "Kiểm tra tổng đài", "Phòng IT", "tổng đài", "Hoàn thành") for day in range(1, 11)]
+    db_manager.submit_insert_records(rows).result()
+
+    results = db_manager.search("tổng đài", from_date="2026-01-04", to_date="2026-01-06")
+    assert sorted(row[1] for row in results) == ["2026-01-04", "2026-01-05", "2026-01-06"]
+    assert db_manager.search("   ") == []
@@ -0,0 +1,94 @@
+import pytest
+
+from src.ui.components.tree_binder import TreeviewBinder
+
+
+class FakeTreeview:
+    """Treeview phẳng theo đúng ngữ nghĩa của Tk: detach giữ item, insert trùng iid báo lỗi."""
+
+    def __init__(self):
+        self.children = []
+        self.items = {}  # iid -> values, gồm cả item đang bị tách
+
+    def get_children(self, parent=''):
+        return tuple(self.children)
+
+    def exists(self, iid):
+        return iid in self.items
+
+    def insert(self, parent, index, iid, values):
+        if iid in self.items:
+            raise RuntimeError(f"Item {iid} already exists")
+        self.items[iid] = values
+        self.children.insert(len(self.children) if index == 'end' else index, iid)
+
+    def item(self, iid, values):
+        self.items[iid] = values
+
+    def move(self, iid, parent, index):
+        if iid in self.children:
+            self.children.remove(iid)
+        self.children.insert(len(self.children) if index == 'end' else index, iid)
+
+    def detach(self, *iids):
+        for iid in iids:
+            self.children.remove(iid)
+
+    def delete(self, *iids):
+        for iid in iids:
+            if iid in self.children:
+                self.children.remove(iid)
+            del self.items[iid]
+
+
+def rows(ids, suffix=""):
+    return [(i, f"row {i}{suffix}") for i in ids]
+
+
+def shown(tree):
+    return [(int(iid), tree.items[iid][1]) for iid in tree.children]
+
+
+@pytest.fixture
+def tree():
+    return FakeTreeview()
+
+
+def test_set_rows_applies_inserts_updates_moves_and_deletes(tree):
+    binder = TreeviewBinder(tree)
+    binder.set_rows(rows(range(10)))
+    target = rows([9, 0, 1, 2, 12, 4, 5, 6, 7]) + rows([3], " (sửa)")
+    binder.set_rows(target)
+    assert shown(tree) == target
+    assert set(tree.items) == {str(i) for i, _ in target}
+
+
+def test_set_rows_keeps_longest_ordered_run_in_place(tree):
+    binder = TreeviewBinder(tree)
+    binder.set_rows(rows(range(100)))
+    steps = sum(1 for _ in binder.sync(rows([99] + list(range(99)))))
+    assert steps == 1
+    assert shown(tree) == rows([99] + list(range(99)))
+
+
+def test_superseded_reorder_leaves_tree_consistent(tree):
+    binder = TreeviewBinder(tree)
+    binder.set_rows(rows(range(2000)))
+    steps = binder.sync(rows(reversed(range(2000))))
+    for _ in range(500):
+        next(steps)
+    # Báo cáo mới hơn đến trước khi lần đồng bộ trước chạy xong
+    binder.set_rows(rows(range(1000, 3000)))
+    assert shown(tree) == rows(range(1000, 3000))
+    assert set(tree.items) == {str(i) for i in range(1000, 3000)}
+
+
+def test_cancel_reattaches_rows_not_yet_moved(tree):
+    binder = TreeviewBinder(tree)
+    binder.set_rows(rows(range(50)))
+    steps = binder.sync(rows(reversed(range(50))))
+    for _ in range(10):
+        next(steps)
+    binder.cancel()
+    assert sorted(tree.children, key=int) == [str(i) for i in range(50)]
+    assert next(steps, None) is None
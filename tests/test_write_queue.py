@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from src.database.write_queue import WriteQueue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "queue.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE items (value TEXT NOT NULL)")
+    conn.close()
+    return path
+
+
+class Writer:
+    """Giao dịch giống DatabaseManager._write_transaction: một kết nối autocommit, commit khi thoát khối with."""
+
+    def __init__(self, path, fail_commit=False):
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.fail_commit = fail_commit
+        self.transactions = 0
+
+    @contextmanager
+    def transaction(self):
+        self.transactions += 1
+        with self.conn:
+            yield self.conn.cursor()
+            if self.fail_commit:
+                raise sqlite3.OperationalError("disk I/O error")
+
+
+def insert(value):
+    def op(cursor):
+        cursor.execute("INSERT INTO items (value) VALUES (?)", (value,))
+        return cursor.lastrowid, None
+    return op
+
+
+def values(path):
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute("SELECT value FROM items ORDER BY rowid")]
+
+
+def test_failed_op_rolls_back_only_its_savepoint(db_path):
+    writer = Writer(db_path)
+    queue = WriteQueue(writer.transaction, flush_interval=10)
+
+    def insert_then_fail(cursor):
+        cursor.execute("INSERT INTO items (value) VALUES ('b')")
+        raise ValueError("invalid record")
+
+    first = queue.submit(insert("a"))
+    failed = queue.submit(insert_then_fail)
+    last = queue.submit(insert("c"), urgent=True)
+
+    assert first.result(5) == 1
+    with pytest.raises(ValueError, match="invalid record"):
+        failed.result(5)
+    assert last.result(5) is not None
+    assert values(db_path) == ["a", "c"]
+    assert writer.transactions == 1
+    queue.close()
+
+
+def test_ops_are_batched_into_one_transaction(db_path):
+    writer = Writer(db_path)
+    queue = WriteQueue(writer.transaction, flush_interval=10, batch_size=50)
+    futures = [queue.submit(insert(str(i))) for i in range(120)]
+    queue.flush(5)
+
+    assert [future.result(5) for future in futures] == list(range(1, 121))
+    # 50 + 50 + 20 thao tác và lệnh flush
+    assert writer.transactions == 3
+    queue.close()
+
+
+def test_after_commit_runs_once_data_is_visible(db_path):
+    writer = Writer(db_path)
+    queue = WriteQueue(writer.transaction)
+    seen = []
+
+    def op(cursor):
+        cursor.execute("INSERT INTO items (value) VALUES ('x')")
+        return "ok", lambda: seen.append(values(db_path))
+
+    assert queue.submit(op, urgent=True).result(5) == "ok"
+    assert seen == [["x"]]
+    queue.close()
+
+
+def test_commit_failure_fails_whole_batch(db_path):
+    writer = Writer(db_path, fail_commit=True)
+    queue = WriteQueue(writer.transaction, flush_interval=10)
+    hooks = []
+
+    def op(cursor):
+        cursor.execute("INSERT INTO items (value) VALUES ('x')")
+        return None, lambda: hooks.append(True)
+
+    futures = [queue.submit(op), queue.submit(op, urgent=True)]
+    for future in futures:
+        with pytest.raises(sqlite3.OperationalError):
+            future.result(5)
+    assert hooks == []
+    assert values(db_path) == []
+    queue.close()
+
+
+def test_close_flushes_pending_ops_and_rejects_new_ones(db_path):
+    writer = Writer(db_path)
+    queue = WriteQueue(writer.transaction, flush_interval=10)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(cursor):
+        started.set()
+        release.wait(5)
+        return insert("slow")(cursor)
+
+    queue.submit(slow, urgent=True)
+    started.wait(5)
+    pending = queue.submit(insert("pending"))
+    closer = threading.Thread(target=queue.close)
+    closer.start()
+    release.set()
+    closer.join(5)
+
+    assert pending.result(5) == 2
+    assert values(db_path) == ["slow", "pending"]
+    with pytest.raises(RuntimeError, match="closed"):
+        queue.submit(insert("late"))